@@ -1,14 +1,40 @@
+from typing import Any, Mapping, Optional
+
 from flask import Flask
-from routes.inicio import inicio  # Importar usuarios_activos también
-from routes.Turnos import Dashboard
 
-app = Flask(__name__)
+from planner_metrics import PhaseTimer
+import startup
+
+
+def create_app(config: Optional[Mapping[str, Any]] = None) -> Flask:
+    """
+    Crea la aplicación. config sobrescribe los valores por defecto (ver startup.default_config):
+    WARMUP, WARMUP_ASYNC, WARMUP_PLANS, IMPORT_BUDGET_MS, TESTING, ...
+    Cada fase del arranque se mide y se registra en el log; /ready informa cuándo terminó.
+    """
+    timer = PhaseTimer(enabled=True)
+    with timer.phase("import_routes"):
+        from routes.inicio import inicio
+        from routes.Turnos import Dashboard
+        from routes.health import health
+
+    app = Flask(__name__)
+    app.config.from_mapping(startup.default_config())
+    if config:
+        app.config.from_mapping(config)
 
-app.register_blueprint(inicio)
-app.register_blueprint(Dashboard)
+    with timer.phase("register_blueprints"):
+        app.register_blueprint(inicio)
+        app.register_blueprint(Dashboard)
+        app.register_blueprint(health)
 
+    startup.start(app, timer)
+    return app
+
+
+# instancia por defecto (python app.py, benchmarks y pruebas que hacen `from app import app`)
+app = create_app()
 
 
 if __name__ == "__main__":
     app.run(debug=True)
-
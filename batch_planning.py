@@ -0,0 +1,351 @@
+# batch_planning.py
+"""
+Planeación por lotes de varias tiendas (puntos de venta).
+
+ - cada tienda es un spec: asesores, días, semanas, festivos y opciones
+ - las tiendas de 3 asesores x 3 turnos usan ShiftPlanner (ruta combinatoria, se resuelven
+   en el proceso que llama); el resto (más asesores, coberturas, turnos permitidos) usa
+   CoveragePlanner y se resuelve en paralelo en un pool de procesos
+ - un único pool por proceso, creado en el primer lote y compartido por todos los lotes
+   (p. ej. peticiones concurrentes a /plan/batch): procesos x hilos de CP-SAT por proceso
+   <= BATCH_CPU_BUDGET; el cpu_budget de un lote limita cuántas de sus tiendas ocupan
+   el pool a la vez
+ - un campo del spec que el modelo de la tienda no admite es un error de esa tienda,
+   nunca se ignora; start_date y holidays anclan el plan en ambos modelos
+ - los resultados se emiten a medida que termina cada tienda (NDJSON por HTTP o archivo),
+   con un error por tienda en vez de abortar el lote y un resumen al final
+
+Uso por línea de comandos:
+    python batch_planning.py tiendas.json --output planes.ndjson --cpu-budget 4
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+# claves que sólo entiende CoveragePlanner
+_COVERAGE_KEYS = ("coverage", "shifts", "allowed_shifts", "same_shift_all_week")
+
+
+def default_cpu_budget() -> int:
+    return int(os.environ.get("BATCH_CPU_BUDGET", "0")) or os.cpu_count() or 1
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_threads = 1
+_executor_lock = Lock()
+
+
+def _shared_executor() -> Tuple[ProcessPoolExecutor, int]:
+    """
+    Pool de procesos de los lotes, creado en el primer uso con BATCH_PROCESSES procesos
+    (por defecto uno por núcleo del presupuesto). Devuelve (pool, hilos de CP-SAT por proceso).
+    """
+    global _executor, _executor_threads
+    with _executor_lock:
+        if _executor is None:
+            budget = default_cpu_budget()
+            procs = max(1, min(int(os.environ.get("BATCH_PROCESSES", "0")) or budget, budget))
+            _executor_threads = max(1, budget // procs)
+            _executor = ProcessPoolExecutor(
+                max_workers=procs,
+                # spawn: no heredar hilos del proceso web (Flask, cola de trabajos)
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(_executor_threads,),
+            )
+        return _executor, _executor_threads
+
+
+def _discard_executor(executor: ProcessPoolExecutor) -> None:
+    """Descarta un pool roto (murió un proceso) para que el próximo lote cree otro."""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def store_id(spec: Dict[str, Any], index: int) -> str:
+    return str(spec.get("store_id") or f"tienda_{index + 1}")
+
+
+def _parse_bool(value: Any, default: bool) -> bool:
+    """Booleano de un spec (JSON, CSV o CLI): "false", "0", "no" son False."""
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "on")
+
+
+def build_store_planner(spec: Dict[str, Any]) -> Tuple[Any, str]:
+    """
+    Crea el planner de una tienda. Devuelve (planner, modelo) con modelo "shift" o "coverage".
+    Lanza ShiftPlannerError / ValueError si el spec no es válido.
+
+    Campos: advisors, days, weeks (4), rotation (true), start_date y holidays (YYYY-MM-DD),
+    opening_advisor; y para CoveragePlanner: shifts, coverage, allowed_shifts, same_shift_all_week.
+    En CoveragePlanner opening_advisor limita a ese asesor a Apertura (allowed_shifts).
+    """
+    from coverage_planning import CoveragePlanner
+    from planning_model import ShiftPlanner
+
+    if not isinstance(spec, dict):
+        raise ValueError("Cada tienda debe ser un objeto")
+    advisors = spec.get("advisors")
+    weeks = int(spec.get("weeks", 4))
+    rotation = _parse_bool(spec.get("rotation"), True)
+    opening_advisor = spec.get("opening_advisor")
+    holidays = [date.fromisoformat(h) for h in spec.get("holidays") or []]
+    start_date = date.fromisoformat(spec["start_date"]) if spec.get("start_date") else None
+    if any(key in spec for key in _COVERAGE_KEYS) or (advisors and len(advisors) != 3):
+        allowed = dict(spec.get("allowed_shifts") or {})
+        if opening_advisor:
+            if opening_advisor in allowed:
+                raise ValueError(f"{opening_advisor} está en opening_advisor y en allowed_shifts")
+            allowed[opening_advisor] = [ShiftPlanner.SHIFT_MAP[1]]
+        planner = CoveragePlanner(
+            advisors=advisors,
+            shifts=spec.get("shifts"),
+            days=spec.get("days"),
+            weeks=weeks,
+            coverage=spec.get("coverage"),
+            allowed_shifts=allowed,
+            enable_weekly_rotation=rotation,
+            same_shift_all_week=_parse_bool(spec.get("same_shift_all_week"), True),
+            start_date=start_date,
+            holidays=holidays,
+        )
+        return planner, "coverage"
+    planner = ShiftPlanner(
+        advisors=advisors,
+        days=spec.get("days"),
+        weeks=weeks,
+        enforce_opening_only=bool(opening_advisor),
+        opening_only_advisor=opening_advisor,
+        enable_weekly_rotation=rotation,
+        holidays=holidays,
+        start_date=start_date,
+        cache=None,
+        store=None,
+    )
+    return planner, "shift"
+
+
+def solve_store(
+    spec: Dict[str, Any],
+    index: int,
+    time_limit_seconds: Optional[int] = 10,
+    built: Optional[Tuple[Any, str]] = None,
+) -> Dict[str, Any]:
+    """
+    Resuelve una tienda. Nunca lanza: los errores se devuelven como resultado de la tienda.
+    built: (planner, modelo) ya creado con build_store_planner(spec), para no crearlo dos veces.
+    """
+    sid = store_id(spec, index) if isinstance(spec, dict) else f"tienda_{index + 1}"
+    start = time.perf_counter()
+    try:
+        planner, model = built or build_store_planner(spec)
+        if model == "shift":
+            plan = planner.solve_plan(time_limit_seconds=time_limit_seconds)
+            method = planner.solve_method
+        else:
+            planner.build_and_solve(time_limit_seconds=time_limit_seconds)
+            plan = planner.plan
+            method = "cp-sat"
+    except Exception as e:
+        return {"index": index, "store_id": sid, "status": "error", "message": str(e),
+                "seconds": round(time.perf_counter() - start, 4)}
+    return {"index": index, "store_id": sid, "status": "ok", "model": model, "method": method,
+            "seconds": round(time.perf_counter() - start, 4), "plan": plan}
+
+
+def _init_worker(threads: int) -> None:
+    """Inicializador de cada proceso: limita los hilos de CP-SAT a su parte del presupuesto."""
+    from solver_policy import solver_policy
+
+    solver_policy.max_threads = threads
+    solver_policy.max_workers_per_solve = threads
+
+
+def _inline_planner(spec: Any) -> Tuple[bool, Optional[Tuple[Any, str]]]:
+    """
+    Decide si la tienda se resuelve en este proceso (ruta combinatoria o spec inválido).
+    Devuelve (en_línea, (planner, modelo) o None si el spec no es válido) para reutilizarlo.
+    """
+    try:
+        built = build_store_planner(spec)
+    except Exception:
+        return True, None
+    planner, model = built
+    return model == "shift" and planner.uses_fast_path, built
+
+
+def plan_stores(
+    stores: List[Dict[str, Any]],
+    cpu_budget: Optional[int] = None,
+    time_limit_seconds: Optional[int] = 10,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Resuelve las tiendas y produce un resultado por tienda en orden de finalización:
+    {"index", "store_id", "status": "ok", "model", "method", "seconds", "plan": CompactPlan}
+    o {"index", "store_id", "status": "error", "message", "seconds"}.
+
+    Las tiendas CP-SAT van al pool compartido; cpu_budget (acotado por BATCH_CPU_BUDGET)
+    limita cuántas de este lote ocupan el pool a la vez.
+    """
+    budget = max(1, min(cpu_budget or default_cpu_budget(), default_cpu_budget()))
+    inline: Dict[int, Optional[Tuple[Any, str]]] = {}
+    remote = []
+    for i, spec in enumerate(stores):
+        runs_inline, built = _inline_planner(spec)
+        if runs_inline:
+            inline[i] = built
+        else:
+            # el proceso del pool vuelve a crear el planner a partir del spec
+            remote.append(i)
+    queued = iter(remote)
+    executor, window = None, 0
+    futures: Dict[Any, int] = {}
+    pending: set = set()
+
+    def fill() -> None:
+        # mantiene hasta `window` tiendas de este lote en el pool
+        while len(pending) < window:
+            i = next(queued, None)
+            if i is None:
+                return
+            future = executor.submit(solve_store, stores[i], i, time_limit_seconds)
+            futures[future] = i
+            pending.add(future)
+
+    try:
+        if remote:
+            executor, threads = _shared_executor()
+            window = max(1, budget // threads)
+            try:
+                fill()
+            except BrokenProcessPool:
+                _discard_executor(executor)
+                executor, _ = _shared_executor()
+                fill()
+        for i, built in inline.items():
+            yield solve_store(stores[i], i, time_limit_seconds, built)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    # p. ej. un proceso del pool murió: se reporta como error de esa tienda
+                    if isinstance(e, BrokenProcessPool):
+                        _discard_executor(executor)
+                    i = futures[future]
+                    yield {"index": i, "store_id": store_id(stores[i], i), "status": "error",
+                           "message": f"Fallo del proceso resolvedor: {e}", "seconds": None}
+            try:
+                fill()
+            except BrokenProcessPool as e:
+                for i in queued:
+                    yield {"index": i, "store_id": store_id(stores[i], i), "status": "error",
+                           "message": f"Fallo del proceso resolvedor: {e}", "seconds": None}
+    finally:
+        # el pool es compartido: sólo se cancelan las tiendas de este lote que no empezaron
+        for future in pending:
+            future.cancel()
+
+
+def result_record(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado serializable: el plan como lista de filas (Asesor, Semana, Día, Turno)."""
+    record = {k: v for k, v in result.items() if k != "plan"}
+    if "plan" in result:
+        record["plan"] = result["plan"].records()
+    return record
+
+
+def iter_ndjson(results: Iterable[Dict[str, Any]], cpu_budget: Optional[int] = None) -> Iterator[str]:
+    """Una línea JSON por tienda y una línea final {"summary": ...} con el reporte de errores."""
+    start = time.perf_counter()
+    total = 0
+    failed: List[Dict[str, Any]] = []
+    for result in results:
+        total += 1
+        if result["status"] != "ok":
+            failed.append({"store_id": result["store_id"], "message": result["message"]})
+        yield json.dumps(result_record(result), ensure_ascii=False) + "\n"
+    elapsed = time.perf_counter() - start
+    summary = {
+        "stores": total,
+        "ok": total - len(failed),
+        "errors": len(failed),
+        "failed": failed,
+        "seconds": round(elapsed, 3),
+        "stores_per_second": round(total / elapsed, 2) if elapsed > 0 else None,
+        "cpu_budget": cpu_budget or default_cpu_budget(),
+    }
+    yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+
+
+def load_stores(path: str) -> List[Dict[str, Any]]:
+    """Lee tiendas de un archivo JSON (lista o {"stores": [...]}) o NDJSON (una por línea)."""
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        # NDJSON de una sola tienda también es JSON válido
+        return data["stores"] if "stores" in data else [data]
+    return data
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Planeación por lotes de varias tiendas (salida NDJSON).")
+    parser.add_argument("stores", help="archivo JSON/NDJSON con las tiendas")
+    parser.add_argument("--output", "-o", help="archivo de salida (por defecto stdout)")
+    parser.add_argument("--cpu-budget", type=int, default=None, help="núcleos a usar en total")
+    parser.add_argument("--time-limit", type=int, default=10, help="segundos por tienda")
+    args = parser.parse_args(argv)
+
+    stores = load_stores(args.stores)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    errors = 0
+    try:
+        results = plan_stores(stores, cpu_budget=args.cpu_budget, time_limit_seconds=args.time_limit)
+        for line in iter_ndjson(results, cpu_budget=args.cpu_budget):
+            out.write(line)
+            out.flush()
+            if line.startswith('{"summary"'):
+                errors = json.loads(line)["summary"]["errors"]
+    finally:
+        shutdown_executor()
+        if out is not sys.stdout:
+            out.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
+# Fin de batch_planning.py
@@ -0,0 +1,83 @@
+# benchmarks/bench_batch_planning.py
+"""
+Planeación por lotes de tiendas de punta a punta (POST /plan/batch con respuesta NDJSON):
+tiendas por segundo según el presupuesto de CPU, frente a una petición por tienda en serie.
+
+La mezcla de tiendas combina tiendas de 3 asesores (ruta combinatoria) con tiendas de
+N asesores y coberturas (CP-SAT en el pool de procesos).
+
+Uso:
+    python benchmarks/bench_batch_planning.py --stores 300 --budgets 1 2 4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from batch_planning import solve_store  # noqa: E402
+
+
+def synthetic_stores(count: int, coverage_share: float = 0.3, seed: int = 11):
+    rng = random.Random(seed)
+    stores = []
+    for i in range(count):
+        if rng.random() < coverage_share:
+            n = rng.randint(6, 20)
+            stores.append({
+                "store_id": f"tienda_{i}",
+                "advisors": [f"A{j}" for j in range(n)],
+                "weeks": 4,
+                "coverage": {"Apertura": 2, "Cierre": 2, "Intermedio": 1},
+            })
+        else:
+            stores.append({"store_id": f"tienda_{i}", "weeks": rng.choice([4, 8, 12]), "rotation": True})
+    return stores
+
+
+def run_batch(client, stores, budget):
+    t0 = time.perf_counter()
+    first = None
+    resp = client.post("/plan/batch", json={"stores": stores, "cpu_budget": budget}, buffered=False)
+    lines = 0
+    for chunk in resp.response:
+        if first is None:
+            first = time.perf_counter() - t0
+        lines += chunk.count(b"\n")
+    elapsed = time.perf_counter() - t0
+    summary = json.loads(chunk.decode("utf-8").splitlines()[-1])["summary"]
+    assert summary["errors"] == 0, summary["failed"]
+    return elapsed, first, lines - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stores", type=int, default=300)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--serial-stores", type=int, default=60, help="tiendas para la línea base en serie")
+    args = parser.parse_args()
+
+    stores = synthetic_stores(args.stores)
+    client = app.test_client()
+    header = f"{'modo':>16} {'tiendas':>8} {'s':>8} {'1er resultado s':>16} {'tiendas/s':>10}"
+    print(header)
+    print("-" * len(header))
+
+    serial = stores[: args.serial_stores]
+    t0 = time.perf_counter()
+    for i, spec in enumerate(serial):
+        solve_store(spec, i)
+    elapsed = time.perf_counter() - t0
+    print(f"{'serie (1 x 1)':>16} {len(serial):>8} {elapsed:>8.2f} {'-':>16} {len(serial) / elapsed:>10.1f}")
+
+    for budget in args.budgets:
+        elapsed, first, count = run_batch(client, stores, budget)
+        print(f"{f'lote cpu={budget}':>16} {count:>8} {elapsed:>8.2f} {first:>16.3f} {count / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_bulk_punch.py
+"""
+Marcas de jornada: un POST de formulario por marca (/hora_inicio_trabajo, /hora_fin_trabajo,
+que renderizan la plantilla) frente a un lote JSON en /api/marcas. Registro SQLite real
+en un directorio temporal (fsync incluido).
+
+Uso:
+    python benchmarks/bench_bulk_punch.py --events 1000 5000 10000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time_log  # noqa: E402
+from app import app  # noqa: E402
+from usuarios import usuarios  # noqa: E402
+
+
+def _fresh_log(directory: str, name: str) -> time_log.TimeLog:
+    if time_log._time_log is not None:
+        time_log._time_log.close()
+    time_log._time_log = time_log.TimeLog(os.path.join(directory, name))
+    return time_log._time_log
+
+
+def _ensure_users(count: int) -> list:
+    base = 100000
+    for uid in range(base, base + count):
+        usuarios.setdefault(uid, {"nombre": f"Bench {uid}", "correo": f"b{uid}@bench", "activo": True})
+    return list(range(base, base + count))
+
+
+def bench_forms(client, user_ids) -> float:
+    t0 = time.perf_counter()
+    for uid in user_ids:
+        client.post("/hora_inicio_trabajo", data={"user_id": str(uid)})
+        client.post("/hora_fin_trabajo", data={"user_id": str(uid)})
+    return time.perf_counter() - t0
+
+
+def bench_bulk(client, user_ids) -> float:
+    start = datetime(2026, 1, 5, 8)
+    eventos = []
+    for uid in user_ids:
+        eventos.append({"user_id": uid, "tipo": "inicio", "ts": start.isoformat()})
+        eventos.append({"user_id": uid, "tipo": "fin", "ts": (start + timedelta(hours=8)).isoformat()})
+    t0 = time.perf_counter()
+    resp = client.post("/api/marcas", json={"eventos": eventos})
+    elapsed = time.perf_counter() - t0
+    assert resp.status_code == 200, resp.get_json()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--form-events", type=int, default=400, help="marcas para la ruta de formularios (más lenta)")
+    args = parser.parse_args()
+
+    client = app.test_client()
+    header = f"{'ruta':>12} {'marcas':>8} {'s':>9} {'marcas/s':>11}"
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as directory:
+        _fresh_log(directory, "forms.sqlite3")
+        user_ids = _ensure_users(args.form_events // 2)
+        elapsed = bench_forms(client, user_ids)
+        print(f"{'formularios':>12} {args.form_events:>8} {elapsed:>9.3f} {args.form_events / elapsed:>11.0f}")
+
+        for n in args.events:
+            _fresh_log(directory, f"bulk_{n}.sqlite3")
+            elapsed = bench_bulk(client, _ensure_users(n // 2))
+            print(f"{'lote JSON':>12} {n:>8} {elapsed:>9.3f} {n / elapsed:>11.0f}")
+        time_log._time_log.close()
+        time_log._time_log = None
+
+
+if __name__ == "__main__":
+    main()
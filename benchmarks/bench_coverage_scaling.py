@@ -0,0 +1,60 @@
+# benchmarks/bench_coverage_scaling.py
+"""
+Escalamiento de CoveragePlanner: de 3 a 500 asesores y de 4 a 52 semanas.
+
+La cobertura reparte a los asesores en partes iguales entre los 3 turnos
+(floor(n/3) por turno) y se activa la rotación semanal.
+
+Uso:
+    python benchmarks/bench_coverage_scaling.py --advisors 3 10 50 100 500 --weeks 4 12 52
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coverage_planning import CoveragePlanner  # noqa: E402
+from solver_policy import SolverResourcePolicy  # noqa: E402
+
+
+def run_case(n_advisors: int, weeks: int, time_limit: int):
+    advisors = [f"Asesor_{i + 1}" for i in range(n_advisors)]
+    per_shift = max(1, n_advisors // 3)
+    planner = CoveragePlanner(
+        advisors=advisors,
+        weeks=weeks,
+        coverage={"Apertura": per_shift, "Cierre": per_shift, "Intermedio": per_shift},
+        enable_weekly_rotation=True,
+        policy=SolverResourcePolicy(max_time_limit=time_limit),
+    )
+    t0 = time.perf_counter()
+    planner._make_model()
+    t1 = time.perf_counter()
+    size = planner.model_size()
+    planner.build_and_solve(time_limit_seconds=time_limit)
+    t2 = time.perf_counter()
+    build = t1 - t0
+    return size, build * 1000, max(0.0, t2 - t1 - build) * 1000, planner.solver.StatusName(planner.status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--advisors", type=int, nargs="+", default=[3, 10, 50, 100, 500])
+    parser.add_argument("--weeks", type=int, nargs="+", default=[4, 12, 52])
+    parser.add_argument("--time-limit", type=int, default=60)
+    args = parser.parse_args()
+
+    header = f"{'asesores':>8} {'semanas':>7} {'vars':>8} {'constr':>8} {'build ms':>9} {'solve ms':>9} estado"
+    print(header)
+    print("-" * len(header))
+    for n in args.advisors:
+        for weeks in args.weeks:
+            size, build_ms, solve_ms, status = run_case(n, weeks, args.time_limit)
+            print(f"{n:>8} {weeks:>7} {size['variables']:>8} {size['constraints']:>8} "
+                  f"{build_ms:>9.1f} {solve_ms:>9.1f} {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/bench_formulation.py
+"""
+Compara la formulación compacta (una variable por asesor-semana) con la expandida
+(una variable por asesor-semana-día): tamaño del modelo y tiempos de construcción/solución.
+
+Uso:
+    python benchmarks/bench_formulation.py --weeks 1 4 12 52 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planning_model import ShiftPlanner  # noqa: E402
+
+
+def run_case(weeks: int, compact: bool, repeat: int):
+    build_times, solve_times = [], []
+    size = None
+    for _ in range(repeat):
+        planner = ShiftPlanner(
+            weeks=weeks,
+            enable_weekly_rotation=True,
+            enforce_opening_only=False,
+            cache=None,
+            store=None,
+            compact=compact,
+            fast_path=False,
+        )
+        t0 = time.perf_counter()
+        planner._make_model()
+        t1 = time.perf_counter()
+        size = planner.model_size()
+        planner.build_and_solve(time_limit_seconds=30)
+        t2 = time.perf_counter()
+        build_times.append(t1 - t0)
+        # build_and_solve reconstruye el modelo: se descuenta la construcción medida
+        solve_times.append(max(0.0, (t2 - t1) - (t1 - t0)))
+    return {
+        "variables": size["variables"],
+        "constraints": size["constraints"],
+        "build_ms": statistics.median(build_times) * 1000,
+        "solve_ms": statistics.median(solve_times) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, nargs="+", default=[1, 4, 12, 52])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    header = f"{'weeks':>5} {'modo':>9} {'vars':>7} {'constr':>7} {'build ms':>9} {'solve ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for weeks in args.weeks:
+        for compact in (False, True):
+            r = run_case(weeks, compact, args.repeat)
+            mode = "compacto" if compact else "expandido"
+            print(f"{weeks:>5} {mode:>9} {r['variables']:>7} {r['constraints']:>7} "
+                  f"{r['build_ms']:>9.2f} {r['solve_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
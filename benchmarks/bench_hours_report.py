@@ -0,0 +1,76 @@
+# benchmarks/bench_hours_report.py
+"""
+Reporte de horas (hours_report) sobre un año de marcas: primera lectura del registro,
+reporte con semanas cerradas en caché y reporte tras una marca tardía (invalidación).
+
+Uso:
+    python benchmarks/bench_hours_report.py --advisors 300 --days 360
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hours_report import HoursReport  # noqa: E402
+from planning_model import ShiftPlanner  # noqa: E402
+from time_log import FIN, INICIO, REINICIO, TimeLog  # noqa: E402
+
+START = date(2025, 1, 6)
+
+
+def synthetic_events(advisors: int, days: int, seed: int = 7):
+    rng = random.Random(seed)
+    events = []
+    for offset in range(days):
+        day = START + timedelta(days=offset)
+        if day.weekday() == 6:
+            continue
+        base = datetime.combine(day, datetime.min.time())
+        for uid in range(advisors):
+            start = base + timedelta(hours=7, minutes=rng.randint(0, 60))
+            end = start + timedelta(hours=8, minutes=rng.randint(0, 90))
+            events.extend([(uid, INICIO, start), (uid, FIN, end), (uid, REINICIO, end + timedelta(minutes=1))])
+    return events
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--advisors", type=int, default=300)
+    parser.add_argument("--days", type=int, default=360)
+    args = parser.parse_args()
+
+    log = TimeLog(":memory:", synchronous="OFF")
+    events = synthetic_events(args.advisors, args.days)
+    log.append_many(events)
+    plan = ShiftPlanner(weeks=args.days // 7 + 1, enable_weekly_rotation=True, cache=None, store=None).solve_plan()
+    advisor_for_user = {uid: plan.advisors[uid % len(plan.advisors)] for uid in range(args.advisors)}
+    today = START + timedelta(days=args.days - 3)
+    reporter = HoursReport(log)
+
+    def run():
+        reporter.report(plan=plan, plan_start=START, advisor_for_user=advisor_for_user, today=today)
+
+    print(f"marcas: {len(events)}  asesores: {args.advisors}  días: {args.days}")
+    print(f"{'caso':>28} {'ms':>9}")
+    print(f"{'primera lectura + agregado':>28} {timed(run):>9.1f}")
+    print(f"{'semanas cerradas en caché':>28} {timed(run):>9.1f}")
+    late = datetime.combine(START + timedelta(days=3), datetime.min.time()) + timedelta(hours=20)
+    log.append(0, INICIO, late)
+    log.append(0, FIN, late + timedelta(hours=1))
+    print(f"{'tras marca tardía':>28} {timed(run):>9.1f}")
+    print(f"{'caché de nuevo':>28} {timed(run):>9.1f}")
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_plan_serialization.py
+"""
+Serialización de planes: ruta anterior (dicts anidados -> DataFrame -> to_dict -> json)
+frente al plan compacto (CompactPlan.to_json). Mide tiempo y pico de memoria (tracemalloc).
+
+Uso:
+    python benchmarks/bench_plan_serialization.py --weeks 4 52 520
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+from planning_model import ShiftPlanner  # noqa: E402
+
+
+def legacy_json(sol) -> str:
+    rows = []
+    for advisor, weeks_dict in sol.items():
+        for w, days_dict in weeks_dict.items():
+            for day, shift in days_dict.items():
+                rows.append({"Asesor": advisor, "Semana": w + 1, "Día": day, "Turno": shift})
+    df = pd.DataFrame(rows)[["Asesor", "Semana", "Día", "Turno"]]
+    return json.dumps(df.to_dict(orient="records"))
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, nargs="+", default=[4, 52, 520])
+    args = parser.parse_args()
+
+    header = f"{'semanas':>7} {'ruta':>9} {'ms':>9} {'pico KiB':>10} {'retenido KiB':>13}"
+    print(header)
+    print("-" * len(header))
+    for weeks in args.weeks:
+        plan = ShiftPlanner(weeks=weeks, enable_weekly_rotation=True, cache=None, store=None).solve_plan()
+        sol = plan.to_dict()
+
+        tracemalloc.start()
+        retained_dict = plan.to_dict()
+        dict_kib = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+        del retained_dict
+        compact_kib = (sys.getsizeof(plan) + plan.codes.nbytes) / 1024
+
+        for name, fn, arg, retained in (
+            ("anterior", legacy_json, sol, dict_kib),
+            ("compacto", lambda p: p.to_json(), plan, compact_kib),
+        ):
+            ms, peak = measure(fn, arg)
+            print(f"{weeks:>7} {name:>9} {ms:>9.2f} {peak:>10.1f} {retained:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/bench_solver.py
+"""
+Benchmark reproducible de ShiftPlanner.build_and_solve (ruta CP-SAT).
+
+Recorre semanas x enforce_opening_only x enable_weekly_rotation x num_search_workers y
+reporta tamaño del modelo, tiempos de construcción/solución/extracción (mediana de
+--repeat corridas) y pico de memoria de Python (tracemalloc; no incluye la memoria
+nativa de CP-SAT). Los resultados se guardan en JSON para usarlos como línea base.
+
+Uso:
+    python benchmarks/bench_solver.py --output benchmarks/results/base.json
+    python benchmarks/bench_solver.py --quick --output /tmp/new.json
+    python benchmarks/bench_solver.py --compare base.json new.json --threshold 0.2
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planning_model import ShiftPlanner  # noqa: E402
+from solver_policy import SolverResourcePolicy  # noqa: E402
+
+FULL_GRID = {
+    "weeks": [1, 2, 4, 8, 13, 26, 52, 104],
+    "workers": [1, 2, 4, 8, 16],
+}
+QUICK_GRID = {
+    "weeks": [1, 4, 26],
+    "workers": [1, 8],
+}
+# por debajo de este delta (ms) no se considera regresión: ruido del sistema
+NOISE_FLOOR_MS = 2.0
+
+
+def case_id(case):
+    return "w{weeks}-open{opening_only:d}-rot{rotation:d}-j{workers}".format(**case)
+
+
+def run_case(case, repeat, time_limit):
+    samples = {"build_ms": [], "solve_ms": [], "extract_ms": [], "total_ms": [], "peak_kib": []}
+    size = None
+    # política propia: el benchmark fija los hilos y no debe recortarlos por núcleos disponibles
+    policy = SolverResourcePolicy(
+        max_threads=case["workers"], max_workers_per_solve=case["workers"], max_time_limit=time_limit
+    )
+    for _ in range(repeat):
+        planner = ShiftPlanner(
+            weeks=case["weeks"],
+            enforce_opening_only=case["opening_only"],
+            opening_only_advisor="Asesor_1" if case["opening_only"] else None,
+            enable_weekly_rotation=case["rotation"],
+            cache=None,
+            store=None,
+            fast_path=False,
+            num_search_workers=case["workers"],
+            policy=policy,
+        )
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        planner.solve_plan(time_limit_seconds=time_limit)
+        total = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings = planner.stats["timings_ms"]
+        samples["build_ms"].append(timings.get("build", 0.0))
+        samples["solve_ms"].append(timings.get("solve", 0.0))
+        samples["extract_ms"].append(timings.get("extract", 0.0))
+        samples["total_ms"].append(total * 1000)
+        samples["peak_kib"].append(peak / 1024)
+        size = planner.model_size()
+
+    result = dict(case, id=case_id(case), **size)
+    result.update({name: round(statistics.median(values), 3) for name, values in samples.items()})
+    result["status"] = planner.stats["solver"]["status"]
+    return result
+
+
+def run(args):
+    grid = QUICK_GRID if args.quick else FULL_GRID
+    weeks = args.weeks or grid["weeks"]
+    workers = args.workers or grid["workers"]
+    results = []
+    for w, opening_only, rotation, j in itertools.product(weeks, (False, True), (False, True), workers):
+        case = {"weeks": w, "opening_only": opening_only, "rotation": rotation, "workers": j}
+        r = run_case(case, args.repeat, args.time_limit)
+        results.append(r)
+        print(f"{r['id']:<28} vars={r['variables']:<5} constr={r['constraints']:<5} "
+              f"build={r['build_ms']:>8.2f}ms solve={r['solve_ms']:>9.2f}ms "
+              f"extract={r['extract_ms']:>6.2f}ms peak={r['peak_kib']:>8.1f}KiB {r['status']}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "ortools": _ortools_version(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+
+def _ortools_version():
+    try:
+        import ortools
+        return ortools.__version__
+    except (ImportError, AttributeError):
+        return None
+
+
+def compare(base_path, new_path, threshold, metric):
+    with open(base_path, encoding="utf-8") as fh:
+        base = {r["id"]: r for r in json.load(fh)["results"]}
+    with open(new_path, encoding="utf-8") as fh:
+        new = {r["id"]: r for r in json.load(fh)["results"]}
+
+    regressions = []
+    for cid in sorted(base.keys() & new.keys()):
+        before, after = base[cid][metric], new[cid][metric]
+        delta = after - before
+        ratio = (after / before - 1) if before else 0.0
+        flag = delta > NOISE_FLOOR_MS and ratio > threshold
+        if flag:
+            regressions.append(cid)
+        print(f"{cid:<28} {before:>10.2f} -> {after:>10.2f} ms ({ratio:+.1%}){'  REGRESIÓN' if flag else ''}")
+    missing = sorted(base.keys() - new.keys())
+    if missing:
+        print(f"Casos ausentes en {new_path}: {', '.join(missing)}")
+    print(f"{len(regressions)} regresiones (> {threshold:.0%} en {metric})")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, nargs="+")
+    parser.add_argument("--workers", type=int, nargs="+")
+    parser.add_argument("--quick", action="store_true", help="grilla reducida")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--time-limit", type=int, default=60)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NUEVO"))
+    parser.add_argument("--threshold", type=float, default=0.2, help="regresión relativa tolerada (0.2 = 20%%)")
+    parser.add_argument("--metric", default="total_ms")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold, args.metric))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+# benchmarks/loadtest.py
+"""
+Prueba de carga HTTP de los endpoints de la app: concurrencia, mezcla de peticiones y
+duración configurables; reporta throughput y latencias p50/p95/p99 por endpoint.
+
+Destinos:
+ - en proceso (por defecto): app.test_client() por hilo, sin red
+ - --serve: levanta la app en un servidor WSGI local (werkzeug, con hilos) y la ataca por HTTP
+ - --url http://127.0.0.1:5000: una instancia ya en marcha
+
+En proceso y con --serve las marcas de jornada van a un registro en memoria
+(TIME_LOG_PATH=:memory:) salvo que TIME_LOG_PATH ya esté definido.
+
+Mezcla (--mix nombre=peso,...): plan, login, punch (inicio -> fin -> reinicio por hilo),
+usuarios, export. Los resultados se guardan en JSON para comparar corridas.
+
+Uso:
+    python benchmarks/loadtest.py --duration 20 --concurrency 8 --output benchmarks/results/carga.json
+    python benchmarks/loadtest.py --serve --mix plan=1,export=1 --duration 10
+    python benchmarks/loadtest.py --compare base.json nuevo.json --threshold 0.2
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_MIX = "plan=4,login=2,punch=2,usuarios=3,export=1"
+
+# diferencias menores a esto (ms) se consideran ruido al comparar
+NOISE_FLOOR_MS = 1.0
+
+Request = Tuple[str, str, Optional[Dict[str, str]]]  # método, ruta, formulario
+
+
+class WorkerState:
+    def __init__(self, index: int, seed: int, args):
+        self.index = index
+        self.rng = random.Random(seed + index)
+        self.args = args
+        self.punches = 0
+
+
+def _plan(state: WorkerState) -> Request:
+    return "GET", f"/plan?weeks={state.args.weeks}&rotation=true", None
+
+
+def _login(state: WorkerState) -> Request:
+    return "POST", "/LoginVerify", {"correo": state.args.email, "contraseña": state.args.password}
+
+
+_PUNCH_PATHS = ("/hora_inicio_trabajo", "/hora_fin_trabajo", "/reiniciar_jornada")
+
+
+def _punch(state: WorkerState) -> Request:
+    path = _PUNCH_PATHS[state.punches % len(_PUNCH_PATHS)]
+    state.punches += 1
+    user_ids = state.args.user_ids
+    return "POST", path, {"user_id": str(user_ids[state.index % len(user_ids)])}
+
+
+def _usuarios(state: WorkerState) -> Request:
+    return "GET", "/api/usuarios", None
+
+
+def _export(state: WorkerState) -> Request:
+    return "GET", f"/export/turnos_csv?weeks={state.args.weeks}", None
+
+
+KINDS: Dict[str, Callable[[WorkerState], Request]] = {
+    "plan": _plan,
+    "login": _login,
+    "punch": _punch,
+    "usuarios": _usuarios,
+    "export": _export,
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in KINDS:
+            raise SystemExit(f"Tipo de petición desconocido: {name}. Use: {', '.join(KINDS)}")
+        mix[name] = float(weight or 1)
+    if not any(w > 0 for w in mix.values()):
+        raise SystemExit("La mezcla no tiene pesos positivos")
+    return mix
+
+
+# ---- clientes ----
+
+class InProcessClient:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method: str, path: str, form: Optional[Dict[str, str]]) -> int:
+        resp = self.client.open(path, method=method, data=form)
+        resp.get_data()  # consumir respuestas en streaming
+        return resp.status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    def __init__(self, base_url: str, timeout: float = 60.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def request(self, method: str, path: str, form: Optional[Dict[str, str]]) -> int:
+        data = urllib.parse.urlencode(form).encode("utf-8") if form is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            # 3xx sin seguir (p. ej. /LoginVerify) y 4xx/5xx
+            e.read()
+            return e.code
+
+
+def _load_app():
+    os.environ.setdefault("TIME_LOG_PATH", ":memory:")
+    from app import app
+
+    return app
+
+
+def _serve(app) -> Tuple[str, Callable[[], None]]:
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f"http://127.0.0.1:{server.server_port}", server.shutdown
+
+
+# ---- ejecución ----
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_load(make_client: Callable[[], Any], args, mix: Dict[str, float]) -> Tuple[Dict[str, List], float]:
+    """Lanza los hilos y devuelve ({endpoint: [(latencia_s, ok), ...]}, segundos medidos)."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    samples: Dict[str, List] = {}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + args.warmup
+    deadline = measure_from + args.duration
+
+    def worker(index: int) -> None:
+        client = make_client()
+        state = WorkerState(index, args.seed, args)
+        local: Dict[str, List] = {}
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            method, path, form = KINDS[state.rng.choices(names, weights)[0]](state)
+            t0 = time.perf_counter()
+            try:
+                ok = client.request(method, path, form) < 400
+            except Exception:
+                ok = False
+            elapsed = time.perf_counter() - t0
+            if t0 >= measure_from:
+                local.setdefault(path.split("?")[0], []).append((elapsed, ok))
+        with lock:
+            for endpoint, values in local.items():
+                samples.setdefault(endpoint, []).extend(values)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return samples, args.duration
+
+
+def summarize(samples: Dict[str, List], seconds: float) -> List[Dict[str, Any]]:
+    def row(endpoint: str, values: List) -> Dict[str, Any]:
+        latencies = sorted(v[0] * 1000 for v in values)
+        return {
+            "id": endpoint,
+            "requests": len(values),
+            "errors": sum(1 for v in values if not v[1]),
+            "rps": round(len(values) / seconds, 2),
+            "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+            "max_ms": round(latencies[-1], 3) if latencies else 0.0,
+        }
+
+    rows = [row(endpoint, values) for endpoint, values in sorted(samples.items())]
+    rows.append(row("TOTAL", [v for values in samples.values() for v in values]))
+    return rows
+
+
+def run(args) -> None:
+    mix = parse_mix(args.mix)
+    stop = None
+    if args.url:
+        target = args.url
+        make_client = lambda: HttpClient(args.url)  # noqa: E731
+    else:
+        app = _load_app()
+        if args.serve:
+            target, stop = _serve(app)
+            make_client = lambda: HttpClient(target)  # noqa: E731
+        else:
+            target = "in-process"
+            make_client = lambda: InProcessClient(app)  # noqa: E731
+
+    print(f"destino: {target}  concurrencia: {args.concurrency}  duración: {args.duration}s  mezcla: {args.mix}")
+    try:
+        samples, seconds = run_load(make_client, args, mix)
+    finally:
+        if stop is not None:
+            stop()
+    results = summarize(samples, seconds)
+
+    header = (f"{'endpoint':<22} {'peticiones':>10} {'errores':>8} {'req/s':>9} "
+              f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['id']:<22} {r['requests']:>10} {r['errors']:>8} {r['rps']:>9.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.2f}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "target": "in-process" if target == "in-process" else ("serve" if args.serve else target),
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "mix": mix,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.output}")
+
+
+def compare(base_path: str, new_path: str, threshold: float, metric: str) -> int:
+    with open(base_path, encoding="utf-8") as fh:
+        base = {r["id"]: r for r in json.load(fh)["results"]}
+    with open(new_path, encoding="utf-8") as fh:
+        new = {r["id"]: r for r in json.load(fh)["results"]}
+
+    regressions = []
+    for endpoint in sorted(base.keys() & new.keys()):
+        before, after = base[endpoint][metric], new[endpoint][metric]
+        ratio = (after / before - 1) if before else 0.0
+        flag = after - before > NOISE_FLOOR_MS and ratio > threshold
+        if flag:
+            regressions.append(endpoint)
+        print(f"{endpoint:<22} {before:>10.2f} -> {after:>10.2f} ms ({ratio:+.1%}){'  REGRESIÓN' if flag else ''}")
+    missing = sorted(base.keys() - new.keys())
+    if missing:
+        print(f"Endpoints ausentes en {new_path}: {', '.join(missing)}")
+    print(f"{len(regressions)} regresiones (> {threshold:.0%} en {metric})")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL base de una instancia en marcha (por defecto, en proceso)")
+    parser.add_argument("--serve", action="store_true", help="levantar un servidor WSGI local y atacarlo por HTTP")
+    parser.add_argument("--concurrency", type=int, default=8, help="hilos clientes")
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos medidos")
+    parser.add_argument("--warmup", type=float, default=1.0, help="segundos iniciales que no se miden")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"pesos por tipo de petición (por defecto {DEFAULT_MIX})")
+    parser.add_argument("--weeks", type=int, default=4, help="semanas en /plan y /export/turnos_csv")
+    parser.add_argument("--email", default="juan@gmail.com", help="correo para /LoginVerify")
+    parser.add_argument("--password", default="1234", help="contraseña para /LoginVerify")
+    parser.add_argument("--user-ids", type=int, nargs="+", default=[1, 2, 3], help="usuarios para las marcas")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NUEVO"))
+    parser.add_argument("--threshold", type=float, default=0.2, help="regresión relativa tolerada (0.2 = 20%%)")
+    parser.add_argument("--metric", default="p95_ms")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(args.compare[0], args.compare[1], args.threshold, args.metric))
+    if args.concurrency < 1 or args.duration <= 0:
+        parser.error("--concurrency debe ser >= 1 y --duration > 0")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
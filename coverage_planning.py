@@ -0,0 +1,294 @@
+# coverage_planning.py
+"""
+Planner generalizado N asesores x M turnos con demandas de cobertura (OR-Tools CP-SAT).
+
+A diferencia de ShiftPlanner (exactamente 3 asesores y 3 turnos con AllDifferent),
+aquí cada asesor recibe exactamente un turno por día y cada turno debe cubrir una
+dotación mínima por día. Se usan variables booleanas de asignación y restricciones
+lineales de cobertura, lo que escala a cientos de asesores.
+
+ - coberturas por turno (todas las semanas) o por turno y día
+ - turnos permitidos por asesor (p. ej. restricciones_turno de usuarios.py)
+ - mismo turno toda la semana (por defecto) o asignación diaria
+ - rotación semanal opcional
+ - anclaje al calendario (start_date y festivos) como en ShiftPlanner
+"""
+from ortools.sat.python import cp_model
+from datetime import date
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+import pandas as pd
+import logging
+
+from plan_result import CompactPlan
+from planning_model import ShiftPlanner, ShiftPlannerError
+from solver_policy import SolverResourcePolicy, solver_policy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHIFTS = list(ShiftPlanner.SHIFT_MAP.values())
+DEFAULT_DAYS = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
+
+# coverage puede ser {turno: n} o {turno: {día: n}}
+Coverage = Mapping[str, Union[int, Mapping[str, int]]]
+
+
+class CoveragePlanner:
+    def __init__(
+        self,
+        advisors: List[str],
+        shifts: Optional[List[str]] = None,
+        days: Optional[List[str]] = None,
+        weeks: int = 1,
+        coverage: Optional[Coverage] = None,
+        allowed_shifts: Optional[Mapping[str, Iterable[str]]] = None,
+        enable_weekly_rotation: bool = False,
+        same_shift_all_week: bool = True,
+        policy: SolverResourcePolicy = solver_policy,
+        start_date: Optional[date] = None,
+        holidays: Optional[Iterable[date]] = None,
+    ):
+        """
+        advisors: nombres de los asesores (cualquier cantidad >= 1)
+        shifts: nombres de los turnos. Por defecto: Apertura, Cierre, Intermedio
+        days: días a planear por semana. Por defecto: Lunes..Sábado
+        weeks: número de semanas (>=1)
+        coverage: dotación mínima por turno ({turno: n}) o por turno y día ({turno: {día: n}}).
+                  Por defecto 1 asesor por turno y día
+        allowed_shifts: turnos permitidos por asesor; los asesores ausentes pueden hacer cualquier turno
+        enable_weekly_rotation: si True, un asesor con más de un turno permitido no repite turno
+                                en semanas consecutivas (mismo día de la semana en modo diario)
+        same_shift_all_week: si True (por defecto) cada asesor mantiene el turno toda la semana
+        policy: política de recursos del solver (ver solver_policy)
+        start_date: ancla el plan al calendario: la semana 1 es la del lunes de start_date;
+                    los festivos, los domingos y los días anteriores a start_date quedan sin turno
+        holidays: fechas (date) sin turno para nadie; requiere start_date
+        """
+        self.advisors = list(advisors or [])
+        self.shifts = list(shifts or DEFAULT_SHIFTS)
+        self.days = list(days or DEFAULT_DAYS)
+        if not self.advisors:
+            raise ShiftPlannerError("Debe haber al menos un asesor.")
+        if len(set(self.advisors)) != len(self.advisors):
+            raise ShiftPlannerError("Los nombres de asesores deben ser únicos.")
+        if not self.shifts:
+            raise ShiftPlannerError("Debe haber al menos un turno.")
+        if len(self.days) < 1:
+            raise ShiftPlannerError("Debe haber al menos un día laboral por semana.")
+        if weeks < 1:
+            raise ShiftPlannerError("weeks debe ser >= 1")
+        if holidays and start_date is None:
+            raise ShiftPlannerError("Los festivos requieren start_date para ubicarlos en el plan.")
+
+        self.weeks = weeks
+        self.start_date = start_date
+        self.holidays = set(holidays or [])
+        self.enable_weekly_rotation = enable_weekly_rotation
+        self.same_shift_all_week = same_shift_all_week
+        self.policy = policy
+        self.demand = self._normalize_coverage(coverage)
+        self.allowed = self._normalize_allowed(allowed_shifts)
+
+        for day in self.days:
+            total = sum(self.demand[(shift, day)] for shift in self.shifts)
+            if total > len(self.advisors):
+                raise ShiftPlannerError(
+                    f"La cobertura del día {day} ({total}) supera el número de asesores ({len(self.advisors)})."
+                )
+
+        self.model = None
+        self.solver = None
+        # keys: (advisor, week, shift) o (advisor, week, day, shift) en modo diario
+        self.vars: Dict[Tuple, cp_model.IntVar] = {}
+        self.status = None
+        self.policy_decision: Optional[Dict[str, Any]] = None
+        self._solution: Optional[Dict[str, Dict[int, Dict[str, str]]]] = None
+        self._plan: Optional[CompactPlan] = None
+
+    @classmethod
+    def from_usuarios(cls, usuarios: Mapping[int, Mapping[str, Any]], **kwargs) -> "CoveragePlanner":
+        """
+        Crea el planner a partir del diccionario de usuarios (usuarios.py), usando
+        restricciones_turno como turnos permitidos. Sólo se incluyen usuarios activos.
+        """
+        shifts = kwargs.get("shifts") or DEFAULT_SHIFTS
+        by_upper = {shift.upper(): shift for shift in shifts}
+        advisors: List[str] = []
+        allowed: Dict[str, List[str]] = {}
+        for data in usuarios.values():
+            if not data.get("activo", True):
+                continue
+            name = data["nombre"]
+            advisors.append(name)
+            restricted = data.get("restricciones_turno") or []
+            if restricted:
+                unknown = [r for r in restricted if r.upper() not in by_upper]
+                if unknown:
+                    raise ShiftPlannerError(f"Turnos desconocidos en restricciones de {name}: {unknown}")
+                allowed[name] = [by_upper[r.upper()] for r in restricted]
+        return cls(advisors=advisors, allowed_shifts=allowed, **kwargs)
+
+    def _normalize_coverage(self, coverage: Optional[Coverage]) -> Dict[Tuple[str, str], int]:
+        demand = {(shift, day): 1 for shift in self.shifts for day in self.days}
+        for shift, value in (coverage or {}).items():
+            if shift not in self.shifts:
+                raise ShiftPlannerError(f"Turno desconocido en coverage: {shift}")
+            if isinstance(value, Mapping):
+                for day, n in value.items():
+                    if day not in self.days:
+                        raise ShiftPlannerError(f"Día desconocido en coverage: {day}")
+                    demand[(shift, day)] = int(n)
+            else:
+                for day in self.days:
+                    demand[(shift, day)] = int(value)
+        if any(n < 0 for n in demand.values()):
+            raise ShiftPlannerError("La cobertura no puede ser negativa.")
+        return demand
+
+    def _normalize_allowed(self, allowed_shifts: Optional[Mapping[str, Iterable[str]]]) -> Dict[str, List[str]]:
+        allowed = {advisor: list(self.shifts) for advisor in self.advisors}
+        for advisor, shifts in (allowed_shifts or {}).items():
+            if advisor not in allowed:
+                raise ShiftPlannerError(f"Asesor desconocido en allowed_shifts: {advisor}")
+            shifts = list(shifts)
+            unknown = [s for s in shifts if s not in self.shifts]
+            if unknown:
+                raise ShiftPlannerError(f"Turnos desconocidos para {advisor}: {unknown}")
+            if not shifts:
+                raise ShiftPlannerError(f"{advisor} debe tener al menos un turno permitido.")
+            allowed[advisor] = shifts
+        return allowed
+
+    def _make_model(self):
+        self.model = cp_model.CpModel()
+        self.vars = {}
+        # En modo semanal la cobertura diaria se reduce a la máxima demanda de la semana por turno
+        periods: List[Tuple[Optional[str], List[str]]]
+        if self.same_shift_all_week:
+            periods = [(None, self.days)]
+        else:
+            periods = [(day, [day]) for day in self.days]
+
+        for w in range(self.weeks):
+            for period, period_days in periods:
+                # un turno por asesor y periodo (sólo entre los permitidos)
+                for advisor in self.advisors:
+                    advisor_vars = []
+                    for shift in self.allowed[advisor]:
+                        key = (advisor, w, shift) if period is None else (advisor, w, period, shift)
+                        var = self.model.NewBoolVar("_".join(str(k) for k in key))
+                        self.vars[key] = var
+                        advisor_vars.append(var)
+                    self.model.AddExactlyOne(advisor_vars)
+
+                # cobertura mínima por turno
+                for shift in self.shifts:
+                    required = max(self.demand[(shift, day)] for day in period_days)
+                    if required == 0:
+                        continue
+                    covering = [
+                        self.vars[(advisor, w, shift) if period is None else (advisor, w, period, shift)]
+                        for advisor in self.advisors
+                        if shift in self.allowed[advisor]
+                    ]
+                    if len(covering) < required:
+                        raise ShiftPlannerError(
+                            f"No hay suficientes asesores habilitados para {shift} ({len(covering)} < {required})."
+                        )
+                    self.model.Add(sum(covering) >= required)
+
+        if self.enable_weekly_rotation and self.weeks > 1:
+            for advisor in self.advisors:
+                if len(self.allowed[advisor]) < 2:
+                    # con un único turno permitido la rotación sería infactible; se excluye como en ShiftPlanner
+                    continue
+                for w in range(self.weeks - 1):
+                    for period, _ in periods:
+                        for shift in self.allowed[advisor]:
+                            if period is None:
+                                curr, nxt = self.vars[(advisor, w, shift)], self.vars[(advisor, w + 1, shift)]
+                            else:
+                                curr, nxt = self.vars[(advisor, w, period, shift)], self.vars[(advisor, w + 1, period, shift)]
+                            self.model.AddBoolOr([curr.Not(), nxt.Not()])
+
+        return self.model
+
+    def model_size(self) -> Dict[str, int]:
+        """Tamaño del modelo construido: número de variables y de restricciones."""
+        if self.model is None:
+            raise ShiftPlannerError("No hay modelo. Ejecute build_and_solve() primero.")
+        proto = self.model.Proto()
+        return {"variables": len(proto.variables), "constraints": len(proto.constraints)}
+
+    def build_and_solve(self, time_limit_seconds: Optional[int] = 10) -> Dict[str, Dict[int, Dict[str, str]]]:
+        """
+        Construye el modelo y lo resuelve. Devuelve la solución en la misma estructura que ShiftPlanner:
+        { advisor: { week_index: { day_name: turno } } }
+        """
+        self._make_model()
+        self.solver = cp_model.CpSolver()
+        with self.policy.allocate(len(self.vars), time_limit_seconds) as decision:
+            self.solver.parameters.max_time_in_seconds = decision["time_limit"]
+            self.solver.parameters.num_search_workers = decision["workers"]
+            status = self.status = self.solver.Solve(self.model)
+        self.policy_decision = decision
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            raise ShiftPlannerError(f"No se encontró solución. Estado del solver: {status}")
+
+        sol: Dict[str, Dict[int, Dict[str, str]]] = {}
+        for advisor in self.advisors:
+            sol[advisor] = {}
+            for w in range(self.weeks):
+                if self.same_shift_all_week:
+                    shift = next(s for s in self.allowed[advisor] if self.solver.BooleanValue(self.vars[(advisor, w, s)]))
+                    sol[advisor][w] = dict.fromkeys(self.days, shift)
+                else:
+                    sol[advisor][w] = {
+                        day: next(s for s in self.allowed[advisor] if self.solver.BooleanValue(self.vars[(advisor, w, day, s)]))
+                        for day in self.days
+                    }
+        plan = CompactPlan.from_solution(sol, self.days, self.shifts)
+        if self.start_date is not None:
+            try:
+                plan = plan.anchored(self.start_date, self.holidays)
+            except ValueError as e:
+                raise ShiftPlannerError(str(e))
+            sol = plan.to_dict()
+        self._plan = plan
+        self._solution = sol
+        return sol
+
+    @property
+    def plan(self) -> CompactPlan:
+        """Solución como plan compacto (anclado si hay start_date)."""
+        if self._plan is None:
+            raise ShiftPlannerError("No hay solución. Ejecute build_and_solve() primero.")
+        return self._plan
+
+    def coverage_report(self) -> Dict[Tuple[int, str, str], int]:
+        """Dotación asignada por (semana, día, turno) en la solución almacenada."""
+        if self._solution is None:
+            raise ShiftPlannerError("No hay solución. Ejecute build_and_solve() primero.")
+        counts = {(w, day, shift): 0 for w in range(self.weeks) for day in self.days for shift in self.shifts}
+        for weeks_dict in self._solution.values():
+            for w, days_dict in weeks_dict.items():
+                for day, shift in days_dict.items():
+                    counts[(w, day, shift)] += 1
+        return counts
+
+    def solution_to_dataframe(self) -> pd.DataFrame:
+        """Columnas: Asesor, Semana, Día, Turno (igual que ShiftPlanner)."""
+        if self._solution is None:
+            raise ShiftPlannerError("No hay solución. Ejecute build_and_solve() primero.")
+        rows = [
+            {"Asesor": advisor, "Semana": w + 1, "Día": day, "Turno": shift}
+            for advisor, weeks_dict in self._solution.items()
+            for w, days_dict in weeks_dict.items()
+            for day, shift in days_dict.items()
+        ]
+        return pd.DataFrame(rows, columns=["Asesor", "Semana", "Día", "Turno"])
+
+    def solution_to_json(self) -> List[Dict[str, Any]]:
+        """Lista de dicts (apto para JSON) directamente del plan compacto, sin pasar por pandas."""
+        return self.plan.records()
+
+# Fin de coverage_planning.py
@@ -0,0 +1,282 @@
+# hours_report.py
+"""
+Reportes de horas trabajadas y horas extra a partir del registro de jornada (time_log).
+
+ - las marcas se emparejan (inicio -> fin) y se agregan con operaciones vectorizadas de
+   pandas/NumPy: horas por asesor x semana x turno y resumen semanal con horas extra
+ - con un plan (CompactPlan) cada jornada se cruza con el turno planeado de ese día
+   y se calcula la adherencia (días trabajados en turno / días planeados)
+ - el registro se lee de forma incremental (sólo marcas nuevas); las jornadas nuevas se
+   guardan aparte y se unen a las anteriores una sola vez, al pedir un reporte
+ - los agregados de las semanas cerradas se guardan en caché por content_hash del plan;
+   una marca tardía en una semana cerrada la invalida
+"""
+from datetime import date
+from threading import Lock
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from plan_result import DAY_WEEKDAY
+
+# horas semanales a partir de las cuales se cuentan horas extra
+WEEKLY_HOURS_LIMIT = 48.0
+
+NO_PLAN = "Sin plan"
+NO_SHIFT = "Sin turno"
+
+# límites abiertos de los rangos de semanas
+_FIRST_WEEK = pd.Timestamp("1900-01-01")
+_LAST_WEEK = pd.Timestamp("2200-01-01")
+
+_DETAIL_COLUMNS = ["user_id", "semana", "turno", "horas", "jornadas"]
+_WEEKLY_COLUMNS = [
+    "user_id", "semana", "horas", "horas_extra", "dias_trabajados",
+    "dias_planeados", "dias_en_turno", "adherencia",
+]
+
+
+def week_start(day: date) -> pd.Timestamp:
+    """Lunes de la semana de day."""
+    ts = pd.Timestamp(day).normalize()
+    return ts - pd.Timedelta(days=ts.weekday())
+
+
+def pair_events(events: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Empareja marcas inicio -> fin por usuario (columnas seq, user_id, kind, ts).
+    Devuelve (jornadas, pendientes): las jornadas cerradas y el último inicio abierto
+    de cada usuario, que se completa con marcas posteriores.
+    """
+    events = events.sort_values(["user_id", "seq"], kind="stable")
+    same_user = events["user_id"].eq(events["user_id"].shift())
+    prev_kind = events["kind"].shift()
+    prev_ts = events["ts"].shift()
+    closed = same_user & events["kind"].eq("fin") & prev_kind.eq("inicio")
+    sessions = pd.DataFrame({
+        "user_id": events.loc[closed, "user_id"].to_numpy(),
+        "inicio": prev_ts[closed].to_numpy(),
+        "fin": events.loc[closed, "ts"].to_numpy(),
+    })
+    # misma regla de redondeo que el acumulado horas_trabajadas
+    sessions["horas"] = ((sessions["fin"] - sessions["inicio"]).dt.total_seconds() / 3600).round(2)
+    last = events.groupby("user_id", sort=False).tail(1)
+    return sessions, last[last["kind"].eq("inicio")]
+
+
+class HoursReport:
+    def __init__(self, log, weekly_hours_limit: float = WEEKLY_HOURS_LIMIT):
+        """
+        log: time_log.TimeLog con las marcas
+        weekly_hours_limit: horas semanales desde las que se cuentan horas extra
+        """
+        self.log = log
+        self.weekly_hours_limit = weekly_hours_limit
+        self._last_seq = 0
+        self._pending = pd.DataFrame(columns=["seq", "user_id", "kind", "ts"])
+        self._sessions = self._with_calendar(pd.DataFrame({
+            "user_id": pd.Series(dtype="int64"),
+            "inicio": pd.Series(dtype="datetime64[ns]"),
+            "fin": pd.Series(dtype="datetime64[ns]"),
+            "horas": pd.Series(dtype="float64"),
+        }))
+        # jornadas leídas desde la última consolidación (ver sessions)
+        self._new_sessions: List[pd.DataFrame] = []
+        self._closed_cache: Dict[Any, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+        self.cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._lock = Lock()
+
+    # --- Lectura incremental ---
+
+    def refresh(self) -> int:
+        """Incorpora las marcas nuevas del registro. Devuelve cuántas se leyeron."""
+        rows = self.log.rows_since(self._last_seq)
+        if not rows:
+            return 0
+        self._last_seq = rows[-1][0]
+        new = pd.DataFrame(rows, columns=["seq", "user_id", "kind", "ts"])
+        new["ts"] = pd.to_datetime(new["ts"], format="ISO8601")
+        events = pd.concat([self._pending, new], ignore_index=True) if len(self._pending) else new
+        sessions, self._pending = pair_events(events)
+        if len(sessions):
+            sessions = self._with_calendar(sessions)
+            self._new_sessions.append(sessions)
+            # jornadas tardías en semanas cerradas: invalidan la caché
+            if self._closed_cache:
+                oldest = sessions["semana"].min()
+                stale = [k for k in self._closed_cache if oldest < k[0]]
+                for key in stale:
+                    del self._closed_cache[key]
+                self.cache_stats["invalidations"] += len(stale)
+        return len(rows)
+
+    @staticmethod
+    def _with_calendar(sessions: pd.DataFrame) -> pd.DataFrame:
+        fecha = sessions["inicio"].dt.normalize()
+        sessions["fecha"] = fecha
+        sessions["weekday"] = fecha.dt.weekday
+        sessions["semana"] = fecha - pd.to_timedelta(sessions["weekday"], unit="D")
+        return sessions
+
+    @property
+    def sessions(self) -> pd.DataFrame:
+        """Todas las jornadas cerradas; une las nuevas (una copia por consolidación, no por refresh)."""
+        if self._new_sessions:
+            frames = ([self._sessions] if len(self._sessions) else []) + self._new_sessions
+            self._sessions = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            self._new_sessions = []
+        return self._sessions
+
+    # --- Agregación ---
+
+    def _plan_codes(self, sessions: pd.DataFrame, plan, plan_start: pd.Timestamp, user_index: Mapping[int, int]) -> np.ndarray:
+        """Código de turno planeado para cada jornada (0 = sin turno); -1 si cae fuera del plan."""
+        codes = np.frombuffer(plan.codes, dtype=np.uint8).reshape(len(plan.advisors), plan.weeks, len(plan.days))
+        day_pos = np.full(7, -1)
+        for i, day in enumerate(plan.days):
+            day_pos[DAY_WEEKDAY[day]] = i
+        a = sessions["user_id"].map(user_index).fillna(-1).to_numpy(dtype=np.int64)
+        w = ((sessions["semana"] - plan_start).dt.days // 7).to_numpy(dtype=np.int64)
+        d = day_pos[sessions["weekday"].to_numpy(dtype=np.int64)]
+        in_plan = (a >= 0) & (w >= 0) & (w < plan.weeks)
+        out = np.full(len(sessions), -1, dtype=np.int64)
+        out[in_plan] = 0  # dentro del horizonte; días no planeados (domingo) quedan sin turno
+        planned = in_plan & (d >= 0)
+        out[planned] = codes[a[planned], w[planned], d[planned]]
+        return out
+
+    def _planned_days(self, plan, plan_start: pd.Timestamp, user_index: Mapping[int, int], first: pd.Timestamp, last: pd.Timestamp) -> pd.DataFrame:
+        """Días con turno planeado por usuario y semana, para las semanas del plan en [first, last)."""
+        codes = np.frombuffer(plan.codes, dtype=np.uint8).reshape(len(plan.advisors), plan.weeks, len(plan.days))
+        per_week = (codes > 0).sum(axis=2)  # asesor x semana
+        weeks = plan_start + pd.to_timedelta(np.arange(plan.weeks) * 7, unit="D")
+        in_range = (weeks >= first) & (weeks < last)
+        users = list(user_index)
+        idx = np.array([user_index[u] for u in users], dtype=np.int64)
+        grid = per_week[idx][:, in_range] if len(idx) else np.zeros((0, int(in_range.sum())), dtype=np.int64)
+        return pd.DataFrame({
+            "user_id": np.repeat(users, grid.shape[1]),
+            "semana": np.tile(weeks[in_range], len(users)),
+            "dias_planeados": grid.ravel(),
+        })
+
+    def _aggregate(
+        self,
+        sessions: pd.DataFrame,
+        plan,
+        plan_start: Optional[pd.Timestamp],
+        user_index: Mapping[int, int],
+        first: pd.Timestamp,
+        last: pd.Timestamp,
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        sessions = sessions[(sessions["semana"] >= first) & (sessions["semana"] < last)]
+        if plan is not None:
+            code = self._plan_codes(sessions, plan, plan_start, user_index)
+            names = np.array([NO_PLAN, NO_SHIFT] + list(plan.shifts), dtype=object)
+            turno = names[code + 1]
+        else:
+            code = np.full(len(sessions), -1, dtype=np.int64)
+            turno = np.full(len(sessions), NO_PLAN, dtype=object)
+        sessions = sessions.assign(turno=turno, en_turno=np.where(code > 0, sessions["fecha"], pd.NaT))
+
+        detail = (
+            sessions.groupby(["user_id", "semana", "turno"], sort=True)
+            .agg(horas=("horas", "sum"), jornadas=("horas", "size"))
+            .reset_index()
+        )
+        weekly = (
+            sessions.groupby(["user_id", "semana"], sort=True)
+            .agg(
+                horas=("horas", "sum"),
+                dias_trabajados=("fecha", "nunique"),
+                dias_en_turno=("en_turno", "nunique"),
+            )
+            .reset_index()
+        )
+        if plan is not None:
+            planned = self._planned_days(plan, plan_start, user_index, first, last)
+            weekly = weekly.merge(planned, on=["user_id", "semana"], how="outer")
+        else:
+            weekly["dias_planeados"] = 0
+        weekly = weekly.fillna({"horas": 0.0, "dias_trabajados": 0, "dias_en_turno": 0, "dias_planeados": 0})
+        weekly["horas"] = weekly["horas"].round(2)
+        weekly["horas_extra"] = (weekly["horas"] - self.weekly_hours_limit).clip(lower=0).round(2)
+        planned_days = weekly["dias_planeados"].to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weekly["adherencia"] = np.where(planned_days > 0, weekly["dias_en_turno"] / planned_days, np.nan).round(3)
+        weekly = weekly.astype({"dias_trabajados": "int64", "dias_en_turno": "int64", "dias_planeados": "int64"})
+        detail["horas"] = detail["horas"].round(2)
+        return detail[_DETAIL_COLUMNS], weekly.sort_values(["user_id", "semana"])[_WEEKLY_COLUMNS]
+
+    def report(
+        self,
+        plan=None,
+        plan_start: Optional[date] = None,
+        advisor_for_user: Optional[Mapping[int, str]] = None,
+        desde: Optional[date] = None,
+        hasta: Optional[date] = None,
+        today: Optional[date] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Devuelve {"detalle": horas por usuario x semana x turno, "semanal": resumen por usuario x semana}.
+
+        plan / plan_start: plan resuelto y lunes de su primera semana (para cruzar turnos y adherencia)
+        advisor_for_user: user_id -> nombre del asesor en el plan
+        desde / hasta: semanas a incluir (por fecha, ambos inclusive)
+        today: fecha de corte de semanas cerradas (por defecto hoy)
+        """
+        if plan is not None and (plan_start is None or advisor_for_user is None):
+            raise ValueError("Con plan se requieren plan_start y advisor_for_user")
+        with self._lock:
+            self.refresh()
+            start = week_start(plan_start) if plan_start else None
+            user_index: Dict[int, int] = {}
+            if plan is not None:
+                position = {name: i for i, name in enumerate(plan.advisors)}
+                user_index = {uid: position[name] for uid, name in advisor_for_user.items() if name in position}
+            cutoff = week_start(today or date.today())
+            first = week_start(desde) if desde else _FIRST_WEEK
+            last = week_start(hasta) + pd.Timedelta(days=7) if hasta else _LAST_WEEK
+
+            # semanas cerradas: caché por (corte, plan); la semana abierta siempre se recalcula
+            plan_key = (plan.content_hash(), start, tuple(sorted(user_index.items()))) if plan is not None else None
+            key = (cutoff, plan_key, self.weekly_hours_limit)
+            closed = self._closed_cache.get(key)
+            if closed is None:
+                self.cache_stats["misses"] += 1
+                # al cambiar de semana las entradas con el corte anterior ya no sirven
+                for old in [k for k in self._closed_cache if k[0] != cutoff]:
+                    del self._closed_cache[old]
+                closed = self._aggregate(self.sessions, plan, start, user_index, _FIRST_WEEK, cutoff)
+                self._closed_cache[key] = closed
+            else:
+                self.cache_stats["hits"] += 1
+            current = self._aggregate(self.sessions, plan, start, user_index, cutoff, _LAST_WEEK)
+
+        result = {}
+        for i, name in enumerate(("detalle", "semanal")):
+            frame = pd.concat([closed[i], current[i]], ignore_index=True)
+            result[name] = frame[(frame["semana"] >= first) & (frame["semana"] < last)].reset_index(drop=True)
+        return result
+
+
+def frame_records(frame: pd.DataFrame) -> list:
+    """Registros JSON-serializables (semana como fecha ISO, NaN como None)."""
+    out = frame.assign(semana=frame["semana"].dt.strftime("%Y-%m-%d"))
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict(orient="records")
+
+
+_reports: Dict[int, HoursReport] = {}
+_reports_lock = Lock()
+
+
+def get_hours_report(log) -> HoursReport:
+    """Reporte compartido para un registro (conserva lectura incremental y caché)."""
+    with _reports_lock:
+        report = _reports.get(id(log))
+        if report is None or report.log is not log:
+            report = _reports[id(log)] = HoursReport(log)
+        return report
+
+# Fin de hours_report.py
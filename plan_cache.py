@@ -0,0 +1,141 @@
+# plan_cache.py
+"""
+Caché en proceso de planes resueltos.
+
+Evita reconstruir y resolver el modelo CP-SAT cuando se repiten los mismos
+parámetros (p. ej. cada carga del dashboard pide weeks=4&rotation=true).
+
+ - desalojo LRU con capacidad máxima
+ - expiración por TTL
+ - clave canónica construida a partir de los parámetros normalizados del planner
+ - contadores de aciertos / fallos / desalojos
+"""
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+import copy
+import os
+import time
+
+
+def make_plan_key(
+    weeks: int,
+    enforce_opening_only: bool,
+    opening_only_advisor: Optional[str],
+    enable_weekly_rotation: bool,
+    advisors: Iterable[str],
+    days: Iterable[str],
+    holidays: Optional[Iterable[date]] = None,
+    start_date: Optional[date] = None,
+    balance: bool = False,
+) -> Tuple[Hashable, ...]:
+    """
+    Construye la clave canónica de un plan.
+
+    El asesor de apertura sólo forma parte de la clave si la restricción está activa
+    y los festivos se ordenan para que el orden de entrada no genere claves distintas.
+    """
+    enforce_opening_only = bool(enforce_opening_only)
+    return (
+        int(weeks),
+        enforce_opening_only,
+        opening_only_advisor if enforce_opening_only else None,
+        bool(enable_weekly_rotation),
+        tuple(advisors),
+        tuple(days),
+        tuple(sorted(set(holidays or []))),
+        start_date,
+        bool(balance),
+    )
+
+
+class PlanCache:
+    """
+    Caché LRU con TTL, segura entre hilos.
+
+    Los valores se copian al guardar y al leer para que quien consume el plan
+    no pueda modificar la versión almacenada.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = 600.0):
+        if max_entries < 1:
+            raise ValueError("max_entries debe ser >= 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expira_en, valor)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expires_at(self) -> float:
+        if self.ttl_seconds is None:
+            return float("inf")
+        return time.monotonic() + self.ttl_seconds
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any) -> None:
+        value = copy.deepcopy(value)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (self._expires_at(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def _env_ttl() -> Optional[float]:
+    raw = os.environ.get("PLAN_CACHE_TTL", "600")
+    ttl = float(raw)
+    return ttl if ttl > 0 else None
+
+
+# Caché compartida por ShiftPlanner y por las rutas /plan y /export/turnos_csv
+plan_cache = PlanCache(
+    max_entries=int(os.environ.get("PLAN_CACHE_SIZE", "128")),
+    ttl_seconds=_env_ttl(),
+)
+
+# Fin de plan_cache.py
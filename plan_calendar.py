@@ -0,0 +1,94 @@
+# plan_calendar.py
+"""
+Consultas por fecha sobre un plan anclado al calendario (CompactPlan.start_date).
+
+ - índice fecha -> ((asesor, turno), ...): "¿quién está en qué turno el día X?" en O(1)
+ - índice de intervalos por asesor: tramos consecutivos con el mismo turno, ordenados
+   por fecha de inicio; turno de un asesor en una fecha con bisect (O(log n)) y rangos
+   recorriendo sólo los tramos que se solapan
+ - se construye una vez por plan (CompactPlan.calendar()) y se reutiliza mientras el
+   plan siga en la caché
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+Interval = Tuple[date, date, str]
+
+_ONE_DAY = timedelta(days=1)
+
+
+class PlanCalendar:
+    def __init__(self, plan):
+        if plan.start_date is None:
+            raise ValueError("El plan no está anclado a una fecha de inicio (start_date).")
+        self.plan = plan
+        # días del plan en orden de calendario (el plan puede listarlos en otro orden)
+        day_order = sorted(range(len(plan.days)), key=lambda d: plan.date_of(0, d))
+        by_date: Dict[date, List[Tuple[str, str]]] = {}
+        self._starts: Dict[str, List[date]] = {}
+        self._intervals: Dict[str, List[Interval]] = {}
+        for a, advisor in enumerate(plan.advisors):
+            intervals: List[Interval] = []
+            for w in range(plan.weeks):
+                for d in day_order:
+                    code = plan.code_at(a, w, d)
+                    if not code:
+                        continue
+                    day, shift = plan.date_of(w, d), plan.shifts[code - 1]
+                    by_date.setdefault(day, []).append((advisor, shift))
+                    if intervals and intervals[-1][2] == shift and intervals[-1][1] + _ONE_DAY == day:
+                        intervals[-1] = (intervals[-1][0], day, shift)
+                    else:
+                        intervals.append((day, day, shift))
+            self._intervals[advisor] = intervals
+            self._starts[advisor] = [start for start, _, _ in intervals]
+        self._by_date = {day: tuple(assignments) for day, assignments in by_date.items()}
+
+    @property
+    def first_date(self) -> date:
+        return self.plan.start_date
+
+    @property
+    def last_date(self) -> date:
+        return self.plan.date_of(self.plan.weeks - 1, 0) + timedelta(days=6)
+
+    def on_date(self, day: date) -> Tuple[Tuple[str, str], ...]:
+        """(asesor, turno) de todos los asesores con turno en la fecha; vacío si nadie trabaja."""
+        return self._by_date.get(day, ())
+
+    def who(self, day: date, shift: str) -> List[str]:
+        """Asesores en un turno en la fecha (p. ej. quién abre)."""
+        return [advisor for advisor, s in self.on_date(day) if s == shift]
+
+    def _check_advisor(self, advisor: str) -> List[Interval]:
+        intervals = self._intervals.get(advisor)
+        if intervals is None:
+            raise KeyError(f"Asesor desconocido: {advisor}")
+        return intervals
+
+    def shift_of(self, advisor: str, day: date) -> Optional[str]:
+        """Turno de un asesor en la fecha, o None si no trabaja."""
+        intervals = self._check_advisor(advisor)
+        i = bisect_right(self._starts[advisor], day) - 1
+        if i >= 0 and intervals[i][1] >= day:
+            return intervals[i][2]
+        return None
+
+    def intervals(self, advisor: str, desde: date, hasta: date) -> List[Interval]:
+        """Tramos (desde, hasta, turno) de un asesor que se solapan con [desde, hasta], recortados."""
+        intervals = self._check_advisor(advisor)
+        i = max(0, bisect_right(self._starts[advisor], desde) - 1)
+        result = []
+        while i < len(intervals) and intervals[i][0] <= hasta:
+            start, end, shift = intervals[i]
+            if end >= desde:
+                result.append((max(start, desde), min(end, hasta), shift))
+            i += 1
+        return result
+
+    def range(self, desde: date, hasta: date) -> Dict[str, List[Interval]]:
+        """Tramos de todos los asesores en [desde, hasta]."""
+        return {advisor: self.intervals(advisor, desde, hasta) for advisor in self.plan.advisors}
+
+# Fin de plan_calendar.py
@@ -0,0 +1,144 @@
+# plan_export.py
+"""
+Exportación en streaming de planes (CSV / NDJSON, gzip opcional).
+
+Las filas se generan directamente desde el plan compacto (plan_result.CompactPlan),
+por lotes, sin pasar por pandas ni materializar el archivo completo en memoria:
+el pico de memoria no depende del horizonte planeado.
+
+También negocia la compresión de las respuestas HTTP (Content-Encoding gzip o br;
+br sólo si el paquete opcional brotli está instalado).
+"""
+from typing import Any, Iterable, Iterator, Optional, Tuple
+import csv
+import io
+import json
+import zlib
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli sólo se ofrece gzip
+    brotli = None
+
+COLUMNS = ("Asesor", "Semana", "Día", "Turno")
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+# filas por fragmento emitido; equilibra número de escrituras y tamaño del fragmento
+CHUNK_ROWS = 512
+
+# codificaciones soportadas, en orden de preferencia ante el mismo q
+ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _batched(rows: Iterable[Any], size: int = CHUNK_ROWS) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_csv(rows: Iterable[Tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COLUMNS)
+    for batch in _batched(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows: Iterable[Tuple]) -> Iterator[str]:
+    for batch in _batched(rows):
+        yield "".join(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n" for row in batch)
+
+
+def iter_gzip(chunks: Iterable[str], level: int = 6) -> Iterator[bytes]:
+    """Comprime en gzip un flujo de fragmentos de texto sin acumularlo."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31 -> cabecera gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Elige la codificación según Accept-Encoding (con valores q). None = sin comprimir.
+    Ej.: "gzip, br;q=0.9" -> "gzip"; "*;q=0.5" -> la preferida; "gzip;q=0" -> None.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def iter_encoded(chunks: Iterable[bytes], encoding: Optional[str]) -> Iterator[bytes]:
+    """Aplica Content-Encoding (gzip / br) a un flujo de bytes sin acumularlo."""
+    if encoding is None:
+        yield from chunks
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode_body(body: bytes, encoding: Optional[str]) -> bytes:
+    """Versión para cuerpos completos (p. ej. la respuesta JSON de /plan)."""
+    return b"".join(iter_encoded([body], encoding))
+
+
+def stream_export(plan, fmt: str = "csv", compress: bool = False):
+    """
+    Devuelve (generador, mimetype, nombre_de_archivo) para el formato pedido.
+    Lanza ValueError si el formato no está soportado.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}. Use uno de: {', '.join(FORMATS)}")
+    mimetype, extension = FORMATS[fmt]
+    rows = plan.iter_rows()
+    chunks: Iterable[Any] = iter_csv(rows) if fmt == "csv" else iter_ndjson(rows)
+    filename = f"planificacion_turnos.{extension}"
+    if compress:
+        return iter_gzip(chunks), "application/gzip", filename + ".gz"
+    return (chunk.encode("utf-8") for chunk in chunks), mimetype, filename
+
+# Fin de plan_export.py
@@ -0,0 +1,223 @@
+# plan_jobs.py
+"""
+Cola de trabajos de planeación con un pool acotado de hilos resolvedores.
+
+Saca la resolución de CP-SAT del hilo de la petición HTTP:
+ - submit() encola un trabajo y devuelve su id inmediatamente
+ - límite de trabajos pendientes (QueueFullError -> HTTP 429 en las rutas)
+ - cancelación de trabajos en cola o en ejecución (StopSearch del solver; las resoluciones
+   que corren en el pool de procesos sólo se marcan como canceladas)
+ - límite máximo de time_limit para que un cliente no acapare un worker
+ - los trabajos terminados se conservan retention_seconds para poder consultarlos
+"""
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+import logging
+import os
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+CANCELLED = "cancelled"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class PlanJob:
+    def __init__(self, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.planner = None
+        self.cancel_requested = False
+        self._future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, ERROR, CANCELLED)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error:
+            data["message"] = self.error
+        if include_result and self.status == DONE:
+            data["plan"] = self.result["plan"].records()
+            data["cached"] = self.result["cached"]
+        return data
+
+
+def solve_plan(job: PlanJob) -> Dict[str, Any]:
+    """
+    Resuelve un trabajo con ShiftPlanner.
+    Devuelve {"plan": CompactPlan, "cached": bool, "stats": dict, "version": int | None}.
+    Si hay pool de procesos configurado (solver_pool), CP-SAT corre allí.
+    """
+    from planning_model import ShiftPlanner
+    from solver_pool import get_solver_pool
+
+    params = job.params
+    planner = ShiftPlanner(
+        weeks=params["weeks"],
+        enforce_opening_only=params["enforce_opening_only"],
+        opening_only_advisor=params["opening_only_advisor"],
+        enable_weekly_rotation=params["enable_weekly_rotation"],
+        start_date=params.get("start_date"),
+        holidays=params.get("holidays"),
+        balance=params.get("balance", False),
+        fairness_gap=params.get("fairness_gap", 0.0),
+    )
+    job.planner = planner
+    pool = get_solver_pool()
+    if pool is not None:
+        pool.solve(planner, time_limit_seconds=params["time_limit"])
+    else:
+        planner.solve_plan(time_limit_seconds=params["time_limit"])
+    return {"plan": planner.plan, "cached": planner.from_cache, "stats": planner.stats, "version": planner.plan_version}
+
+
+class PlanJobQueue:
+    def __init__(
+        self,
+        max_workers: int = 2,
+        max_pending: int = 16,
+        max_time_limit: int = 30,
+        retention_seconds: float = 600.0,
+        runner: Callable[[PlanJob], Dict[str, Any]] = solve_plan,
+    ):
+        """
+        max_workers: hilos que resuelven en paralelo
+        max_pending: trabajos que pueden esperar en cola además de los que están en ejecución
+        max_time_limit: tope (segundos) aplicado al time_limit pedido por el cliente
+        retention_seconds: tiempo que se conservan los trabajos terminados
+        runner: función que resuelve un trabajo y devuelve su resultado
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers debe ser >= 1")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_time_limit = max_time_limit
+        self.retention_seconds = retention_seconds
+        self.runner = runner
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-job")
+        self._jobs: Dict[str, PlanJob] = {}
+        self._active = 0
+        self._lock = Lock()
+
+    def submit(self, params: Dict[str, Any]) -> PlanJob:
+        params = dict(params)
+        if params.get("time_limit") is not None:
+            params["time_limit"] = max(1, min(int(params["time_limit"]), self.max_time_limit))
+
+        job = PlanJob(params)
+        with self._lock:
+            self._purge_finished()
+            if self._active >= self.max_workers + self.max_pending:
+                raise QueueFullError("La cola de planeación está llena, intente más tarde.")
+            self._active += 1
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(self._run, job)
+        job._future.add_done_callback(lambda fut, job=job: self._on_done(job, fut))
+        return job
+
+    def _run(self, job: PlanJob) -> None:
+        if job.cancel_requested:
+            job.status = CANCELLED
+            return
+        job.status = RUNNING
+        try:
+            job.result = self.runner(job)
+            job.status = CANCELLED if job.cancel_requested else DONE
+        except Exception as e:
+            if job.cancel_requested:
+                job.status = CANCELLED
+            else:
+                logger.exception("Error resolviendo el trabajo %s", job.id)
+                job.error = str(e)
+                job.status = ERROR
+
+    def _on_done(self, job: PlanJob, future: Future) -> None:
+        try:
+            future.result()
+        except CancelledError:
+            pass
+        if not job.finished:
+            job.status = CANCELLED
+        job.finished_at = time.time()
+        job.planner = None
+        with self._lock:
+            self._active -= 1
+
+    def _purge_finished(self) -> None:
+        limit = time.time() - self.retention_seconds
+        expired = [jid for jid, job in self._jobs.items() if job.finished and job.finished_at and job.finished_at < limit]
+        for jid in expired:
+            del self._jobs[jid]
+
+    def get(self, job_id: str) -> Optional[PlanJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancela un trabajo. Devuelve False si no existe o ya había terminado.
+
+        Un trabajo en cola no llega a ejecutarse y uno que resuelve en este proceso se detiene
+        con StopSearch. Si la resolución corre en el pool de procesos (solver_pool) no se
+        puede interrumpir: sigue hasta su time_limit y el trabajo queda cancelado al terminar,
+        descartando el resultado.
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_requested = True
+        if job._future is not None and job._future.cancel():
+            job.status = CANCELLED
+            return True
+        planner = job.planner
+        solver = getattr(planner, "solver", None) if planner is not None else None
+        if solver is not None:
+            solver.StopSearch()
+        return True
+
+    def wait(self, job: PlanJob, timeout: Optional[float] = None) -> PlanJob:
+        """Espera a que el trabajo termine (o a que venza el timeout) y lo devuelve."""
+        try:
+            job._future.result(timeout=timeout)
+        except CancelledError:
+            pass
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "jobs": len(self._jobs),
+            }
+
+
+# Cola compartida por las rutas de planeación
+plan_jobs = PlanJobQueue(
+    max_workers=int(os.environ.get("PLAN_JOB_WORKERS", "2")),
+    max_pending=int(os.environ.get("PLAN_JOB_MAX_PENDING", "16")),
+    max_time_limit=int(os.environ.get("PLAN_MAX_TIME_LIMIT", "30")),
+)
+
+# Fin de plan_jobs.py
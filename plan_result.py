@@ -0,0 +1,288 @@
+# plan_result.py
+"""
+Representación compacta de un plan resuelto.
+
+Los turnos se guardan como un arreglo de enteros pequeños (un byte por celda
+asesor x semana x día) en lugar de diccionarios anidados con un string por celda.
+Las vistas (dict, registros, DataFrame, CSV, JSON) se generan bajo demanda.
+
+Código 0 = sin turno (día no laborable); código i = shifts[i - 1].
+
+Un plan puede estar anclado al calendario (start_date): la semana 0 es la del lunes de
+start_date y cada día se identifica con una fecha real (ver plan_calendar).
+"""
+from array import array
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+import hashlib
+import json
+
+NO_SHIFT = 0
+
+# día de la semana (lunes = 0) de cada nombre de día
+DAY_WEEKDAY = {
+    "Lunes": 0, "Martes": 1, "Miércoles": 2, "Jueves": 3, "Viernes": 4, "Sábado": 5, "Domingo": 6,
+}
+
+
+class CompactPlan:
+    """
+    Plan inmutable: asesores x semanas x días con un código de turno por celda.
+
+    codes es un array("B") o cualquier buffer de bytes indexable, p. ej. una memoryview
+    sobre un archivo mapeado en memoria (ver plan_store).
+    """
+
+    __slots__ = ("advisors", "days", "weeks", "shifts", "_codes", "start_date", "_calendar", "_digest")
+
+    def __init__(
+        self,
+        advisors: Sequence[str],
+        days: Sequence[str],
+        weeks: int,
+        shifts: Sequence[str],
+        codes: array,
+        start_date: Optional[date] = None,
+    ):
+        if len(codes) != len(advisors) * weeks * len(days):
+            raise ValueError("El tamaño de codes no coincide con asesores x semanas x días.")
+        self.advisors = tuple(advisors)
+        self.days = tuple(days)
+        self.weeks = weeks
+        self.shifts = tuple(shifts)
+        self._codes = codes
+        self.start_date = start_date
+        self._calendar = None
+        self._digest: Optional[str] = None
+
+    # ---- construcción ----
+
+    @classmethod
+    def from_week_codes(
+        cls,
+        advisors: Sequence[str],
+        days: Sequence[str],
+        shifts: Sequence[str],
+        week_codes: Sequence[Sequence[int]],
+    ) -> "CompactPlan":
+        """week_codes[a][w] = código del turno del asesor a en la semana w (igual todos los días)."""
+        n_days = len(days)
+        codes = array("B")
+        for per_week in week_codes:
+            for code in per_week:
+                codes.extend([code] * n_days)
+        weeks = len(week_codes[0]) if week_codes else 0
+        return cls(advisors, days, weeks, shifts, codes)
+
+    @classmethod
+    def from_solution(
+        cls,
+        sol: Mapping[str, Mapping[int, Mapping[str, str]]],
+        days: Sequence[str],
+        shifts: Sequence[str],
+    ) -> "CompactPlan":
+        """Convierte la estructura { advisor: { week: { day: turno } } }."""
+        to_code = {shift: i + 1 for i, shift in enumerate(shifts)}
+        advisors = list(sol)
+        weeks = len(next(iter(sol.values()))) if sol else 0
+        codes = array("B")
+        for advisor in advisors:
+            for w in range(weeks):
+                days_dict = sol[advisor][w]
+                codes.extend(to_code[days_dict[day]] if day in days_dict else NO_SHIFT for day in days)
+        return cls(advisors, days, weeks, shifts, codes)
+
+    # ---- acceso ----
+
+    def _index(self, a: int, w: int, d: int) -> int:
+        return (a * self.weeks + w) * len(self.days) + d
+
+    def code_at(self, a: int, w: int, d: int) -> int:
+        return self._codes[self._index(a, w, d)]
+
+    def shift_at(self, advisor: str, week: int, day: str) -> Optional[str]:
+        code = self.code_at(self.advisors.index(advisor), week, self.days.index(day))
+        return self.shifts[code - 1] if code else None
+
+    def week_codes(self, advisor_index: int) -> List[int]:
+        """Código del primer día laborable de cada semana para un asesor."""
+        n_days = len(self.days)
+        result = []
+        for w in range(self.weeks):
+            start = self._index(advisor_index, w, 0)
+            result.append(next((c for c in self._codes[start:start + n_days] if c), NO_SHIFT))
+        return result
+
+    # ---- calendario ----
+
+    def _week_monday(self) -> date:
+        if self.start_date is None:
+            raise ValueError("El plan no está anclado a una fecha de inicio (start_date).")
+        return self.start_date - timedelta(days=self.start_date.weekday())
+
+    def date_of(self, week: int, day_index: int) -> date:
+        """Fecha real de la celda (semana desde 0, índice de día) en un plan anclado."""
+        return self._week_monday() + timedelta(days=7 * week + DAY_WEEKDAY[self.days[day_index]])
+
+    def anchored(self, start_date: date, holidays: Iterable[date] = ()) -> "CompactPlan":
+        """
+        Copia anclada a start_date: los festivos, los domingos y los días anteriores a
+        start_date en la primera semana quedan sin turno.
+        """
+        unknown = [d for d in self.days if d not in DAY_WEEKDAY]
+        if unknown:
+            raise ValueError(f"Días sin equivalente en el calendario: {unknown}")
+        plan = CompactPlan(self.advisors, self.days, self.weeks, self.shifts, array("B", self._codes), start_date)
+        excluded = set(holidays)
+        n_days = len(self.days)
+        off = [
+            w * n_days + d
+            for w in range(self.weeks)
+            for d in range(n_days)
+            if (day := plan.date_of(w, d)) < start_date or day.weekday() == 6 or day in excluded
+        ]
+        per_advisor = self.weeks * n_days
+        for a in range(len(self.advisors)):
+            base = a * per_advisor
+            for cell in off:
+                plan._codes[base + cell] = NO_SHIFT
+        return plan
+
+    def calendar(self):
+        """Índices por fecha y por asesor (plan_calendar.PlanCalendar), construidos una sola vez."""
+        if self._calendar is None:
+            from plan_calendar import PlanCalendar
+
+            self._calendar = PlanCalendar(self)
+        return self._calendar
+
+    def content_hash(self) -> str:
+        """
+        sha256 (hex) del contenido: dimensiones, nombres, start_date y códigos.
+        Se calcula una vez por plan; sirve de ETag y para detectar versiones repetidas.
+        """
+        if self._digest is None:
+            digest = hashlib.sha256()
+            digest.update(json.dumps(
+                [self.advisors, self.days, self.shifts, self.weeks,
+                 self.start_date.isoformat() if self.start_date else None],
+                ensure_ascii=False,
+            ).encode("utf-8"))
+            digest.update(self._codes)
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    @property
+    def codes(self) -> memoryview:
+        """Vista de sólo lectura sobre el arreglo de códigos."""
+        return memoryview(self._codes).toreadonly()
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, CompactPlan):
+            return NotImplemented
+        return (
+            self.advisors == other.advisors
+            and self.days == other.days
+            and self.weeks == other.weeks
+            and self.shifts == other.shifts
+            and self._codes == other._codes
+            and self.start_date == other.start_date
+        )
+
+    def __hash__(self) -> int:
+        return hash((self.advisors, self.days, self.weeks, self.shifts, self._codes.tobytes(), self.start_date))
+
+    def __copy__(self) -> "CompactPlan":
+        return self
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "CompactPlan":
+        # inmutable: las copias (p. ej. en PlanCache) pueden compartir la instancia
+        return self
+
+    def __reduce__(self):
+        return (_restore, (self.advisors, self.days, self.weeks, self.shifts, self._codes.tobytes(), self.start_date))
+
+    # ---- vistas ----
+
+    def iter_rows(self) -> Iterator[Tuple[str, int, str, str]]:
+        """Filas (Asesor, Semana, Día, Turno); omite las celdas sin turno."""
+        shifts, days, codes = self.shifts, self.days, self._codes
+        i = 0
+        for advisor in self.advisors:
+            for w in range(1, self.weeks + 1):
+                for day in days:
+                    code = codes[i]
+                    i += 1
+                    if code:
+                        yield advisor, w, day, shifts[code - 1]
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        for advisor, week, day, shift in self.iter_rows():
+            yield {"Asesor": advisor, "Semana": week, "Día": day, "Turno": shift}
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self.iter_records())
+
+    def to_dict(self) -> Dict[str, Dict[int, Dict[str, str]]]:
+        """Estructura anidada { advisor: { week_index: { day: turno } } } (semanas desde 0)."""
+        sol: Dict[str, Dict[int, Dict[str, str]]] = {advisor: {} for advisor in self.advisors}
+        for advisor, week, day, shift in self.iter_rows():
+            sol[advisor].setdefault(week - 1, {})[day] = shift
+        for weeks_dict in sol.values():
+            for w in range(self.weeks):
+                weeks_dict.setdefault(w, {})
+        return sol
+
+    def to_dataframe(self):
+        import pandas as pd
+
+        return pd.DataFrame(list(self.iter_rows()), columns=["Asesor", "Semana", "Día", "Turno"])
+
+    def iter_json(self, chunk_rows: int = 512) -> Iterator[str]:
+        """Lista JSON de registros, en fragmentos, sin construir los dicts intermedios."""
+        enc = json.dumps
+        advisors = [enc(a, ensure_ascii=False) for a in self.advisors]
+        days = [enc(d, ensure_ascii=False) for d in self.days]
+        shifts = [enc(s, ensure_ascii=False) for s in self.shifts]
+        codes, n_days = self._codes, len(self.days)
+        parts: List[str] = []
+        first = True
+        yield "["
+        i = 0
+        for advisor in advisors:
+            for w in range(1, self.weeks + 1):
+                for d in range(n_days):
+                    code = codes[i]
+                    i += 1
+                    if not code:
+                        continue
+                    parts.append(
+                        ('' if first else ', ')
+                        + f'{{"Asesor": {advisor}, "Semana": {w}, "Día": {days[d]}, "Turno": {shifts[code - 1]}}}'
+                    )
+                    first = False
+                    if len(parts) >= chunk_rows:
+                        yield "".join(parts)
+                        parts = []
+        if parts:
+            yield "".join(parts)
+        yield "]"
+
+    def to_json(self) -> str:
+        return "".join(self.iter_json())
+
+    def iter_csv(self) -> Iterator[str]:
+        from plan_export import iter_csv
+
+        return iter_csv(self.iter_rows())
+
+
+def _restore(advisors, days, weeks, shifts, raw: bytes, start_date: Optional[date] = None) -> CompactPlan:
+    codes = array("B")
+    codes.frombytes(raw)
+    return CompactPlan(advisors, days, weeks, shifts, codes, start_date)
+
+# Fin de plan_result.py
@@ -0,0 +1,241 @@
+# plan_store.py
+"""
+Almacén persistente y versionado de planes resueltos.
+
+Cada combinación de parámetros (clave de plan_cache.make_plan_key) tiene un directorio con
+una versión por archivo (v000001.plan, v000002.plan, ...). Formato de cada archivo:
+
+    cabecera fija   struct "<4sHI": magic b"PLAN", versión de formato, largo de metadatos
+    metadatos       JSON UTF-8: asesores, días, turnos, semanas, start_date, método, fecha, sha256
+    códigos         un byte por celda asesor x semana x día (el mismo arreglo de CompactPlan)
+
+Los códigos no se leen: el archivo se mapea en memoria (mmap) y el plan usa una vista
+sobre el mapeo, así que cargar un plan grande sólo lee la cabecera. Los archivos de
+versión se escriben en un temporal del mismo directorio y se enlazan con su nombre final
+ya completos y sincronizados (os.link falla si la versión existe: varios procesos pueden
+guardar a la vez sin pisarse). Una versión ilegible (p. ej. de una versión anterior del
+código que la escribía en el sitio y se cortó) se registra en el log y se omite.
+
+Se activa con PLAN_STORE_DIR; ShiftPlanner lo consulta tras la caché en memoria.
+"""
+from datetime import date, datetime
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+
+from plan_result import CompactPlan
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PLAN"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+
+
+def key_id(key: Tuple[Hashable, ...]) -> str:
+    """Identificador estable (nombre de directorio) de una clave de plan."""
+    canonical = json.dumps(key, default=str, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:24]
+
+
+def write_plan(path: str, plan: CompactPlan, meta: Dict[str, Any]) -> None:
+    """
+    Escribe un plan en el formato del almacén. Falla con FileExistsError si el archivo ya
+    existe; nunca deja a la vista un archivo a medio escribir.
+    """
+    meta = dict(meta, **{
+        "advisors": list(plan.advisors),
+        "days": list(plan.days),
+        "shifts": list(plan.shifts),
+        "weeks": plan.weeks,
+        "start_date": plan.start_date.isoformat() if plan.start_date else None,
+        "sha256": plan.content_hash(),
+    })
+    raw = json.dumps(meta, ensure_ascii=False).encode("utf-8")
+    fd, tmp = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(raw)))
+            fh.write(raw)
+            fh.write(plan.codes)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.link(tmp, path)
+    finally:
+        os.unlink(tmp)
+
+
+def read_meta(path: str) -> Tuple[Dict[str, Any], int]:
+    """Lee sólo la cabecera. Devuelve (metadatos, desplazamiento de los códigos)."""
+    with open(path, "rb") as fh:
+        header = fh.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Archivo de plan truncado: {path}")
+        magic, version, length = _HEADER.unpack(header)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"Archivo de plan no válido: {path}")
+        raw = fh.read(length)
+        if len(raw) < length:
+            raise ValueError(f"Archivo de plan truncado: {path}")
+        meta = json.loads(raw.decode("utf-8"))
+    if not isinstance(meta, dict):
+        raise ValueError(f"Archivo de plan no válido: {path}")
+    return meta, _HEADER.size + length
+
+
+def read_plan(path: str) -> Tuple[CompactPlan, Dict[str, Any]]:
+    """Carga un plan con los códigos mapeados en memoria (sin leerlos)."""
+    meta, offset = read_meta(path)
+    try:
+        size = len(meta["advisors"]) * meta["weeks"] * len(meta["days"])
+        start_date = date.fromisoformat(meta["start_date"]) if meta.get("start_date") else None
+    except (KeyError, TypeError) as e:
+        raise ValueError(f"Metadatos de plan no válidos en {path}: {e}") from e
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size != offset + size:
+            raise ValueError(f"Archivo de plan truncado: {path}")
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    codes = memoryview(mapped)[offset:]
+    plan = CompactPlan(meta["advisors"], meta["days"], meta["weeks"], meta["shifts"], codes, start_date)
+    return plan, meta
+
+
+def _unreadable(path: str, error: Exception) -> None:
+    logger.warning("Se omite la versión ilegible %s: %s", path, error)
+
+
+class PlanStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        # último plan cargado por clave: (versión, plan, metadatos)
+        self._latest: Dict[str, Tuple[int, CompactPlan, Dict[str, Any]]] = {}
+        self._lock = Lock()
+
+    def _dir(self, key: Tuple[Hashable, ...]) -> str:
+        return os.path.join(self.root, key_id(key))
+
+    @staticmethod
+    def _version_path(directory: str, version: int) -> str:
+        return os.path.join(directory, f"v{version:06d}.plan")
+
+    def _version_numbers(self, directory: str) -> List[int]:
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(n[1:7]) for n in names if n.startswith("v") and n.endswith(".plan"))
+
+    def save(
+        self,
+        key: Tuple[Hashable, ...],
+        plan: CompactPlan,
+        method: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Guarda el plan como nueva versión de la clave y devuelve su número.
+        Si es idéntico a la última versión legible no se duplica: devuelve esa versión.
+        """
+        directory = self._dir(key)
+        os.makedirs(directory, exist_ok=True)
+        digest = plan.content_hash()
+        versions = self._version_numbers(directory)
+        latest = self.latest_with_meta(key)
+        if latest is not None and latest[1].get("sha256") == digest:
+            return latest[1]["version"]
+        meta = {
+            "key": json.loads(json.dumps(key, default=str, ensure_ascii=False)),
+            "method": method,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "sha256": digest,
+        }
+        if params is not None:
+            meta["params"] = params
+        version = (versions[-1] if versions else 0) + 1
+        while True:
+            try:
+                write_plan(self._version_path(directory, version), plan, dict(meta, version=version))
+                break
+            except FileExistsError:
+                # otro proceso guardó esa versión primero
+                version += 1
+        with self._lock:
+            self._latest.pop(key_id(key), None)
+        logger.info("Plan guardado: %s v%s", key_id(key), version)
+        return version
+
+    def latest(self, key: Tuple[Hashable, ...]) -> Optional[CompactPlan]:
+        """Última versión guardada de la clave, o None."""
+        found = self.latest_with_meta(key)
+        return found[0] if found else None
+
+    def latest_with_meta(self, key: Tuple[Hashable, ...]) -> Optional[Tuple[CompactPlan, Dict[str, Any]]]:
+        """Última versión legible de la clave con sus metadatos, o None."""
+        directory = self._dir(key)
+        ident = key_id(key)
+        with self._lock:
+            cached = self._latest.get(ident)
+        for version in reversed(self._version_numbers(directory)):
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2]
+            path = self._version_path(directory, version)
+            try:
+                plan, meta = read_plan(path)
+            except (OSError, ValueError) as e:
+                _unreadable(path, e)
+                continue
+            with self._lock:
+                self._latest[ident] = (version, plan, meta)
+            return plan, meta
+        return None
+
+    def load(self, key: Tuple[Hashable, ...], version: int) -> Optional[CompactPlan]:
+        """La versión pedida, o None si no existe o no se puede leer."""
+        path = self._version_path(self._dir(key), version)
+        if not os.path.exists(path):
+            return None
+        try:
+            return read_plan(path)[0]
+        except (OSError, ValueError) as e:
+            _unreadable(path, e)
+            return None
+
+    def versions(self, key: Tuple[Hashable, ...]) -> List[Dict[str, Any]]:
+        """Metadatos de todas las versiones de la clave (sólo lee cabeceras)."""
+        directory = self._dir(key)
+        result = []
+        for version in self._version_numbers(directory):
+            path = self._version_path(directory, version)
+            try:
+                meta, offset = read_meta(path)
+            except (OSError, ValueError) as e:
+                _unreadable(path, e)
+                continue
+            result.append({
+                "version": version,
+                "created_at": meta.get("created_at"),
+                "method": meta.get("method"),
+                "sha256": meta.get("sha256"),
+                "weeks": meta.get("weeks"),
+                "bytes": os.path.getsize(path),
+                "code_bytes": os.path.getsize(path) - offset,
+            })
+        return result
+
+
+def _store_from_env() -> Optional[PlanStore]:
+    root = os.environ.get("PLAN_STORE_DIR")
+    return PlanStore(root) if root else None
+
+
+# Almacén compartido del proceso; None si PLAN_STORE_DIR no está configurado
+plan_store = _store_from_env()
+
+# Fin de plan_store.py
@@ -0,0 +1,157 @@
+# planner_metrics.py
+"""
+Instrumentación del planner: tiempos por fase y métricas estilo Prometheus.
+
+ - PhaseTimer mide fases (cache, build, solve, extract, serialize...) de una resolución
+ - histogramas agregados por proceso, expuestos en /metrics (formato de texto Prometheus)
+ - con PLANNER_METRICS=0 los temporizadores son no-ops y no se agrega nada
+"""
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import os
+import time
+
+ENABLED = os.environ.get("PLANNER_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# segundos; cubre desde la ruta combinatoria (µs) hasta resoluciones CP-SAT largas
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL = nullcontext()
+
+
+class PhaseTimer:
+    """Acumula la duración (segundos) de cada fase de una resolución."""
+
+    __slots__ = ("enabled", "timings")
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def _measure(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def phase(self, name: str):
+        if not self.enabled:
+            return _NULL
+        return self._measure(name)
+
+    def as_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.timings.items()}
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (conteos por bucket, suma, total)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            idx = bisect.bisect_left(self.buckets, value)
+            if idx < len(self.buckets):
+                series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                base = ",".join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+                sep = "," if base else ""
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{base}}} {total}")
+                lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                base = ",".join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+                lines.append(f"{self.name}{{{base}}} {value}")
+        return lines
+
+
+PHASE_SECONDS = Histogram(
+    "planner_phase_seconds", "Duración de cada fase de la planeación", ["phase", "method"]
+)
+SOLVES_TOTAL = Counter(
+    "planner_solves_total", "Planeaciones atendidas por método y estado del solver", ["method", "status"]
+)
+SOLVER_BRANCHES = Histogram(
+    "planner_solver_branches", "Ramas exploradas por CP-SAT", [],
+    buckets=(0, 10, 100, 1000, 10000, 100000, 1000000),
+)
+SOLVER_CONFLICTS = Histogram(
+    "planner_solver_conflicts", "Conflictos encontrados por CP-SAT", [],
+    buckets=(0, 10, 100, 1000, 10000, 100000, 1000000),
+)
+POLICY_DECISIONS = Counter(
+    "planner_solver_policy_decisions_total", "Decisiones de la política de recursos del solver", ["reason", "workers"]
+)
+
+_REGISTRY = [PHASE_SECONDS, SOLVES_TOTAL, SOLVER_BRANCHES, SOLVER_CONFLICTS, POLICY_DECISIONS]
+
+
+def record(timer: PhaseTimer, method: Optional[str], solver_stats: Optional[Dict] = None) -> None:
+    """Agrega los tiempos de una resolución (y estadísticas de CP-SAT si las hay) a las métricas."""
+    if not timer.enabled:
+        return
+    method = method or "unknown"
+    for phase, seconds in timer.timings.items():
+        PHASE_SECONDS.observe(seconds, phase, method)
+    SOLVES_TOTAL.inc(method, (solver_stats or {}).get("status", "OK"))
+    if solver_stats:
+        SOLVER_BRANCHES.observe(solver_stats["branches"])
+        SOLVER_CONFLICTS.observe(solver_stats["conflicts"])
+        policy = solver_stats.get("policy")
+        if policy:
+            POLICY_DECISIONS.inc(policy["reason"], str(policy["workers"]))
+
+
+def observe_phase(phase: str, seconds: float, method: Optional[str] = None) -> None:
+    """Registra una fase medida fuera del planner (p. ej. serialización en la ruta)."""
+    if ENABLED:
+        PHASE_SECONDS.observe(seconds, phase, method or "unknown")
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Fin de planner_metrics.py
@@ -5,15 +5,25 @@ Shift planner usando OR-Tools CP-SAT.
 Clase ShiftPlanner con:
  - soporte para 1..n semanas (rotación entre semanas opcional)
  - opción para forzar una asesora a solo Apertura
- - exclusión de domingos y festivos (se pasan fechas o se usan nombres de día)
+ - exclusión de domingos y festivos con start_date (plan anclado al calendario)
  - métodos para construir, resolver y convertir la solución a DataFrame/JSON
  - manejo de errores y validaciones explícitas
 """
 from ortools.sat.python import cp_model
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
+from threading import Thread
+import itertools
 import pandas as pd
 import logging
+import math
+import queue
+
+from plan_cache import PlanCache, make_plan_key, plan_cache
+from plan_result import CompactPlan
+from plan_store import PlanStore, plan_store
+from planner_metrics import PhaseTimer, record as record_metrics
+from solver_policy import SolverResourcePolicy, solver_policy
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -23,6 +33,88 @@ class ShiftPlannerError(Exception):
     pass
 
 
+# Semilla fija de CP-SAT para resoluciones deterministas (ver ShiftPlanner(deterministic=True))
+DETERMINISTIC_SEED = 0
+
+# Tope de planes alternativos por enumeración (ver ShiftPlanner.iter_alternatives)
+MAX_ALTERNATIVES = 100
+
+# Con 3 asesores y 3 turnos cada semana es una permutación de (1, 2, 3): posición i = turno del asesor i.
+_PERMUTATIONS: Tuple[Tuple[int, ...], ...] = tuple(itertools.permutations((1, 2, 3)))
+
+
+def _build_transition_table() -> Dict[Tuple[Tuple[int, ...], Optional[int]], Tuple[Tuple[int, ...], ...]]:
+    """
+    Tabla precalculada de transiciones válidas con rotación semanal.
+
+    Clave: (permutación actual, índice del asesor fijado a Apertura o None).
+    Valor: permutaciones siguientes que difieren en todas las posiciones no fijadas
+    y mantienen la posición fijada en Apertura.
+    """
+    table = {}
+    for pinned in (None, 0, 1, 2):
+        for current in _PERMUTATIONS:
+            table[(current, pinned)] = tuple(
+                nxt for nxt in _PERMUTATIONS
+                if (pinned is None or nxt[pinned] == 1)
+                and all(nxt[i] != current[i] for i in range(3) if i != pinned)
+            )
+    return table
+
+
+_ROTATION_TRANSITIONS = _build_transition_table()
+
+
+class _AlternativesCollector(cp_model.CpSolverSolutionCallback):
+    """Callback de enumeración: convierte cada solución en plan, descarta repetidos y corta en k."""
+
+    def __init__(self, planner: "ShiftPlanner", limit: int, emit):
+        super().__init__()
+        self.planner = planner
+        self.limit = limit
+        self.emit = emit
+        self.count = 0
+        self.cancelled = False
+        self._seen = set()
+
+    def on_solution_callback(self) -> None:
+        if self.cancelled:
+            self.StopSearch()
+            return
+        plan = self.planner._plan_from(self.Value)
+        digest = plan.content_hash()
+        if digest in self._seen:
+            return
+        self._seen.add(digest)
+        self.count += 1
+        self.emit(plan)
+        if self.count >= self.limit:
+            self.StopSearch()
+
+
+class _ImprovementCollector(cp_model.CpSolverSolutionCallback):
+    """Callback de optimización: CP-SAT lo llama con cada solución que mejora el objetivo."""
+
+    def __init__(self, planner: "ShiftPlanner", emit):
+        super().__init__()
+        self.planner = planner
+        self.emit = emit
+        self.count = 0
+        self.cancelled = False
+
+    def on_solution_callback(self) -> None:
+        if self.cancelled:
+            self.StopSearch()
+            return
+        self.count += 1
+        self.emit({
+            "plan": self.planner._plan_from(self.Value),
+            "objective": int(self.ObjectiveValue()),
+            "bound": int(self.BestObjectiveBound()),
+            "seconds": round(self.WallTime(), 4),
+        })
+
+
 class ShiftPlanner:
     SHIFT_MAP = {1: "Apertura", 2: "Cierre", 3: "Intermedio"}
 
@@ -35,6 +127,16 @@ class ShiftPlanner:
         opening_only_advisor: Optional[str] = None,
         enable_weekly_rotation: bool = False,
         holidays: Optional[List[date]] = None,
+        cache: Optional[PlanCache] = plan_cache,
+        compact: bool = True,
+        fast_path: bool = True,
+        num_search_workers: Optional[int] = None,
+        policy: SolverResourcePolicy = solver_policy,
+        start_date: Optional[date] = None,
+        store: Optional[PlanStore] = plan_store,
+        deterministic: bool = True,
+        balance: bool = False,
+        fairness_gap: float = 0.0,
     ):
         """
         Inicializa el planner.
@@ -45,7 +147,26 @@ class ShiftPlanner:
         enforce_opening_only: si True, la asesora especificada en opening_only_advisor será siempre Apertura
         opening_only_advisor: nombre del asesor limitado a Apertura (obligatorio si enforce_opening_only=True)
         enable_weekly_rotation: si True, un asesor no puede repetir el mismo turno en semanas consecutivas
-        holidays: lista de fechas (date) a excluir (si quieres usar fechas en vez de nombres, opcional)
+        holidays: lista de fechas (date) sin turno para nadie; requiere start_date
+        cache: caché de planes compartida (por defecto la global de plan_cache); None la desactiva
+        compact: si True (por defecto) usa una variable por (asesor, semana); si False, la formulación
+                 original con una variable por (asesor, semana, día)
+        fast_path: si True (por defecto) el plan se construye directamente con la tabla de
+                   permutaciones sin invocar CP-SAT (salvo con balance, ver uses_fast_path)
+        num_search_workers: hilos de búsqueda de CP-SAT; None deja que la política los elija
+        policy: política de recursos del solver (hilos y tiempo por resolución, ver solver_policy)
+        start_date: ancla el plan al calendario: la semana 1 es la del lunes de start_date;
+                    los festivos, los domingos y los días anteriores a start_date quedan sin turno
+        store: almacén persistente de planes (por defecto el global de plan_store, activo con
+               PLAN_STORE_DIR); se consulta si falla la caché en memoria. None lo desactiva
+               (cache=None no basta: para resolver siempre, p. ej. en benchmarks, pase ambos)
+        deterministic: si True (por defecto) CP-SAT usa una semilla fija y búsqueda intercalada
+                       entre hilos, de modo que parámetros idénticos producen el mismo plan sin
+                       importar cuántos hilos asigne la política (salvo que se agote time_limit)
+        balance: si True se optimiza la equidad (min-max): minimizar el mayor número de semanas
+                 que un asesor pasa en un mismo turno. Desactiva la ruta combinatoria
+        fairness_gap: con balance, brecha relativa entre la solución y la cota con la que
+                      CP-SAT puede detenerse antes de time_limit (0 = hasta probar el óptimo)
         """
         self.advisors = advisors or ["Asesor_1", "Asesor_2", "Asesor_3"]
         self.days = days or ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado"]
@@ -61,7 +182,21 @@ class ShiftPlanner:
         self.opening_only_advisor = opening_only_advisor
         self.enable_weekly_rotation = enable_weekly_rotation
         self.holidays = set(holidays or [])
+        self.cache = cache
+        self.compact = compact
+        self.fast_path = fast_path
+        self.num_search_workers = num_search_workers
+        self.policy = policy
+        self.start_date = start_date
+        self.store = store
+        self.deterministic = deterministic
+        self.balance = balance
+        self.fairness_gap = fairness_gap
 
+        if not 0 <= self.fairness_gap < 1:
+            raise ShiftPlannerError("fairness_gap debe estar en [0, 1).")
+        if self.holidays and self.start_date is None:
+            raise ShiftPlannerError("Los festivos requieren start_date para ubicarlos en el plan.")
         if self.enforce_opening_only and not self.opening_only_advisor:
             raise ShiftPlannerError("Si enforce_opening_only=True debe especificar opening_only_advisor.")
         if self.opening_only_advisor and self.opening_only_advisor not in self.advisors:
@@ -70,14 +205,107 @@ class ShiftPlanner:
         # Modelo y variables (se crean en build_model)
         self.model = None
         self.solver = None
-        # keys: (advisor, week_index, day_name)
-        self.vars: Dict[Tuple[str, int, str], cp_model.IntVar] = {}
-        # solución almacenada tras solve()
-        self._solution: Optional[Dict[str, Dict[int, Dict[str, str]]]] = None
+        # keys: (advisor, week_index) en modo compacto, (advisor, week_index, day_name) en el expandido
+        self.vars: Dict[Tuple, cp_model.IntVar] = {}
+        # formulación del último modelo construido (iter_alternatives usa siempre la compacta)
+        self._compact_vars = compact
+        # solución almacenada tras solve() (ver plan_result.CompactPlan)
+        self._plan: Optional[CompactPlan] = None
+        # True si la última solución vino de la caché
+        self.from_cache = False
+        # "cache" (memoria) o "store" (disco) cuando from_cache es True
+        self.cache_source: Optional[str] = None
+        # versión del plan en el almacén persistente (None si no hay almacén)
+        self.plan_version: Optional[int] = None
+        # "combinatorial" o "cp-sat" según cómo se obtuvo la última solución
+        self.solve_method: Optional[str] = None
+        # resumen del último extend()/replan(): cuánto del plan previo se conservó
+        self.replan_report: Optional[Dict[str, Any]] = None
+        # instrumentación de la última resolución (ver planner_metrics)
+        self.timer = PhaseTimer()
+        self.solver_stats: Optional[Dict[str, Any]] = None
+
+    @property
+    def cache_key(self):
+        """Clave canónica de los parámetros del plan (ver plan_cache.make_plan_key)."""
+        return make_plan_key(
+            weeks=self.weeks,
+            enforce_opening_only=self.enforce_opening_only,
+            opening_only_advisor=self.opening_only_advisor,
+            enable_weekly_rotation=self.enable_weekly_rotation,
+            advisors=self.advisors,
+            days=self.days,
+            holidays=self.holidays,
+            start_date=self.start_date,
+            balance=self.balance,
+        )
+
+    def to_spec(self) -> Dict[str, Any]:
+        """Parámetros del planner como dict serializable (para enviarlo a otro proceso)."""
+        return {
+            "advisors": list(self.advisors),
+            "days": list(self.days),
+            "weeks": self.weeks,
+            "enforce_opening_only": self.enforce_opening_only,
+            "opening_only_advisor": self.opening_only_advisor,
+            "enable_weekly_rotation": self.enable_weekly_rotation,
+            "holidays": sorted(d.isoformat() for d in self.holidays),
+            "compact": self.compact,
+            "fast_path": self.fast_path,
+            "num_search_workers": self.num_search_workers,
+            "deterministic": self.deterministic,
+            "balance": self.balance,
+            "fairness_gap": self.fairness_gap,
+            "start_date": self.start_date.isoformat() if self.start_date else None,
+        }
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any], **kwargs) -> "ShiftPlanner":
+        """Reconstruye un planner a partir de to_spec(). kwargs extra (p. ej. cache) se pasan al constructor."""
+        spec = dict(spec)
+        spec["holidays"] = [date.fromisoformat(d) for d in spec.get("holidays") or []]
+        if spec.get("start_date"):
+            spec["start_date"] = date.fromisoformat(spec["start_date"])
+        return cls(**spec, **kwargs)
 
     def _make_model(self):
+        model = self._make_compact_model() if self.compact else self._make_expanded_model()
+        if self.balance:
+            self._add_fairness_objective()
+        return model
+
+    def _make_compact_model(self):
+        """
+        Formulación reducida: como el turno es el mismo toda la semana, basta una variable
+        por (asesor, semana) y un único AllDifferent por semana. Los días se expanden al
+        extraer la solución.
+        """
         self.model = cp_model.CpModel()
         self.vars = {}
+        self._compact_vars = True
+        self._add_compact_weeks(0, self.weeks)
+        return self.model
+
+    def _add_compact_weeks(self, first: int, last: int) -> None:
+        """Agrega al modelo compacto las variables y restricciones de las semanas [first, last)."""
+        for w in range(first, last):
+            for advisor in self.advisors:
+                self.vars[(advisor, w)] = self.model.NewIntVar(1, 3, f"{advisor}_w{w}")
+            self.model.AddAllDifferent([self.vars[(advisor, w)] for advisor in self.advisors])
+
+            if self.enforce_opening_only:
+                self.model.Add(self.vars[(self.opening_only_advisor, w)] == 1)
+
+            if self.enable_weekly_rotation and w > 0:
+                for advisor in self.advisors:
+                    if self.enforce_opening_only and advisor == self.opening_only_advisor:
+                        continue
+                    self.model.Add(self.vars[(advisor, w - 1)] != self.vars[(advisor, w)])
+
+    def _make_expanded_model(self):
+        self.model = cp_model.CpModel()
+        self.vars = {}
+        self._compact_vars = False
 
         # Crear variables
         for w in range(self.weeks):
@@ -121,25 +349,523 @@ class ShiftPlanner:
                     self.model.Add(v_curr != v_next)
 
         # No se agregan restricciones para domingos porque la lista de días ya los excluye.
-        # No minimizamos ni maximizamos nada; sólo buscamos una solución factible.
+        # Sin balance no minimizamos ni maximizamos nada; sólo buscamos una solución factible.
         return self.model
 
+    def _fairness_scope(self) -> Tuple[List[str], List[int]]:
+        """
+        Asesores y turnos que entran en el balance. El asesor fijado a Apertura no rota:
+        se excluyen él y la Apertura, que los demás nunca cubren.
+        """
+        if self.enforce_opening_only:
+            return [a for a in self.advisors if a != self.opening_only_advisor], [2, 3]
+        return list(self.advisors), [1, 2, 3]
+
+    def _add_fairness_objective(self) -> None:
+        """
+        Objetivo min-max: carga(asesor, turno) = semanas del asesor en ese turno; se minimiza
+        la mayor carga. La cota inferior es ceil(semanas / asesores en el balance).
+        """
+        advisors, codes = self._fairness_scope()
+        max_load = self.model.NewIntVar(math.ceil(self.weeks / len(advisors)), self.weeks, "max_load")
+        for advisor in advisors:
+            for code in codes:
+                in_shift = []
+                for w in range(self.weeks):
+                    var = self._weekly_vars(advisor, w)[0]
+                    b = self.model.NewBoolVar(f"{advisor}_w{w}_is{code}")
+                    self.model.Add(var == code).OnlyEnforceIf(b)
+                    self.model.Add(var != code).OnlyEnforceIf(b.Not())
+                    in_shift.append(b)
+                self.model.Add(sum(in_shift) <= max_load)
+        self.model.Minimize(max_load)
+
+    def shift_loads(self, plan: Optional[CompactPlan] = None) -> Dict[str, Dict[str, int]]:
+        """Semanas por asesor y turno en el plan (por defecto el último resuelto)."""
+        plan = plan or self.plan
+        loads = {}
+        for a, advisor in enumerate(plan.advisors):
+            counts = {shift: 0 for shift in plan.shifts}
+            for code in plan.week_codes(a):
+                if code:
+                    counts[plan.shifts[code - 1]] += 1
+            loads[advisor] = counts
+        return loads
+
+    def max_load(self, plan: Optional[CompactPlan] = None) -> int:
+        """Valor del objetivo de equidad para un plan: la mayor carga dentro del balance."""
+        loads = self.shift_loads(plan)
+        advisors, codes = self._fairness_scope()
+        return max(loads[advisor][self.SHIFT_MAP[code]] for advisor in advisors for code in codes)
+
+    def model_size(self) -> Dict[str, int]:
+        """Tamaño del modelo construido: número de variables y de restricciones."""
+        if self.model is None:
+            raise ShiftPlannerError("No hay modelo. Ejecute build_and_solve() primero.")
+        proto = self.model.Proto()
+        return {"variables": len(proto.variables), "constraints": len(proto.constraints)}
+
     def build_and_solve(self, time_limit_seconds: Optional[int] = 10) -> Dict[str, Dict[int, Dict[str, str]]]:
         """
         Construye el modelo y lo resuelve. Devuelve la solución en estructura:
         { advisor: { week_index: { day_name: "Apertura" } } }
+        (vista dict del plan compacto; use solve_plan()/plan para evitar la expansión)
+
+        Para el caso de 3 asesores x 3 turnos se usa la ruta combinatoria (ver _solve_combinatorial);
+        CP-SAT sólo se invoca con fast_path=False o balance=True (ver uses_fast_path).
+
+        Si hay caché configurada y ya existe un plan para los mismos parámetros,
+        se devuelve sin construir ni resolver el modelo.
         """
-        self._make_model()
-        self.solver = cp_model.CpSolver()
-        if time_limit_seconds:
-            self.solver.parameters.max_time_in_seconds = float(time_limit_seconds)
-        self.solver.parameters.num_search_workers = 8  # usar paralelismo si está disponible
+        return self.solve_plan(time_limit_seconds).to_dict()
+
+    def solve_plan(self, time_limit_seconds: Optional[int] = 10, remote=None) -> CompactPlan:
+        """
+        Como build_and_solve, pero devuelve el plan compacto sin expandirlo a dicts.
+
+        remote: función opcional (planner, time_limit_seconds) -> CompactPlan que resuelve
+                el caso CP-SAT en otro lugar (p. ej. solver_pool.SolverPool).
+        """
+        self._reset_instrumentation()
+        with self.timer.phase("cache"):
+            cached = self.load_cached()
+        if cached is not None:
+            record_metrics(self.timer, self.cache_source)
+            return cached
+
+        if self.uses_fast_path:
+            with self.timer.phase("combinatorial"):
+                plan = self._solve_combinatorial()
+            method = "combinatorial"
+        elif remote is not None:
+            plan = remote(self, time_limit_seconds)
+            method = "cp-sat"
+        else:
+            plan = self._solve_cp_sat(time_limit_seconds)
+            method = "cp-sat"
+        self.store_solution(plan, method)
+        record_metrics(self.timer, method, self.solver_stats)
+        return plan
 
-        status = self.solver.Solve(self.model)
+    def _reset_instrumentation(self) -> None:
+        self.timer = PhaseTimer(enabled=self.timer.enabled)
+        self.solver_stats = None
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Tiempos por fase (ms) y estadísticas de CP-SAT de la última resolución."""
+        return {
+            "solve_method": self.cache_source if self.from_cache else self.solve_method,
+            "timings_ms": self.timer.as_ms(),
+            "solver": self.solver_stats,
+        }
+
+    def load_cached(self) -> Optional[CompactPlan]:
+        """
+        Carga el plan desde la caché en memoria o, si falla, desde el almacén persistente
+        (la última versión guardada). Devuelve None si no hay acierto.
+        """
+        key = self.cache_key
+        cached = self.cache.get(key) if self.cache is not None else None
+        source = "cache"
+        if cached is None and self.store is not None:
+            found = self.store.latest_with_meta(key)
+            source = "store"
+            if found is not None:
+                cached, meta = found
+                self.plan_version = meta["version"]
+                if self.cache is not None:
+                    self.cache.put(key, cached)
+        if cached is not None:
+            self._plan = cached
+            self.from_cache = True
+            self.cache_source = source
+        return cached
+
+    def store_solution(self, plan: CompactPlan, method: str) -> None:
+        """Registra un plan obtenido (aquí o en un proceso del pool) y lo guarda en la caché."""
+        self._plan = plan
+        self.solve_method = method
+        self.from_cache = False
+        self.cache_source = None
+        if self.cache is not None:
+            self.cache.put(self.cache_key, plan)
+        if self.store is not None:
+            try:
+                self.plan_version = self.store.save(self.cache_key, plan, method=method, params=self.to_spec())
+            except OSError as e:
+                # el plan ya está resuelto: no se pierde la respuesta por un fallo de disco
+                logger.warning("No se pudo guardar el plan en el almacén: %s", e)
+
+    @property
+    def plan(self) -> CompactPlan:
+        if self._plan is None:
+            raise ShiftPlannerError("No hay solución. Ejecute build_and_solve() primero.")
+        return self._plan
+
+    @property
+    def _solution(self) -> Optional[Dict[str, Dict[int, Dict[str, str]]]]:
+        # vista dict del plan, por compatibilidad con el código que usaba la estructura anidada
+        return self._plan.to_dict() if self._plan is not None else None
+
+    def _make_compact_plan(self, week_codes: List[List[int]]) -> CompactPlan:
+        return self._anchor(
+            CompactPlan.from_week_codes(self.advisors, self.days, list(self.SHIFT_MAP.values()), week_codes)
+        )
+
+    def _anchor(self, plan: CompactPlan) -> CompactPlan:
+        """Ancla el plan a start_date (festivos y domingos sin turno); sin start_date lo deja igual."""
+        if self.start_date is None:
+            return plan
+        try:
+            return plan.anchored(self.start_date, self.holidays)
+        except ValueError as e:
+            raise ShiftPlannerError(str(e))
+
+    @property
+    def uses_fast_path(self) -> bool:
+        """
+        True si el plan se construye con la tabla de permutaciones en vez de CP-SAT.
+
+        La ruta combinatoria cubre todas las restricciones del modelo CP-SAT: AllDifferent
+        por semana (3 asesores x 3 turnos), asesor fijado a Apertura, rotación semanal y
+        semanas previas o congeladas de extend()/replan(); start_date y los festivos se
+        aplican al anclar el plan, igual que tras CP-SAT. Lo único que no cubre es el
+        objetivo de equidad, así que sólo se descarta con balance o con fast_path=False.
+        """
+        return self.fast_path and not self.balance
+
+    def _solve_combinatorial(self, prior: Optional[CompactPlan] = None, freeze_weeks: int = 0) -> CompactPlan:
+        """
+        Construye el plan sin solver: una permutación por semana, encadenadas con la
+        tabla de transiciones cuando hay rotación. Siempre existe una transición válida,
+        así que el resultado es factible por construcción.
+
+        Con un plan previo, sus primeras freeze_weeks semanas se copian tal cual (deben
+        seguir siendo válidas) y en el resto se conserva la permutación previa siempre que
+        cumpla las restricciones vigentes.
+        """
+        pinned = self.advisors.index(self.opening_only_advisor) if self.enforce_opening_only else None
+        prior_perms = self._prior_week_perms(prior)
+
+        week_perms: List[Tuple[int, ...]] = []
+        for w in range(self.weeks):
+            previous = week_perms[-1] if week_perms else None
+            if previous is not None and self.enable_weekly_rotation:
+                options = _ROTATION_TRANSITIONS[(previous, pinned)]
+            else:
+                options = tuple(p for p in _PERMUTATIONS if pinned is None or p[pinned] == 1)
+            wanted = prior_perms[w] if w < len(prior_perms) else None
+            if wanted in options:
+                week_perms.append(wanted)
+            elif w < freeze_weeks:
+                raise ShiftPlannerError(f"La semana publicada {w + 1} no cumple las nuevas restricciones.")
+            elif previous is not None and not self.enable_weekly_rotation and previous in options:
+                week_perms.append(previous)
+            else:
+                week_perms.append(options[0])
+
+        return self._make_compact_plan([[perm[i] for perm in week_perms] for i in range(len(self.advisors))])
+
+    def _prior_week_perms(self, prior: Optional[CompactPlan]) -> List[Tuple[int, ...]]:
+        """Turno semanal por asesor del plan previo, como lista de tuplas por semana."""
+        if prior is None:
+            return []
+        if prior.advisors != tuple(self.advisors):
+            raise ShiftPlannerError("El plan previo tiene otros asesores.")
+        per_advisor = [prior.week_codes(a) for a in range(len(self.advisors))]
+        return [tuple(codes[w] for codes in per_advisor) for w in range(prior.weeks)]
+
+    def extend(self, weeks: int, freeze: bool = True, time_limit_seconds: Optional[int] = 10) -> CompactPlan:
+        """
+        Amplía el horizonte del plan actual hasta `weeks` semanas.
+
+        Las semanas ya planeadas se mantienen fijas (freeze=True) o sólo como sugerencia
+        para el solver (freeze=False). En el modelo compacto se reutiliza el modelo CP-SAT
+        existente y sólo se agregan las variables de las semanas nuevas.
+        """
+        prior = self.plan
+        if weeks <= self.weeks:
+            raise ShiftPlannerError("extend() requiere más semanas que el plan actual.")
+        first_new = self.weeks
+        self.weeks = weeks
+        self._reset_instrumentation()
+
+        if self.uses_fast_path:
+            with self.timer.phase("combinatorial"):
+                plan = self._solve_combinatorial(prior, freeze_weeks=first_new if freeze else 0)
+            method = "combinatorial"
+        else:
+            with self.timer.phase("build"):
+                if self.compact and self._compact_vars and self.model is not None and not self.balance:
+                    self._add_compact_weeks(first_new, weeks)
+                else:
+                    self._make_model()
+                self._apply_prior(prior, freeze_weeks=first_new if freeze else 0)
+            plan = self._run_solver(time_limit_seconds)
+            method = "cp-sat"
+
+        self._record_replan(prior, plan)
+        self.store_solution(plan, method)
+        record_metrics(self.timer, method, self.solver_stats)
+        return plan
+
+    def replan(
+        self,
+        changes: Optional[Dict[str, Any]] = None,
+        freeze_weeks: int = 0,
+        time_limit_seconds: Optional[int] = 10,
+    ) -> CompactPlan:
+        """
+        Vuelve a planear tras cambiar parámetros (weeks, enforce_opening_only,
+        opening_only_advisor, enable_weekly_rotation) partiendo del plan actual.
+
+        Las primeras freeze_weeks semanas (ya publicadas) se mantienen fijas; el resto del
+        plan previo se usa como sugerencia (AddHint) para que el solver cambie lo mínimo.
+        """
+        allowed = {"weeks", "enforce_opening_only", "opening_only_advisor", "enable_weekly_rotation"}
+        changes = dict(changes or {})
+        unknown = set(changes) - allowed
+        if unknown:
+            raise ShiftPlannerError(f"Parámetros no soportados en replan: {sorted(unknown)}")
+
+        prior = self.plan
+        for name, value in changes.items():
+            setattr(self, name, value)
+        if self.weeks < 1:
+            raise ShiftPlannerError("weeks debe ser >= 1")
+        if self.enforce_opening_only and self.opening_only_advisor not in self.advisors:
+            raise ShiftPlannerError("opening_only_advisor no está en la lista de advisors.")
+        freeze_weeks = min(freeze_weeks, prior.weeks, self.weeks)
+        self._reset_instrumentation()
+
+        if self.uses_fast_path:
+            with self.timer.phase("combinatorial"):
+                plan = self._solve_combinatorial(prior, freeze_weeks=freeze_weeks)
+            method = "combinatorial"
+        else:
+            # las restricciones cambiaron: se reconstruye el modelo y se siembra con el plan previo
+            with self.timer.phase("build"):
+                self._make_model()
+                self._apply_prior(prior, freeze_weeks=freeze_weeks)
+            plan = self._run_solver(time_limit_seconds)
+            method = "cp-sat"
+
+        self._record_replan(prior, plan)
+        self.store_solution(plan, method)
+        record_metrics(self.timer, method, self.solver_stats)
+        return plan
+
+    def iter_improving_plans(self, time_limit_seconds: Optional[int] = 10) -> Iterator[Dict[str, Any]]:
+        """
+        Resuelve con el objetivo de equidad (requiere balance=True) y produce cada solución que
+        lo mejora, a medida que CP-SAT la encuentra: {"plan", "objective", "bound", "seconds",
+        "final"}. El último evento tiene final=True y su plan queda registrado como con
+        solve_plan (caché y almacén). Un acierto de caché produce un único evento final.
+        Si el consumidor deja de iterar, la búsqueda se detiene y no se registra nada.
+        """
+        if not self.balance:
+            raise ShiftPlannerError("iter_improving_plans requiere balance=True.")
+        self._reset_instrumentation()
+        with self.timer.phase("cache"):
+            cached = self.load_cached()
+        if cached is not None:
+            record_metrics(self.timer, self.cache_source)
+            objective = self.max_load(cached)
+            yield {"plan": cached, "objective": objective, "bound": objective, "seconds": 0.0, "final": True}
+            return
+
+        with self.timer.phase("build"):
+            self._make_model()
+        found: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        collector = _ImprovementCollector(self, found.put)
+        outcome: Dict[str, Any] = {}
+
+        def run() -> None:
+            try:
+                outcome["plan"] = self._run_solver(time_limit_seconds, collector)
+            except BaseException as e:  # se relanza en el hilo que consume
+                outcome["error"] = e
+            finally:
+                found.put(None)
+
+        thread = Thread(target=run, name="plan-improvements", daemon=True)
+        thread.start()
+        try:
+            while True:
+                event = found.get()
+                if event is None:
+                    break
+                yield dict(event, final=False)
+        finally:
+            collector.cancelled = True
+            collector.StopSearch()
+            thread.join()
+        if "error" in outcome:
+            raise outcome["error"]
+        plan = outcome["plan"]
+        self.store_solution(plan, "cp-sat")
+        record_metrics(self.timer, "cp-sat", self.solver_stats)
+        yield {
+            "plan": plan,
+            "objective": self.solver_stats["objective"],
+            "bound": self.solver_stats["best_bound"],
+            "seconds": round(self.solver_stats["wall_time"], 4),
+            "final": True,
+        }
+
+    def iter_alternatives(self, k: int = 5, time_limit_seconds: Optional[int] = 10) -> Iterator[CompactPlan]:
+        """
+        Produce hasta k planes factibles distintos de un solo modelo, a medida que CP-SAT los
+        encuentra (enumeración de soluciones sobre el modelo compacto, 1 hilo y semilla fija:
+        el orden es estable entre llamadas, lo que permite paginar).
+
+        Los planes repetidos (mismo content_hash tras anclar al calendario) se descartan.
+        Si el consumidor deja de iterar, la búsqueda se detiene. Las alternativas no se
+        guardan en la caché ni en el almacén de planes.
+        """
+        if not 1 <= k <= MAX_ALTERNATIVES:
+            raise ShiftPlannerError(f"k debe estar entre 1 y {MAX_ALTERNATIVES}.")
+        self._reset_instrumentation()
+        with self.timer.phase("build"):
+            self._make_compact_model()
+        found: "queue.Queue[Optional[CompactPlan]]" = queue.Queue()
+        collector = _AlternativesCollector(self, k, found.put)
+        solver = cp_model.CpSolver()
+        self.solver = solver
+        errors: List[BaseException] = []
+
+        def run() -> None:
+            try:
+                with self.policy.allocate(len(self.vars), time_limit_seconds, 1) as decision:
+                    solver.parameters.max_time_in_seconds = decision["time_limit"]
+                    solver.parameters.num_search_workers = 1
+                    solver.parameters.enumerate_all_solutions = True
+                    solver.parameters.random_seed = DETERMINISTIC_SEED
+                    with self.timer.phase("solve"):
+                        status = solver.Solve(self.model, collector)
+                self.solver_stats = {
+                    "status": solver.StatusName(status),
+                    "wall_time": solver.WallTime(),
+                    "branches": solver.NumBranches(),
+                    "conflicts": solver.NumConflicts(),
+                    "workers": 1,
+                    "policy": decision,
+                    "alternatives": collector.count,
+                }
+            except BaseException as e:  # se relanza en el hilo que consume
+                errors.append(e)
+            finally:
+                found.put(None)
+
+        thread = Thread(target=run, name="plan-alternatives", daemon=True)
+        thread.start()
+        try:
+            while True:
+                plan = found.get()
+                if plan is None:
+                    break
+                yield plan
+        finally:
+            collector.cancelled = True
+            collector.StopSearch()
+            thread.join()
+        if errors:
+            raise errors[0]
+        record_metrics(self.timer, "alternatives", self.solver_stats)
+        if not collector.count:
+            raise ShiftPlannerError(f"No se encontró solución. Estado del solver: {self.solver_stats['status']}")
+
+    def _weekly_vars(self, advisor: str, w: int) -> List[cp_model.IntVar]:
+        if self._compact_vars:
+            return [self.vars[(advisor, w)]]
+        return [self.vars[(advisor, w, day)] for day in self.days]
+
+    def _apply_prior(self, prior: CompactPlan, freeze_weeks: int) -> None:
+        """Fija las primeras freeze_weeks semanas del plan previo y sugiere (hint) el resto."""
+        self.model.ClearHints()
+        for a, advisor in enumerate(self.advisors):
+            for w, code in enumerate(prior.week_codes(a)[:self.weeks]):
+                if code == 0:
+                    # semana completa sin turno (festivos): no aporta nada que conservar
+                    continue
+                for var in self._weekly_vars(advisor, w):
+                    if w < freeze_weeks:
+                        self.model.Add(var == code)
+                    else:
+                        self.model.AddHint(var, code)
+
+    def _record_replan(self, prior: CompactPlan, plan: CompactPlan) -> None:
+        """Guarda en self.replan_report cuánto del plan previo se conservó."""
+        overlap = min(prior.weeks, plan.weeks)
+        total = kept = 0
+        for a in range(len(self.advisors)):
+            before, after = prior.week_codes(a)[:overlap], plan.week_codes(a)[:overlap]
+            total += overlap
+            kept += sum(1 for x, y in zip(before, after) if x == y)
+        self.replan_report = {
+            "prior_weeks": prior.weeks,
+            "weeks": plan.weeks,
+            "compared_assignments": total,
+            "kept_assignments": kept,
+            "kept_ratio": round(kept / total, 4) if total else 1.0,
+        }
+
+    def _solve_cp_sat(self, time_limit_seconds: Optional[int]) -> CompactPlan:
+        with self.timer.phase("build"):
+            self._make_model()
+        return self._run_solver(time_limit_seconds)
+
+    def _run_solver(
+        self,
+        time_limit_seconds: Optional[int],
+        callback: Optional[cp_model.CpSolverSolutionCallback] = None,
+    ) -> CompactPlan:
+        self.solver = cp_model.CpSolver()
+        with self.policy.allocate(len(self.vars), time_limit_seconds, self.num_search_workers) as decision:
+            self.solver.parameters.max_time_in_seconds = decision["time_limit"]
+            self.solver.parameters.num_search_workers = decision["workers"]
+            if self.deterministic:
+                # con varios hilos gana el primero que encuentra solución; intercalados
+                # sobre la misma semilla el resultado ya no depende de la planificación del SO
+                self.solver.parameters.random_seed = DETERMINISTIC_SEED
+                self.solver.parameters.interleave_search = decision["workers"] > 1
+            if self.balance:
+                self.solver.parameters.relative_gap_limit = self.fairness_gap
+            with self.timer.phase("solve"):
+                status = self.solver.Solve(self.model, callback)
+        self.solver_stats = {
+            "status": self.solver.StatusName(status),
+            "wall_time": self.solver.WallTime(),
+            "branches": self.solver.NumBranches(),
+            "conflicts": self.solver.NumConflicts(),
+            "workers": decision["workers"],
+            "policy": decision,
+        }
+        if self.balance and status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.solver_stats["objective"] = int(self.solver.ObjectiveValue())
+            self.solver_stats["best_bound"] = int(self.solver.BestObjectiveBound())
         if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            record_metrics(self.timer, "cp-sat", self.solver_stats)
             raise ShiftPlannerError(f"No se encontró solución. Estado del solver: {status}")
 
+        with self.timer.phase("extract"):
+            return self._extract_plan()
+
+    def _plan_from(self, value) -> CompactPlan:
+        """Plan a partir de los valores de una solución (solver.Value o el Value de un callback)."""
+        return self._make_compact_plan([
+            [int(value(self._weekly_vars(advisor, w)[0])) for w in range(self.weeks)]
+            for advisor in self.advisors
+        ])
+
+    def _extract_plan(self) -> CompactPlan:
         # Extraer la solución
+        if self._compact_vars:
+            return self._make_compact_plan([
+                [int(self.solver.Value(self.vars[(advisor, w)])) for w in range(self.weeks)]
+                for advisor in self.advisors
+            ])
         sol: Dict[str, Dict[int, Dict[str, str]]] = {}
         for advisor in self.advisors:
             sol[advisor] = {}
@@ -148,33 +874,20 @@ class ShiftPlanner:
                 for day in self.days:
                     val = int(self.solver.Value(self.vars[(advisor, w, day)]))
                     sol[advisor][w][day] = self.SHIFT_MAP[val]
-        self._solution = sol
-        return sol
+        return self._anchor(CompactPlan.from_solution(sol, self.days, list(self.SHIFT_MAP.values())))
 
     def solution_to_dataframe(self) -> pd.DataFrame:
         """
         Convierte la solución almacenada a un DataFrame compacto:
         columnas: Asesor, Semana, Día, Turno
         """
-        if self._solution is None:
-            raise ShiftPlannerError("No hay solución. Ejecute build_and_solve() primero.")
-
-        rows: List[Dict[str, Any]] = []
-        for advisor, weeks_dict in self._solution.items():
-            for w, days_dict in weeks_dict.items():
-                for day, shift in days_dict.items():
-                    rows.append({"Asesor": advisor, "Semana": w + 1, "Día": day, "Turno": shift})
-        df = pd.DataFrame(rows)
-        # Orden lógico
-        df = df[["Asesor", "Semana", "Día", "Turno"]]
-        return df
+        return self.plan.to_dataframe()
 
     def solution_to_json(self) -> List[Dict[str, Any]]:
         """
-        Devuelve la solución como lista de dicts (apto para JSON)
+        Devuelve la solución como lista de dicts (apto para JSON), sin pasar por pandas
         """
-        df = self.solution_to_dataframe()
-        return df.to_dict(orient="records")
+        return self.plan.records()
 
     # Helpers de validación (útiles en tests)
     @staticmethod
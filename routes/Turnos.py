@@ -1,5 +1,5 @@
 from flask import Blueprint, request, redirect, url_for, render_template, session, jsonify
-from datetime import datetime
+from datetime import date, datetime
 from usuarios import usuarios
 import sessions
 
@@ -52,9 +52,10 @@ def ver_turnos_table():
         temp_id=temp_id
     )
 
-@Dashboard.route("/hora_inicio_trabajo", methods=["POST"])
-def hora_inicio_trabajo():
-    # resolver id usando el formulario
+def _registrar_marca(kind, mensaje_ok):
+    """Anexa una marca de jornada al registro persistente y muestra el resultado."""
+    from time_log import TimeLogError, get_time_log, sync_usuario
+
     user_id = resolver_user_id(request.form)
     temp_id = request.form.get("temp_id", "") or session.get('temp_id', "")
 
@@ -63,104 +64,333 @@ def hora_inicio_trabajo():
 
     usuario = usuarios[user_id]
 
-    if usuario.get("hora_inicio"):
+    try:
+        estado = get_time_log().append(user_id, kind)
+    except TimeLogError as e:
         return render_template(
             "VerTurnosTable.html",
             usuario=usuario,
             user_id=user_id,
             temp_id=temp_id,
-            mensaje="⚠️ Hora de inicio ya registrada",
+            mensaje=str(e),
             error=True
         )
 
-    # Registrar hora de inicio
-    usuario["hora_inicio"] = datetime.now()
-    usuario["hora_inicio_str"] = usuario["hora_inicio"].strftime("%H:%M:%S")
-    
+    sync_usuario(usuario, estado)
     return render_template(
         "VerTurnosTable.html",
         usuario=usuario,
         user_id=user_id,
         temp_id=temp_id,
-        mensaje=f"✓ Hora de inicio registrada: {usuario['hora_inicio_str']}",
+        mensaje=mensaje_ok(usuario, estado),
         error=False
     )
 
+@Dashboard.route("/hora_inicio_trabajo", methods=["POST"])
+def hora_inicio_trabajo():
+    return _registrar_marca(
+        "inicio", lambda usuario, estado: f"✓ Hora de inicio registrada: {usuario['hora_inicio_str']}"
+    )
+
 @Dashboard.route("/hora_fin_trabajo", methods=["POST"])
 def hora_fin_trabajo():
-    user_id = resolver_user_id(request.form)
-    temp_id = request.form.get("temp_id", "") or session.get('temp_id', "")
+    return _registrar_marca(
+        "fin", lambda usuario, estado: f"✓ Hora de fin registrada. Trabajaste {estado['horas']} horas"
+    )
 
-    if not user_id or user_id not in usuarios:
-        return redirect(url_for("inicio.login_page"))
+@Dashboard.route("/reiniciar_jornada", methods=["POST"])
+def reiniciar_jornada():
+    """Reiniciar jornada para permitir nuevo registro"""
+    return _registrar_marca(
+        "reinicio", lambda usuario, estado: "✓ Jornada reiniciada. Puedes registrar nueva hora de inicio"
+    )
 
-    usuario = usuarios[user_id]
+# máximo de marcas por petición de /api/marcas
+MAX_BULK_EVENTS = 10000
 
-    if not usuario.get("hora_inicio"):
-        return render_template(
-            "VerTurnosTable.html",
-            usuario=usuario,
-            user_id=user_id,
-            temp_id=temp_id,
-            mensaje="⚠️ Primero registre la hora de inicio",
-            error=True
-        )
+def _parse_marca(raw):
+    """Valida la forma de una marca del lote. Devuelve (user_id, tipo, ts) o lanza ValueError."""
+    from time_log import KINDS
 
-    if usuario.get("hora_fin"):
-        return render_template(
-            "VerTurnosTable.html",
-            usuario=usuario,
-            user_id=user_id,
-            temp_id=temp_id,
-            mensaje="⚠️ Hora de fin ya registrada",
-            error=True
+    if not isinstance(raw, dict):
+        raise ValueError("La marca debe ser un objeto")
+    try:
+        user_id = int(raw.get("user_id"))
+    except (TypeError, ValueError):
+        raise ValueError("user_id inválido")
+    if user_id not in usuarios:
+        raise ValueError(f"Usuario desconocido: {user_id}")
+    tipo = raw.get("tipo")
+    if tipo not in KINDS:
+        raise ValueError(f"tipo debe ser uno de: {', '.join(KINDS)}")
+    try:
+        ts = datetime.fromisoformat(str(raw.get("ts")))
+    except ValueError:
+        raise ValueError("ts debe ser una fecha-hora ISO 8601")
+    if ts.tzinfo is not None:
+        # el registro guarda hora local sin zona, como las marcas de los formularios
+        ts = ts.astimezone().replace(tzinfo=None)
+    return user_id, tipo, ts
+
+@Dashboard.route("/api/marcas", methods=["POST"])
+def registrar_marcas():
+    """
+    Registro masivo de marcas de jornada (kioscos que sincronizan una tienda).
+
+    Cuerpo JSON: {"eventos": [{"user_id": 1, "tipo": "inicio"|"fin"|"reinicio", "ts": "2026-01-05T08:00:00"}, ...]}
+    Las marcas se validan en una pasada contra el estado de cada asesor y se aplican de
+    forma atómica: o se registran todas (200) o ninguna (409). La respuesta trae un
+    resultado por marca, en el orden recibido.
+    """
+    from time_log import get_time_log, sync_usuario
+
+    payload = request.get_json(silent=True) or {}
+    raw_events = payload.get("eventos")
+    if not isinstance(raw_events, list) or not raw_events:
+        return jsonify({"status": "error", "message": "Se requiere una lista 'eventos' no vacía"}), 400
+    if len(raw_events) > MAX_BULK_EVENTS:
+        return jsonify({"status": "error", "message": f"Máximo {MAX_BULK_EVENTS} eventos por petición"}), 413
+
+    events, positions = [], []
+    results = [None] * len(raw_events)
+    for i, raw in enumerate(raw_events):
+        try:
+            events.append(_parse_marca(raw))
+            positions.append(i)
+        except ValueError as e:
+            results[i] = {"status": "error", "message": str(e)}
+    malformed = len(events) < len(raw_events)
+
+    try:
+        log = get_time_log()
+        applied, event_results = log.append_many(events, commit=not malformed)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    for i, result in zip(positions, event_results):
+        results[i] = result
+    if applied:
+        for user_id in {uid for uid, _, _ in events}:
+            sync_usuario(usuarios[user_id], log.state(user_id))
+
+    errors = sum(1 for r in results if r["status"] == "error")
+    body = {
+        "status": "ok" if applied else "error",
+        "applied": applied,
+        "total": len(results),
+        "errors": errors,
+        "results": [dict(r, index=i) for i, r in enumerate(results)],
+    }
+    return jsonify(body), 200 if applied else 409
+
+def _parse_advisor_map(raw):
+    """
+    Asignación user_id -> asesor del plan: el campo "asesor" de cada usuario, sobrescrito
+    por el parámetro "user_id:asesor,..." si se envía. Lanza ValueError si no es válido.
+    """
+    mapping = {uid: data["asesor"] for uid, data in usuarios.items() if data.get("asesor")}
+    for part in (raw or "").split(","):
+        if not part.strip():
+            continue
+        uid_raw, sep, name = part.partition(":")
+        try:
+            uid = int(uid_raw)
+        except ValueError:
+            uid = None
+        if not sep or uid is None or not name.strip():
+            raise ValueError("asesores debe tener la forma user_id:asesor separados por comas")
+        if uid not in usuarios:
+            raise ValueError(f"Usuario desconocido: {uid}")
+        mapping[uid] = name.strip()
+    return mapping
+
+@Dashboard.route("/api/reportes/horas", methods=["GET"])
+def reporte_horas():
+    """
+    Horas trabajadas por asesor x semana x turno y resumen semanal con horas extra.
+    Parámetros GET:
+        - desde, hasta (YYYY-MM-DD, opcionales): semanas a incluir
+        - plan_start (YYYY-MM-DD, opcional): lunes de la primera semana del plan; si se
+          envía se cruza con el plan (parámetros de /plan) y se calcula la adherencia.
+          Si el plan no está en la caché se resuelve en la cola de trabajos (202 / 429
+          como /plan).
+        - asesores (opcional, con plan_start): qué asesor del plan es cada usuario, como
+          "user_id:asesor" separados por comas; por defecto el campo "asesor" del usuario.
+          Los usuarios sin asesor no tienen adherencia; si ninguno lo tiene no se cruza el plan.
+    """
+    from datetime import date
+    from hours_report import frame_records, get_hours_report
+    from time_log import get_time_log
+
+    try:
+        desde = date.fromisoformat(request.args["desde"]) if request.args.get("desde") else None
+        hasta = date.fromisoformat(request.args["hasta"]) if request.args.get("hasta") else None
+        plan_start = date.fromisoformat(request.args["plan_start"]) if request.args.get("plan_start") else None
+    except ValueError:
+        return jsonify({"status": "error", "message": "Fechas en formato YYYY-MM-DD"}), 400
+
+    try:
+        advisor_for_user = _parse_advisor_map(request.args.get("asesores")) if plan_start else {}
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    try:
+        plan = None
+        if advisor_for_user:
+            result, response = _solve_queued(_parse_plan_params(request.args))
+            if response is not None:
+                return response
+            plan = result["plan"]
+            unknown = sorted(set(advisor_for_user.values()) - set(plan.advisors))
+            if unknown:
+                return jsonify({"status": "error", "message": f"Asesores que no están en el plan: {unknown}"}), 400
+
+        report = get_hours_report(get_time_log())
+        frames = report.report(
+            plan=plan, plan_start=plan_start if plan is not None else None,
+            advisor_for_user=advisor_for_user if plan is not None else None, desde=desde, hasta=hasta
         )
+        body = {
+            "status": "ok",
+            "limite_horas_semana": report.weekly_hours_limit,
+            "detalle": frame_records(frames["detalle"]),
+            "semanal": frame_records(frames["semanal"]),
+            "cache": report.cache_stats,
+        }
+        if plan is not None:
+            body["asesores"] = {str(uid): name for uid, name in advisor_for_user.items()}
+        elif plan_start:
+            body["message"] = "Sin asignación usuario -> asesor (parámetro asesores): se omite la adherencia"
+        return jsonify(body), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
 
-    # Registrar hora de fin
-    usuario["hora_fin"] = datetime.now()
-    usuario["hora_fin_str"] = usuario["hora_fin"].strftime("%H:%M:%S")
-    
-    # Calcular horas trabajadas
-    delta = usuario["hora_fin"] - usuario["hora_inicio"]
-    horas_trabajadas = round(delta.total_seconds() / 3600, 2)
-    usuario["horas_trabajadas"] = usuario.get("horas_trabajadas", 0.0) + horas_trabajadas
+# Endpoint de API para planificación
+def _parse_bool_param(value, default=False):
+    if value is None:
+        return default
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "on")
 
-    return render_template(
-        "VerTurnosTable.html",
-        usuario=usuario,
-        user_id=user_id,
-        temp_id=temp_id,
-        mensaje=f"✓ Hora de fin registrada. Trabajaste {horas_trabajadas} horas",
-        error=False
-    )
+def _parse_calendar_params(args):
+    """start_date y holidays (YYYY-MM-DD; holidays como lista o separados por comas)."""
+    from planning_model import ShiftPlannerError
 
-@Dashboard.route("/reiniciar_jornada", methods=["POST"])
-def reiniciar_jornada():
-    """Reiniciar jornada para permitir nuevo registro"""
-    user_id = resolver_user_id(request.form)
-    temp_id = request.form.get("temp_id", "") or session.get('temp_id', "")
+    try:
+        start_date = date.fromisoformat(args["start_date"]) if args.get("start_date") else None
+        raw_holidays = args.get("holidays") or ""
+        if isinstance(raw_holidays, str):
+            raw_holidays = raw_holidays.split(",")
+        holidays = sorted({date.fromisoformat(h.strip()) for h in raw_holidays if h.strip()})
+    except (TypeError, ValueError):
+        raise ShiftPlannerError("start_date y holidays deben ser fechas YYYY-MM-DD (holidays separados por comas).")
+    return start_date, holidays
+
+def _parse_plan_params(args):
+    """
+    Normaliza los parámetros de planeación compartidos por /plan y /export/turnos_csv,
+    de modo que peticiones equivalentes produzcan la misma clave de caché.
+    """
+    from planning_model import ShiftPlannerError
 
-    if not user_id or user_id not in usuarios:
-        return redirect(url_for("inicio.login_page"))
+    weeks_raw = args.get("weeks", "4")
+    try:
+        weeks = int(weeks_raw)
+    except ValueError:
+        raise ShiftPlannerError("Parámetro 'weeks' debe ser un entero.")
 
-    usuario = usuarios[user_id]
-    
-    # Limpiar horas de inicio y fin
-    usuario.pop("hora_inicio", None)
-    usuario.pop("hora_fin", None)
-    usuario.pop("hora_inicio_str", None)
-    usuario.pop("hora_fin_str", None)
+    start_date, holidays = _parse_calendar_params(args)
 
-    return render_template(
-        "VerTurnosTable.html",
-        usuario=usuario,
-        user_id=user_id,
-        temp_id=temp_id,
-        mensaje="✓ Jornada reiniciada. Puedes registrar nueva hora de inicio",
-        error=False
+    time_limit_raw = args.get("time_limit", "10")
+    try:
+        time_limit = int(time_limit_raw)
+    except ValueError:
+        time_limit = 10
+
+    try:
+        fairness_gap = float(args.get("gap") or 0.0)
+    except (TypeError, ValueError):
+        raise ShiftPlannerError("Parámetro 'gap' debe ser un número en [0, 1).")
+
+    return {
+        "weeks": weeks,
+        "enforce_opening_only": _parse_bool_param(args.get("opening_only", "false")),
+        "opening_only_advisor": (args.get("opening_advisor") or "").strip() or None,
+        "enable_weekly_rotation": _parse_bool_param(args.get("rotation", "true")),
+        "time_limit": time_limit,
+        "start_date": start_date,
+        "holidays": holidays,
+        "balance": _parse_bool_param(args.get("balance", "false")),
+        "fairness_gap": fairness_gap,
+    }
+
+def _build_planner(params):
+    from planning_model import ShiftPlanner
+
+    return ShiftPlanner(
+        weeks=params["weeks"],
+        enforce_opening_only=params["enforce_opening_only"],
+        opening_only_advisor=params["opening_only_advisor"],
+        enable_weekly_rotation=params["enable_weekly_rotation"],
+        start_date=params.get("start_date"),
+        holidays=params.get("holidays"),
+        balance=params.get("balance", False),
+        fairness_gap=params.get("fairness_gap", 0.0),
     )
 
-# Endpoint de API para planificación
+def _parse_version(args):
+    """Parámetro version (entero >= 1) o None si no se pidió una versión guardada."""
+    from planning_model import ShiftPlannerError
+
+    raw = str(args.get("version") or "").strip()
+    if not raw:
+        return None
+    try:
+        version = int(raw)
+    except ValueError:
+        version = 0
+    if version < 1:
+        raise ShiftPlannerError("Parámetro 'version' debe ser un entero >= 1.")
+    return version
+
+def _load_version(planner, version):
+    """Versión guardada del plan en el almacén (plan_store). LookupError si no existe."""
+    if planner.store is None:
+        raise LookupError("No hay almacén de planes configurado (PLAN_STORE_DIR).")
+    plan = planner.store.load(planner.cache_key, version)
+    if plan is None:
+        raise LookupError(f"No existe la versión {version} de este plan.")
+    planner.plan_version = version
+    return plan
+
+def _solve_queued(params, want_stats=False):
+    """
+    Plan para los parámetros de /plan: de la caché o del almacén si ya existe; si no, se
+    resuelve en la cola de trabajos (límite de pendientes y tope de time_limit).
+    Devuelve (resultado, None) con resultado {"plan", "cached", "stats", "version"}, o
+    (None, respuesta) con 429 si la cola está llena, 202 si el trabajo no terminó a tiempo
+    o 500 si falló.
+    """
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+    from plan_jobs import QueueFullError, plan_jobs
+
+    planner = _build_planner(params)
+    with planner.timer.phase("cache"):
+        plan = planner.load_cached()
+    if plan is not None:
+        return {"plan": plan, "cached": True, "stats": planner.stats if want_stats else None,
+                "version": planner.plan_version}, None
+    try:
+        job = plan_jobs.submit(params)
+    except QueueFullError as e:
+        return None, _queue_full_response(e)
+    try:
+        plan_jobs.wait(job, timeout=job.params["time_limit"] + 5)
+    except FutureTimeoutError:
+        return None, _job_accepted_response(job)
+    if job.status != "done":
+        return None, (jsonify({"status": "error", "message": job.error or job.status}), 500)
+    return dict(job.result, stats=job.result["stats"] if want_stats else None), None
+
 @Dashboard.route("/plan", methods=["GET"])
 def plan():
     """
@@ -170,45 +400,426 @@ def plan():
         - opening_only (true|false)
         - opening_advisor (string, nombre exacto)
         - rotation (true|false)
-        - time_limit (int, segundos, por defecto 10)
+        - start_date (YYYY-MM-DD, opcional): ancla el plan al calendario
+        - holidays (YYYY-MM-DD separados por comas, requiere start_date): días sin turno
+        - balance (true|false): optimizar la equidad de turnos entre asesores (min-max)
+        - gap (float en [0, 1), con balance): brecha relativa para detener la optimización
+        - time_limit (int, segundos, por defecto 10; acotado por la cola de trabajos)
+        - stats (true|false): incluir tiempos por fase y estadísticas del solver
+        - version (int, opcional): versión guardada en el almacén de planes (ver /plan/versions)
+    Los planes resueltos se guardan en la caché compartida (plan_cache) y, si PLAN_STORE_DIR
+    está configurado, en el almacén persistente (plan_store): los planes ya guardados se
+    sirven sin pasar por la cola ni por CP-SAT, también tras reiniciar el proceso.
+    La resolución corre en la cola de trabajos; si no termina a tiempo se responde 202
+    con el id del trabajo para consultarlo en /plan/jobs/<id>.
     """
+    from planning_model import ShiftPlannerError
+
+    want_stats = _parse_bool_param(request.args.get("stats"))
     try:
-        from planning_model import ShiftPlanner, ShiftPlannerError
-        
-        def _parse_bool_param(value, default=False):
-            if value is None:
-                return default
-            return str(value).strip().lower() in ("1", "true", "yes", "y", "on")
-        
-        # Parsear parámetros
-        weeks_raw = request.args.get("weeks", "4")
+        params = _parse_plan_params(request.args)
+        version = _parse_version(request.args)
+    except ShiftPlannerError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    try:
+        if version is not None:
+            plan = _load_version(_build_planner(params), version)
+            return _plan_response(plan, cached=True, version=version)
+        result, response = _solve_queued(params, want_stats)
+    except LookupError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    if response is not None:
+        return response
+    return _plan_response(result["plan"], stats=result["stats"], cached=result["cached"],
+                          version=result["version"])
+
+@Dashboard.route("/plan/stream", methods=["GET"])
+def plan_stream():
+    """
+    Planeación con objetivo de equidad (balance implícito) transmitida por Server-Sent Events:
+    un evento "solution" por cada mejora que encuentra CP-SAT y un evento "done" con el plan
+    final y las estadísticas (o "error"). Acepta los parámetros de /plan.
+    Cada evento trae {"objective": mayor número de semanas de un asesor en un turno,
+    "bound": cota inferior probada, "seconds", "plan": [...]}.
+    """
+    from flask import Response, stream_with_context
+    import json
+
+    try:
+        params = dict(_parse_plan_params(request.args), balance=True)
+        planner = _build_planner(params)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def events():
+        improvements = planner.iter_improving_plans(time_limit_seconds=params["time_limit"])
         try:
-            weeks = int(weeks_raw)
-        except ValueError:
-            raise ShiftPlannerError("Parámetro 'weeks' debe ser un entero.")
+            for found in improvements:
+                data = {k: v for k, v in found.items() if k not in ("plan", "final")}
+                data["plan"] = found["plan"].records()
+                if found["final"]:
+                    data.update(cached=planner.from_cache, loads=planner.shift_loads(found["plan"]),
+                                stats=planner.stats)
+                    yield sse("done", data)
+                else:
+                    yield sse("solution", data)
+        except Exception as e:
+            yield sse("error", {"message": str(e)})
+        finally:
+            improvements.close()
+
+    response = Response(stream_with_context(chunk.encode("utf-8") for chunk in events()),
+                        mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # que un proxy (nginx) no acumule los eventos
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@Dashboard.route("/plan/alternatives", methods=["GET"])
+def plan_alternatives():
+    """
+    Planes alternativos (distintos y factibles) para los parámetros de /plan, obtenidos de una
+    sola resolución por enumeración. Respuesta NDJSON en streaming, una alternativa por línea
+    a medida que se encuentra: {"index", "content_hash", "plan": [...]}; la última línea es
+    {"summary": {"page", "per_page", "returned", "has_more"}}.
+    Parámetros adicionales:
+        - per_page (int, por defecto 5)
+        - page (int, por defecto 1): el orden de enumeración es estable, así que las páginas
+          también lo son; page x per_page no puede superar MAX_ALTERNATIVES
+    """
+    from flask import Response, stream_with_context
+    from planning_model import MAX_ALTERNATIVES
+    import itertools
+    import json
 
-        opening_only = _parse_bool_param(request.args.get("opening_only", "false"))
-        opening_advisor = request.args.get("opening_advisor") or None
-        rotation = _parse_bool_param(request.args.get("rotation", "true"))
-        time_limit_raw = request.args.get("time_limit", "10")
-        
+    try:
+        params = _parse_plan_params(request.args)
+        per_page = int(request.args.get("per_page", 5))
+        page = int(request.args.get("page", 1))
+    except ValueError:
+        return jsonify({"status": "error", "message": "page y per_page deben ser enteros"}), 400
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if per_page < 1 or page < 1:
+        return jsonify({"status": "error", "message": "page y per_page deben ser >= 1"}), 400
+    offset = (page - 1) * per_page
+    if offset + per_page > MAX_ALTERNATIVES:
+        return jsonify({"status": "error", "message": f"Máximo {MAX_ALTERNATIVES} alternativas en total"}), 400
+
+    try:
+        # una de más para saber si hay otra página (sin pasar del tope)
+        limit = min(offset + per_page + 1, MAX_ALTERNATIVES)
+        alternatives = _build_planner(params).iter_alternatives(limit, time_limit_seconds=params["time_limit"])
+        # la primera se busca antes de responder para reportar errores con su código HTTP
+        first = next(alternatives)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+    def lines():
+        returned = 0
+        index = 0
+        has_more = False
         try:
-            time_limit = int(time_limit_raw)
+            for plan in itertools.chain([first], alternatives):
+                index += 1
+                if index <= offset:
+                    continue
+                if returned == per_page:
+                    has_more = True
+                    break
+                returned += 1
+                yield json.dumps({"index": index, "content_hash": plan.content_hash(), "plan": plan.records()},
+                                 ensure_ascii=False) + "\n"
+        finally:
+            alternatives.close()
+        summary = {"page": page, "per_page": per_page, "returned": returned, "has_more": has_more}
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return Response(stream_with_context(line.encode("utf-8") for line in lines()), mimetype="application/x-ndjson")
+
+@Dashboard.route("/plan/versions", methods=["GET"])
+def plan_versions():
+    """
+    Versiones guardadas en el almacén de planes para los parámetros de /plan
+    (número, fecha, método de resolución, sha256 y tamaño). Sólo lee las cabeceras.
+    """
+    try:
+        planner = _build_planner(_parse_plan_params(request.args))
+        if planner.store is None:
+            return jsonify({"status": "error", "message": "No hay almacén de planes configurado (PLAN_STORE_DIR)."}), 404
+        return jsonify({"status": "ok", "versions": planner.store.versions(planner.cache_key)}), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+# por debajo de este tamaño comprimir cuesta más de lo que ahorra
+MIN_COMPRESS_BYTES = 1024
+
+def _plan_etag(plan, *variant):
+    """ETag de una representación del plan: hash del contenido (ver CompactPlan.content_hash) y variante."""
+    return "-".join((plan.content_hash()[:32],) + variant)
+
+def _cache_headers(response, etag):
+    """ETag débil y revalidación obligatoria: el cliente pregunta siempre, el servidor responde 304."""
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+def _not_modified(etag):
+    """Respuesta 304 si If-None-Match ya tiene este ETag; None en otro caso."""
+    from flask import Response
+
+    if request.if_none_match.contains_weak(etag):
+        return _cache_headers(Response(status=304), etag)
+    return None
+
+def _plan_response(plan, stats=None, **extra):
+    """
+    Respuesta {"status": "ok", ..., "plan": [...]} serializada directamente desde el plan compacto.
+    Si se pasan stats se incluyen, con el tiempo de serialización agregado.
+    Con If-None-Match coincidente responde 304 sin serializar; el cuerpo se comprime
+    según Accept-Encoding (gzip / br).
+    """
+    from flask import Response
+    from plan_export import encode_body, negotiate_encoding
+    from planner_metrics import observe_phase
+    import json
+    import time
+
+    etag = _plan_etag(plan)
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+
+    start = time.perf_counter()
+    body = plan.to_json()
+    elapsed = time.perf_counter() - start
+    observe_phase("serialize", elapsed)
+    if stats is not None:
+        stats = dict(stats, timings_ms=dict(stats["timings_ms"], serialize=round(elapsed * 1000, 3)))
+        extra["stats"] = stats
+
+    head = json.dumps({"status": "ok", **extra})[:-1]
+    payload = (head + ', "plan": ' + body + "}").encode("utf-8")
+    encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+    response = Response(status=200, mimetype="application/json")
+    if encoding is not None and len(payload) >= MIN_COMPRESS_BYTES:
+        payload = encode_body(payload, encoding)
+        response.headers["Content-Encoding"] = encoding
+    response.set_data(payload)
+    return _cache_headers(response, etag)
+
+@Dashboard.route("/plan/on_date", methods=["GET"])
+def plan_on_date():
+    """
+    Consultas por fecha sobre un plan anclado al calendario.
+    Además de los parámetros de /plan (start_date obligatorio) acepta:
+        - date (YYYY-MM-DD): quién está en qué turno ese día (O(1))
+        - desde, hasta (YYYY-MM-DD): tramos (desde, hasta, turno) por asesor en el rango
+        - advisor (opcional): limita la consulta a un asesor (O(log n) por consulta)
+        - shift (opcional, con date): sólo los asesores de ese turno (p. ej. Apertura)
+    Si el plan no está en la caché se resuelve en la cola de trabajos (202 / 429 como /plan).
+    """
+    try:
+        params = _parse_plan_params(request.args)
+        if params["start_date"] is None:
+            return jsonify({"status": "error", "message": "Se requiere start_date"}), 400
+        try:
+            day = date.fromisoformat(request.args["date"]) if request.args.get("date") else None
+            desde = date.fromisoformat(request.args["desde"]) if request.args.get("desde") else None
+            hasta = date.fromisoformat(request.args["hasta"]) if request.args.get("hasta") else None
         except ValueError:
-            time_limit = 10
-
-        # Construir planner
-        planner = ShiftPlanner(
-            weeks=weeks,
-            enforce_opening_only=opening_only,
-            opening_only_advisor=opening_advisor,
-            enable_weekly_rotation=rotation,
-        )
+            return jsonify({"status": "error", "message": "Fechas en formato YYYY-MM-DD"}), 400
+        if day is None and (desde is None or hasta is None):
+            return jsonify({"status": "error", "message": "Indique date o desde y hasta"}), 400
+
+        result, response = _solve_queued(params)
+        if response is not None:
+            return response
+        plan = result["plan"]
+        calendar = plan.calendar()
+        advisor = (request.args.get("advisor") or "").strip() or None
+        if advisor is not None and advisor not in plan.advisors:
+            return jsonify({"status": "error", "message": f"Asesor desconocido: {advisor}"}), 404
+
+        body = {"status": "ok", "plan_desde": calendar.first_date.isoformat(), "plan_hasta": calendar.last_date.isoformat()}
+        if day is not None:
+            if advisor is not None:
+                assignments = [(advisor, calendar.shift_of(advisor, day))]
+                assignments = [a for a in assignments if a[1]]
+            else:
+                assignments = calendar.on_date(day)
+            shift = (request.args.get("shift") or "").strip()
+            body["date"] = day.isoformat()
+            body["asignaciones"] = [
+                {"Asesor": a, "Turno": s} for a, s in assignments if not shift or s.lower() == shift.lower()
+            ]
+        else:
+            ranges = {advisor: calendar.intervals(advisor, desde, hasta)} if advisor else calendar.range(desde, hasta)
+            body["tramos"] = [
+                {"Asesor": a, "desde": start.isoformat(), "hasta": end.isoformat(), "Turno": s}
+                for a, intervals in ranges.items()
+                for start, end, s in intervals
+            ]
+        return jsonify(body), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
 
-        sol = planner.build_and_solve(time_limit_seconds=time_limit)
-        payload = planner.solution_to_json()
-        
-        return jsonify({"status": "ok", "plan": payload}), 200
+@Dashboard.route("/metrics", methods=["GET"])
+def metrics():
+    """Métricas de planeación en formato de texto Prometheus"""
+    from flask import Response
+    from planner_metrics import render_prometheus
+
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+def _queue_full_response(error):
+    response = jsonify({"status": "error", "message": str(error)})
+    response.status_code = 429
+    response.headers["Retry-After"] = "5"
+    return response
+
+def _job_accepted_response(job):
+    response = jsonify({"status": "ok", "job": job.to_dict(include_result=False)})
+    response.status_code = 202
+    response.headers["Location"] = url_for("Dashboard.get_plan_job", job_id=job.id)
+    return response
+
+@Dashboard.route("/plan/jobs", methods=["POST"])
+def create_plan_job():
+    """Encola una planeación. Acepta los mismos parámetros que /plan (querystring, formulario o JSON)."""
+    from plan_jobs import QueueFullError, plan_jobs
+
+    try:
+        args = dict(request.values.items())
+        args.update(request.get_json(silent=True) or {})
+        job = plan_jobs.submit(_parse_plan_params(args))
+    except QueueFullError as e:
+        return _queue_full_response(e)
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return _job_accepted_response(job)
+
+@Dashboard.route("/plan/jobs/<job_id>", methods=["GET"])
+def get_plan_job(job_id):
+    """Estado de un trabajo; incluye el plan cuando status == done"""
+    from plan_jobs import plan_jobs
+
+    job = plan_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Trabajo no encontrado"}), 404
+    return jsonify({"status": "ok", "job": job.to_dict()}), 200
+
+@Dashboard.route("/plan/jobs/<job_id>", methods=["DELETE"])
+def cancel_plan_job(job_id):
+    """Cancela un trabajo en cola o en ejecución"""
+    from plan_jobs import plan_jobs
+
+    job = plan_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Trabajo no encontrado"}), 404
+    if not plan_jobs.cancel(job_id):
+        return jsonify({"status": "error", "message": f"El trabajo ya terminó ({job.status})"}), 409
+    return jsonify({"status": "ok", "job": job.to_dict(include_result=False)}), 202
+
+@Dashboard.route("/plan/cache", methods=["GET"])
+def plan_cache_stats():
+    """Contadores de la caché de planes (aciertos, fallos, desalojos), estado de la cola y del solver"""
+    from plan_cache import plan_cache
+    from plan_jobs import plan_jobs
+    from solver_policy import solver_policy
+
+    return jsonify({
+        "status": "ok",
+        "cache": plan_cache.stats(),
+        "jobs": plan_jobs.stats(),
+        "solver": solver_policy.stats(),
+    })
+
+
+# máximo de tiendas por petición de /plan/batch
+MAX_BATCH_STORES = 1000
+
+@Dashboard.route("/plan/batch", methods=["POST"])
+def plan_batch():
+    """
+    Planeación por lotes de varias tiendas, en paralelo, con respuesta NDJSON en streaming.
+    Cuerpo JSON:
+        - stores (lista de specs: store_id, advisors, days, weeks, rotation, holidays,
+          opening_advisor; o shifts/coverage/allowed_shifts para tiendas de N asesores)
+        - cpu_budget (int, opcional): núcleos del pool compartido de lotes que puede ocupar este
+          lote (acotado por BATCH_CPU_BUDGET, que limita a todos los lotes juntos)
+        - time_limit (int, segundos por tienda, por defecto 10)
+    Cada línea es el resultado de una tienda (en orden de finalización); la última es
+    {"summary": ...} con el conteo y el reporte de errores por tienda.
+    """
+    from flask import Response, stream_with_context
+    from batch_planning import default_cpu_budget, iter_ndjson, plan_stores
+
+    body = request.get_json(silent=True) or {}
+    stores = body.get("stores")
+    if not isinstance(stores, list) or not stores:
+        return jsonify({"status": "error", "message": "Se requiere una lista 'stores' no vacía"}), 400
+    if len(stores) > MAX_BATCH_STORES:
+        return jsonify({"status": "error", "message": f"Máximo {MAX_BATCH_STORES} tiendas por petición"}), 413
+    try:
+        # el presupuesto pedido no puede superar el del despliegue (BATCH_CPU_BUDGET)
+        cpu_budget = min(int(body["cpu_budget"]), default_cpu_budget()) if body.get("cpu_budget") else None
+        time_limit = int(body.get("time_limit", 10))
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "cpu_budget y time_limit deben ser enteros"}), 400
+
+    results = plan_stores(stores, cpu_budget=cpu_budget, time_limit_seconds=time_limit)
+    return Response(
+        stream_with_context(chunk.encode("utf-8") for chunk in iter_ndjson(results, cpu_budget=cpu_budget)),
+        mimetype="application/x-ndjson",
+    )
+
+@Dashboard.route("/plan/coverage", methods=["POST"])
+def plan_coverage():
+    """
+    Planeación N asesores x M turnos con coberturas mínimas.
+    Cuerpo JSON (todos opcionales):
+        - advisors (lista; por defecto los usuarios activos con sus restricciones_turno)
+        - shifts (lista de turnos)
+        - coverage ({turno: n} o {turno: {día: n}})
+        - allowed_shifts ({asesor: [turnos]})
+        - weeks (int, por defecto 4)
+        - rotation (bool, por defecto true)
+        - same_shift_all_week (bool, por defecto true)
+        - start_date (YYYY-MM-DD): ancla el plan al calendario
+        - holidays (lista de YYYY-MM-DD, requiere start_date): días sin turno
+        - time_limit (int, segundos, por defecto 10)
+    """
+    try:
+        from coverage_planning import CoveragePlanner
+
+        body = request.get_json(silent=True) or {}
+        start_date, holidays = _parse_calendar_params(body)
+        options = {
+            "start_date": start_date,
+            "holidays": holidays,
+            "shifts": body.get("shifts"),
+            "weeks": int(body.get("weeks", 4)),
+            "coverage": body.get("coverage"),
+            "enable_weekly_rotation": _parse_bool_param(body.get("rotation"), default=True),
+            "same_shift_all_week": _parse_bool_param(body.get("same_shift_all_week"), default=True),
+        }
+        if body.get("advisors"):
+            planner = CoveragePlanner(
+                advisors=body["advisors"], allowed_shifts=body.get("allowed_shifts"), **options
+            )
+        else:
+            planner = CoveragePlanner.from_usuarios(usuarios, **options)
+
+        planner.build_and_solve(time_limit_seconds=int(body.get("time_limit", 10)))
+        return jsonify({"status": "ok", "plan": planner.solution_to_json()}), 200
 
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -263,39 +874,54 @@ def get_mi_info():
 
 @Dashboard.route("/export/turnos_csv", methods=["GET"])
 def export_turnos_csv():
-    """Exportar planificación a CSV"""
+    """
+    Exportar planificación en streaming.
+    Además de los parámetros de /plan acepta:
+        - format (csv|ndjson, por defecto csv)
+        - gzip (true|false, por defecto false)
+        - version (int, opcional): exporta una versión guardada en el almacén de planes
+    Admite If-None-Match (304 sin regenerar el archivo) y Accept-Encoding (gzip / br)
+    cuando no se pide el archivo .gz. Si el plan no está en la caché se resuelve en la cola
+    de trabajos (202 / 429 como /plan).
+    """
     from flask import Response
-    import io
-    
-    # Generar planificación
+    from plan_export import iter_encoded, negotiate_encoding, stream_export
+    from planning_model import ShiftPlannerError
+
     try:
-        from planning_model import ShiftPlanner
-        
-        weeks = int(request.args.get("weeks", "4"))
-        opening_only = request.args.get("opening_only", "false").lower() == "true"
-        opening_advisor = request.args.get("opening_advisor")
-        rotation = request.args.get("rotation", "true").lower() == "true"
-        
-        planner = ShiftPlanner(
-            weeks=weeks,
-            enforce_opening_only=opening_only,
-            opening_only_advisor=opening_advisor,
-            enable_weekly_rotation=rotation,
-        )
+        params = _parse_plan_params(request.args)
+        version = _parse_version(request.args)
+    except ShiftPlannerError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    # Generar planificación (o reutilizar la de la caché / el almacén)
+    try:
+        planner = _build_planner(params)
         
-        planner.build_and_solve(time_limit_seconds=10)
-        df = planner.solution_to_dataframe()
+        if version is not None:
+            plan = _load_version(planner, version)
+        else:
+            result, response = _solve_queued(params)
+            if response is not None:
+                return response
+            plan = result["plan"]
+        fmt = request.args.get("format", "csv").strip().lower()
+        compress = _parse_bool_param(request.args.get("gzip"))
+        etag = _plan_etag(plan, fmt, "gz") if compress else _plan_etag(plan, fmt)
+        not_modified = _not_modified(etag)
+        if not_modified is not None:
+            return not_modified
+        body, mimetype, filename = stream_export(plan, fmt=fmt, compress=compress)
         
-        # Convertir a CSV
-        output = io.StringIO()
-        df.to_csv(output, index=False, encoding='utf-8')
-        output.seek(0)
-        
-        return Response(
-            output.getvalue(),
-            mimetype="text/csv",
-            headers={"Content-Disposition": "attachment;filename=planificacion_turnos.csv"}
-        )
+        headers = {"Content-Disposition": f"attachment;filename={filename}"}
+        # el archivo .gz ya va comprimido: no se vuelve a codificar
+        encoding = None if compress else negotiate_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is not None:
+            body = iter_encoded(body, encoding)
+            headers["Content-Encoding"] = encoding
+        return _cache_headers(Response(body, mimetype=mimetype, headers=headers), etag)
         
+    except LookupError as e:
+        return jsonify({"status": "error", "message": str(e)}), 404
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
\ No newline at end of file
+        return jsonify({"status": "error", "message": str(e)}), 500
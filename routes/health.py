@@ -0,0 +1,14 @@
+from flask import Blueprint, current_app, jsonify
+
+health = Blueprint("health", __name__)
+
+@health.route("/live", methods=["GET"])
+def live():
+    """El proceso responde (no implica que haya terminado el calentamiento)"""
+    return jsonify({"status": "ok"}), 200
+
+@health.route("/ready", methods=["GET"])
+def ready():
+    """503 hasta que termina el arranque (ver startup.py); incluye los tiempos por fase"""
+    state = current_app.extensions["startup"].as_dict()
+    return jsonify({"status": "ok" if state["ready"] else "starting", **state}), 200 if state["ready"] else 503
@@ -1,18 +1,12 @@
 from flask import Blueprint, request, render_template, redirect, url_for
 from usuarios import usuarios
 import sessions
+from user_repository import user_repository
 
 inicio = Blueprint("inicio", __name__)
 
 def verificar_usuario(correo: str, contraseña: str):
-    for uid, usuario in usuarios.items():
-        if (
-            usuario["correo"] == correo
-            and usuario["contraseña"] == contraseña
-            and usuario["activo"]
-        ):
-            return uid
-    return None
+    return user_repository.verify(correo, contraseña)
 
 @inicio.route("/", methods=["GET"])
 def home():
@@ -1,19 +1,222 @@
+import os
+import sqlite3
+import threading
 import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Mapping
 
-# Diccionario privado que mapea temp_id -> user_id
-_usuarios_activos = {}
+
+class MemorySessionStore:
+    """
+    Sesiones en memoria con TTL deslizante y tope de entradas.
+
+    El OrderedDict se mantiene ordenado por expiración (cada acceso mueve la sesión al
+    final), así que expirar es sacar del principio mientras esté vencido: O(1) amortizado,
+    sin recorrer todas las sesiones.
+    """
+
+    def __init__(self, ttl_seconds: float = 8 * 3600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # temp_id -> (user_id, expira_en)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = (None, MappingProxyType({}))
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            _, (_, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+            self._version += 1
+
+    def put(self, temp_id: str, user_id: int) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._entries[temp_id] = (user_id, now + self.ttl_seconds)
+            self._entries.move_to_end(temp_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._version += 1
+
+    def get(self, temp_id: str):
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(temp_id)
+            if entry is None:
+                return None
+            # expiración deslizante
+            self._entries[temp_id] = (entry[0], now + self.ttl_seconds)
+            self._entries.move_to_end(temp_id)
+            return entry[0]
+
+    def delete(self, temp_id: str) -> None:
+        with self._lock:
+            if self._entries.pop(temp_id, None) is not None:
+                self._version += 1
+
+    def snapshot(self) -> Mapping[str, int]:
+        with self._lock:
+            self._expire(time.monotonic())
+            version, view = self._snapshot
+            if version != self._version:
+                view = MappingProxyType({tid: uid for tid, (uid, _) in self._entries.items()})
+                self._snapshot = (self._version, view)
+            return view
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteSessionStore:
+    """
+    Sesiones en SQLite (modo WAL) compartidas entre procesos (p. ej. varios workers de gunicorn).
+
+    La expiración usa el índice sobre expires_at; el tope de entradas se aplica cada
+    cierto número de inserciones para no contar la tabla en cada login.
+
+    Cada alta, baja o purga incrementa un contador de versión guardado en la base (visible
+    para todos los procesos); snapshot() sólo vuelve a leer la tabla cuando cambia o cuando
+    hay sesiones vencidas, igual que MemorySessionStore.
+    """
+
+    PURGE_EVERY = 64
+
+    def __init__(self, path: str, ttl_seconds: float = 8 * 3600, max_entries: int = 10000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._inserts = 0
+        self._snapshot = (None, MappingProxyType({}))
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " temp_id TEXT PRIMARY KEY, user_id INTEGER NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions_version ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)"
+        )
+        conn.execute("INSERT OR IGNORE INTO sessions_version (id, version) VALUES (0, 0)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE sessions_version SET version = version + 1 WHERE id = 0")
+
+    @staticmethod
+    def _version(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT version FROM sessions_version WHERE id = 0").fetchone()[0]
+
+    def _purge(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+        evicted = conn.execute(
+            "DELETE FROM sessions WHERE temp_id IN ("
+            " SELECT temp_id FROM sessions ORDER BY expires_at"
+            " LIMIT max(0, (SELECT COUNT(*) FROM sessions) - ?))",
+            (self.max_entries,),
+        ).rowcount
+        if expired or evicted:
+            self._bump(conn)
+
+    def put(self, temp_id: str, user_id: int) -> None:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (temp_id, user_id, expires_at) VALUES (?, ?, ?)",
+                (temp_id, user_id, now + self.ttl_seconds),
+            )
+            self._bump(conn)
+            self._inserts += 1
+            if self._inserts % self.PURGE_EVERY == 0:
+                self._purge(conn, now)
+
+    def get(self, temp_id: str):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            # UPDATE y SELECT en la misma transacción (UPDATE ... RETURNING requiere SQLite >= 3.35)
+            updated = conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE temp_id = ? AND expires_at > ?",
+                (now + self.ttl_seconds, temp_id, now),
+            ).rowcount
+            if not updated:
+                return None
+            row = conn.execute("SELECT user_id FROM sessions WHERE temp_id = ?", (temp_id,)).fetchone()
+        return row[0] if row else None
+
+    def delete(self, temp_id: str) -> None:
+        conn = self._conn()
+        with conn:
+            if conn.execute("DELETE FROM sessions WHERE temp_id = ?", (temp_id,)).rowcount:
+                self._bump(conn)
+
+    def snapshot(self) -> Mapping[str, int]:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            cached_version, view = self._snapshot
+            expired = conn.execute("SELECT 1 FROM sessions WHERE expires_at <= ? LIMIT 1", (now,)).fetchone()
+            if not expired and self._version(conn) == cached_version:
+                return view
+            # la purga abre la transacción: versión y filas se leen del mismo estado
+            self._purge(conn, now)
+            version = self._version(conn)
+            rows = conn.execute("SELECT temp_id, user_id FROM sessions").fetchall()
+        view = MappingProxyType(dict(rows))
+        self._snapshot = (version, view)
+        return view
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def _store_from_env():
+    ttl = float(os.environ.get("SESSION_TTL", str(8 * 3600)))
+    max_entries = int(os.environ.get("SESSION_MAX_ENTRIES", "10000"))
+    if os.environ.get("SESSION_BACKEND", "memory").lower() == "sqlite":
+        return SQLiteSessionStore(os.environ.get("SESSION_DB_PATH", "sessions.sqlite3"), ttl, max_entries)
+    return MemorySessionStore(ttl, max_entries)
+
+
+# Almacén privado que mapea temp_id -> user_id
+_usuarios_activos = _store_from_env()
+
+def configurar(store) -> None:
+    """Reemplaza el almacén de sesiones (p. ej. SQLiteSessionStore para varios procesos)."""
+    global _usuarios_activos
+    _usuarios_activos = store
 
 def crear_temp_id(user_id: int) -> str:
     temp_id = f"temp_{user_id}_{int(time.time())}"
-    _usuarios_activos[temp_id] = user_id
+    _usuarios_activos.put(temp_id, user_id)
     return temp_id
 
 def obtener_user_id(temp_id: str):
+    if not temp_id:
+        return None
     return _usuarios_activos.get(temp_id)
 
 def borrar_temp_id(temp_id: str):
-    _usuarios_activos.pop(temp_id, None)
+    _usuarios_activos.delete(temp_id)
 
 def obtener_todos():
-    # devolver copia para no exponer el dict interno directamente
-    return dict(_usuarios_activos)
+    # vista de sólo lectura: no expone el almacén interno y no copia en cada llamada
+    return _usuarios_activos.snapshot()
@@ -0,0 +1,139 @@
+# solver_policy.py
+"""
+Política de recursos para CP-SAT: cuántos hilos de búsqueda y cuánto tiempo asignar a
+cada resolución según el tamaño del modelo y las resoluciones concurrentes.
+
+ - modelos pequeños (que se resuelven en presolve) usan 1 hilo y un tiempo corto
+ - el tiempo se reparte entre las resoluciones concurrentes: con n en curso cada nueva
+   recibe 1/(n+1) de su límite (nunca menos de min_time_limit)
+ - num_search_workers pedido explícitamente también se acota a max_workers_per_solve
+ - el total de hilos de solver del proceso se limita a max_threads; si no hay hilos
+   libres la resolución espera a que otra termine
+ - configurable por despliegue con variables de entorno (SOLVER_*)
+ - cada decisión queda registrada para la instrumentación (planner.stats["solver"]["policy"])
+"""
+from contextlib import contextmanager
+from threading import Condition
+from typing import Any, Dict, Iterator, Optional, Tuple
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class SolverResourcePolicy:
+    def __init__(
+        self,
+        max_threads: Optional[int] = None,
+        max_workers_per_solve: int = 8,
+        max_time_limit: float = 30.0,
+        small_model_variables: int = 200,
+        large_model_variables: int = 5000,
+        small_model_time_limit: float = 5.0,
+        min_time_limit: float = 1.0,
+        acquire_timeout: Optional[float] = 60.0,
+    ):
+        """
+        max_threads: hilos de solver simultáneos en el proceso (por defecto os.cpu_count())
+        max_workers_per_solve: tope de num_search_workers para una sola resolución
+        max_time_limit: tope de segundos por resolución
+        small_model_variables / large_model_variables: umbrales de tamaño (número de variables)
+        small_model_time_limit: tope de segundos para modelos pequeños
+        min_time_limit: piso del límite al repartirlo entre resoluciones concurrentes
+        acquire_timeout: espera máxima por hilos libres antes de resolver con 1 hilo igualmente
+        """
+        self.max_threads = max(1, max_threads or os.cpu_count() or 1)
+        self.max_workers_per_solve = max(1, max_workers_per_solve)
+        self.max_time_limit = max_time_limit
+        self.small_model_variables = small_model_variables
+        self.large_model_variables = large_model_variables
+        self.small_model_time_limit = small_model_time_limit
+        self.min_time_limit = min_time_limit
+        self.acquire_timeout = acquire_timeout
+        self._in_use = 0
+        self._active_solves = 0
+        self._cond = Condition()
+
+    def _base_workers(self, num_variables: int) -> Tuple[int, str]:
+        if num_variables <= self.small_model_variables:
+            return 1, "small-model"
+        if num_variables <= self.large_model_variables:
+            return min(4, self.max_workers_per_solve), "medium-model"
+        return self.max_workers_per_solve, "large-model"
+
+    def _time_limit(self, num_variables: int, requested: Optional[float], concurrent_solves: int = 0) -> float:
+        limit = self.max_time_limit
+        if num_variables <= self.small_model_variables:
+            limit = min(limit, self.small_model_time_limit)
+        if requested:
+            limit = min(limit, float(requested))
+        if concurrent_solves:
+            limit = max(min(limit, self.min_time_limit), limit / (concurrent_solves + 1))
+        return limit
+
+    @contextmanager
+    def allocate(
+        self,
+        num_variables: int,
+        requested_time_limit: Optional[float] = None,
+        requested_workers: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Reserva hilos para una resolución y devuelve la decisión:
+        {"workers", "time_limit", "reason", "concurrent_solves", "threads_in_use", "model_variables"}.
+        """
+        if requested_workers:
+            base, reason = max(1, min(requested_workers, self.max_workers_per_solve)), "requested"
+        else:
+            base, reason = self._base_workers(num_variables)
+        base = min(base, self.max_threads)
+
+        with self._cond:
+            if self.max_threads - self._in_use < 1:
+                waited = self._cond.wait_for(lambda: self.max_threads - self._in_use >= 1, timeout=self.acquire_timeout)
+                if not waited:
+                    logger.warning("Sin hilos de solver libres tras %ss; se resuelve con 1 hilo", self.acquire_timeout)
+            available = max(1, self.max_threads - self._in_use)
+            workers = min(base, available)
+            if workers < base:
+                reason += "+throttled"
+            decision = {
+                "workers": workers,
+                "time_limit": self._time_limit(num_variables, requested_time_limit, self._active_solves),
+                "reason": reason,
+                "concurrent_solves": self._active_solves,
+                "threads_in_use": self._in_use,
+                "model_variables": num_variables,
+            }
+            self._in_use += workers
+            self._active_solves += 1
+        try:
+            yield decision
+        finally:
+            with self._cond:
+                self._in_use -= workers
+                self._active_solves -= 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_threads": self.max_threads,
+                "threads_in_use": self._in_use,
+                "active_solves": self._active_solves,
+            }
+
+
+def _env_int(name: str) -> Optional[int]:
+    raw = os.environ.get(name)
+    return int(raw) if raw else None
+
+
+# Política compartida por todos los planners del proceso
+solver_policy = SolverResourcePolicy(
+    max_threads=_env_int("SOLVER_MAX_THREADS"),
+    max_workers_per_solve=_env_int("SOLVER_MAX_WORKERS") or 8,
+    max_time_limit=float(os.environ.get("SOLVER_MAX_TIME_LIMIT", "30")),
+)
+
+# Fin de solver_policy.py
@@ -0,0 +1,175 @@
+# solver_pool.py
+"""
+Pool persistente de procesos resolvedores precalentados.
+
+Cada proceso importa OR-Tools/pandas y resuelve un modelo mínimo al arrancar, de modo
+que la primera petición no paga el coste de importación y las resoluciones CP-SAT
+corren fuera del proceso web (sin retener el GIL ni inflar su memoria).
+
+ - se envían specs serializados del planner (ShiftPlanner.to_spec)
+ - se devuelven resultados compactos: un código de turno por asesor y semana
+ - la ruta combinatoria (3x3) y los aciertos de caché se resuelven en el proceso web
+ - cada proceso limita sus hilos de CP-SAT a su parte de SOLVER_MAX_THREADS (o de los
+   núcleos): procesos x hilos por proceso no supera el presupuesto de la política
+ - una resolución que ya corre en un proceso no se puede detener desde el proceso web:
+   cancelar el trabajo (plan_jobs) sólo descarta su resultado al terminar
+ - si un proceso muere (memoria, fallo nativo de OR-Tools) el pool se descarta y la
+   resolución se reintenta una vez en uno nuevo; la espera del resultado se acota a
+   time_limit + RESULT_MARGIN_SECONDS para que un proceso colgado no retenga la petición
+ - se activa con PLANNER_POOL_PROCESSES > 0
+"""
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Any, Dict, List, Optional
+import logging
+import multiprocessing
+import os
+
+from plan_result import CompactPlan
+
+logger = logging.getLogger(__name__)
+
+# margen (segundos) sobre time_limit para esperar un resultado: arranque de un proceso
+# nuevo, cola detrás de otras resoluciones y serialización
+RESULT_MARGIN_SECONDS = float(os.environ.get("PLANNER_POOL_RESULT_MARGIN", "30"))
+
+
+def _warm_up(threads: int) -> None:
+    """
+    Inicializador de cada proceso: limita los hilos de CP-SAT a su parte del presupuesto,
+    importa el planner y resuelve un modelo trivial.
+    """
+    from planning_model import ShiftPlanner
+    from solver_policy import solver_policy
+
+    solver_policy.max_threads = threads
+    solver_policy.max_workers_per_solve = min(solver_policy.max_workers_per_solve, threads)
+
+    ShiftPlanner(weeks=1, cache=None, store=None, fast_path=False).build_and_solve(time_limit_seconds=5)
+    logger.info("Proceso resolvedor %s precalentado", os.getpid())
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _solve_spec(spec: Dict[str, Any], time_limit_seconds: Optional[int]) -> Dict[str, Any]:
+    """Resuelve un spec en el proceso del pool y devuelve el resultado compacto."""
+    from planning_model import ShiftPlanner
+
+    planner = ShiftPlanner.from_spec(spec, cache=None, store=None)
+    plan = planner.solve_plan(time_limit_seconds=time_limit_seconds)
+    return {
+        "solve_method": planner.solve_method,
+        "timings": dict(planner.timer.timings),
+        "solver": planner.solver_stats,
+        # el turno es el mismo toda la semana: basta un código por (asesor, semana)
+        "shifts": [plan.week_codes(a) for a in range(len(planner.advisors))],
+    }
+
+
+def decode_result(planner, result: Dict[str, Any]) -> CompactPlan:
+    """Reconstruye el plan compacto a partir del resultado del pool."""
+    return planner._make_compact_plan(result["shifts"])
+
+
+class SolverPool:
+    def __init__(self, processes: int = 2, threads_per_process: Optional[int] = None):
+        """
+        processes: procesos resolvedores
+        threads_per_process: hilos de CP-SAT por proceso; por defecto los de la política del
+            proceso web (SOLVER_MAX_THREADS o los núcleos) repartidos entre los procesos
+        """
+        from solver_policy import solver_policy
+
+        if processes < 1:
+            raise ValueError("processes debe ser >= 1")
+        self.processes = processes
+        self.threads_per_process = max(1, threads_per_process or solver_policy.max_threads // processes)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: no heredar hilos del proceso web (Flask, cola de trabajos)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_warm_up,
+                    initargs=(self.threads_per_process,),
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Descarta un pool roto (murió un proceso) para que la próxima resolución cree otro."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def start(self, timeout: Optional[float] = 60) -> List[int]:
+        """Arranca y precalienta todos los procesos. Devuelve sus pids."""
+        executor = self._get_executor()
+        futures = [executor.submit(_ping) for _ in range(self.processes)]
+        return sorted({f.result(timeout=timeout) for f in futures})
+
+    def submit(self, spec: Dict[str, Any], time_limit_seconds: Optional[int] = 10) -> Future:
+        return self._get_executor().submit(_solve_spec, spec, time_limit_seconds)
+
+    def solve(self, planner, time_limit_seconds: Optional[int] = 10) -> CompactPlan:
+        """
+        Resuelve el planner en el pool y deja la solución en él (como solve_plan).
+        Los aciertos de caché y la ruta combinatoria no salen del proceso web.
+        """
+        return planner.solve_plan(time_limit_seconds=time_limit_seconds, remote=self._solve_remote)
+
+    def _solve_remote(self, planner, time_limit_seconds: Optional[int]) -> CompactPlan:
+        from planning_model import ShiftPlannerError
+
+        spec = planner.to_spec()
+        timeout = None if time_limit_seconds is None else time_limit_seconds + RESULT_MARGIN_SECONDS
+        for attempt in (1, 2):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(_solve_spec, spec, time_limit_seconds)
+                result = future.result(timeout=timeout)
+                break
+            except BrokenProcessPool as e:
+                self._discard_executor(executor)
+                if attempt == 2:
+                    raise ShiftPlannerError(f"Fallo del proceso resolvedor: {e}") from e
+                logger.warning("Pool de resolvedores roto (%s); se reintenta en uno nuevo", e)
+            except TimeoutError as e:
+                future.cancel()
+                raise ShiftPlannerError(
+                    f"El proceso resolvedor no respondió en {timeout:.0f} s") from e
+        # las métricas se agregan en el proceso web, que es el que expone /metrics
+        planner.timer.timings.update(result["timings"])
+        planner.solver_stats = result["solver"]
+        return decode_result(planner, result)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+_pool: Optional[SolverPool] = None
+_pool_lock = Lock()
+
+
+def get_solver_pool() -> Optional[SolverPool]:
+    """Pool compartido del proceso; None si PLANNER_POOL_PROCESSES no está configurado (> 0)."""
+    global _pool
+    processes = int(os.environ.get("PLANNER_POOL_PROCESSES", "0"))
+    if processes < 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = SolverPool(processes=processes)
+        return _pool
+
+# Fin de solver_pool.py
@@ -0,0 +1,146 @@
+# startup.py
+"""
+Arranque de la aplicación: fases medidas, calentamiento opcional y estado de preparación.
+
+ - create_app (app.py) mide cada fase del arranque (imports, blueprints, calentamiento)
+   con planner_metrics.PhaseTimer y las registra en el log
+ - calentamiento (WARMUP): importa ortools/pandas, resuelve un modelo trivial con CP-SAT
+   (carga la biblioteca nativa), arranca el pool de procesos si está configurado, abre el
+   registro de marcas, calibra PBKDF2 y hashea las contraseñas en claro (user_repository)
+   y resuelve los planes de WARMUP_PLANS para dejarlos en la caché
+ - /ready (routes/health.py) responde 503 hasta que termina el calentamiento
+ - IMPORT_BUDGET_MS: si los imports superan el presupuesto se registra una advertencia
+
+Configuración (app.config, con valores por defecto desde el entorno):
+    WARMUP            PLANNER_WARMUP (0/1, por defecto 0)
+    WARMUP_ASYNC      PLANNER_WARMUP_ASYNC (0/1): calentar en un hilo sin bloquear create_app
+    WARMUP_PLANS      parámetros de ShiftPlanner a precalcular (por defecto el plan de VerTurnosTable)
+    IMPORT_BUDGET_MS  PLANNER_IMPORT_BUDGET_MS (por defecto 1500)
+"""
+from threading import Lock, Thread
+from typing import Any, Dict, Optional
+import logging
+import os
+import time
+
+from planner_metrics import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+# fases que cuentan para el presupuesto de imports
+IMPORT_PHASES = ("import_routes", "warmup_imports")
+
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def default_config() -> Dict[str, Any]:
+    return {
+        "WARMUP": _env_flag("PLANNER_WARMUP"),
+        "WARMUP_ASYNC": _env_flag("PLANNER_WARMUP_ASYNC"),
+        # el que pide VerTurnosTable.html (/plan?weeks=4&rotation=true)
+        "WARMUP_PLANS": [{"weeks": 4, "enable_weekly_rotation": True}],
+        "IMPORT_BUDGET_MS": float(os.environ.get("PLANNER_IMPORT_BUDGET_MS", "1500")),
+    }
+
+
+class StartupState:
+    """Estado del arranque de una aplicación (app.extensions["startup"])."""
+
+    def __init__(self, timer: PhaseTimer):
+        self.timer = timer
+        self.ready = False
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self._lock = Lock()
+
+    def mark_ready(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.error = error
+            self.ready = error is None
+            self.ready_at = time.time()
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            data: Dict[str, Any] = {
+                "ready": self.ready,
+                "timings_ms": self.timer.as_ms(),
+                "started_at": self.started_at,
+                "ready_at": self.ready_at,
+            }
+            if self.error:
+                data["message"] = self.error
+        return data
+
+
+def warm_up(config: Dict[str, Any], timer: PhaseTimer) -> None:
+    """Carga lo que de otro modo pagaría la primera petición de /plan."""
+    with timer.phase("warmup_imports"):
+        import pandas  # noqa: F401
+        from ortools.sat.python import cp_model  # noqa: F401
+        import plan_export  # noqa: F401
+        from planning_model import ShiftPlanner
+
+    with timer.phase("warmup_solve"):
+        ShiftPlanner(weeks=1, fast_path=False, cache=None, store=None).solve_plan(time_limit_seconds=5)
+
+    from solver_pool import get_solver_pool
+
+    pool = get_solver_pool()
+    if pool is not None:
+        with timer.phase("warmup_pool"):
+            pool.start()
+
+    with timer.phase("warmup_time_log"):
+        from time_log import get_time_log
+
+        get_time_log()
+
+    with timer.phase("warmup_users"):
+        from user_repository import USERS_LOAD_BUDGET, user_repository
+
+        user_repository.prepare(USERS_LOAD_BUDGET)
+
+    with timer.phase("warmup_plans"):
+        for params in config.get("WARMUP_PLANS") or ():
+            ShiftPlanner(**params).solve_plan()
+
+
+def log_timings(timer: PhaseTimer, budget_ms: float) -> None:
+    timings = timer.as_ms()
+    logger.info("Arranque: %s", ", ".join(f"{name}={ms:.1f}ms" for name, ms in timings.items()))
+    imports_ms = sum(timings.get(name, 0.0) for name in IMPORT_PHASES)
+    if budget_ms and imports_ms > budget_ms:
+        logger.warning("Los imports tardaron %.1f ms (presupuesto %.0f ms)", imports_ms, budget_ms)
+
+
+def start(app, timer: PhaseTimer) -> StartupState:
+    """Registra el estado de arranque en la app y ejecuta el calentamiento si está activo."""
+    state = StartupState(timer)
+    app.extensions["startup"] = state
+    config = dict(app.config)
+    if not config.get("WARMUP"):
+        state.mark_ready()
+        log_timings(timer, config.get("IMPORT_BUDGET_MS", 0))
+        return state
+
+    def run() -> None:
+        try:
+            warm_up(config, timer)
+        except Exception as e:
+            # la app sigue atendiendo; /ready informa el fallo
+            logger.exception("Falló el calentamiento")
+            state.mark_ready(error=f"Falló el calentamiento: {e}")
+        else:
+            state.mark_ready()
+        log_timings(timer, config.get("IMPORT_BUDGET_MS", 0))
+
+    if config.get("WARMUP_ASYNC"):
+        Thread(target=run, name="warmup", daemon=True).start()
+    else:
+        run()
+    return state
+
+# Fin de startup.py
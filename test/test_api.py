@@ -30,3 +30,23 @@ def test_plan_with_opening_only_param(client):
     assert found
     for r in found:
         assert r["Turno"] == "Apertura"
+
+def test_plan_lookups_use_job_queue_backpressure(client, monkeypatch):
+    import threading
+    import plan_jobs
+    from plan_jobs import PlanJobQueue
+
+    release = threading.Event()
+    full = PlanJobQueue(max_workers=1, max_pending=0, runner=lambda job: release.wait(timeout=10))
+    full.submit({"time_limit": 1})
+    monkeypatch.setattr(plan_jobs, "plan_jobs", full)
+    try:
+        query = "weeks=11&start_date=2031-03-03"
+        for path in (f"/export/turnos_csv?{query}",
+                     f"/plan/on_date?{query}&date=2031-03-04",
+                     f"/api/reportes/horas?{query}&plan_start=2031-03-03&asesores=1:Asesor_1"):
+            resp = client.get(path)
+            assert resp.status_code == 429, path
+            assert resp.headers["Retry-After"]
+    finally:
+        release.set()
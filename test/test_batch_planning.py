@@ -0,0 +1,92 @@
+# tests/test_batch_planning.py
+import json
+
+import batch_planning
+from batch_planning import iter_ndjson, load_stores, main, plan_stores, solve_store
+
+
+STORES = [
+    {"store_id": "centro", "weeks": 2},
+    {"store_id": "norte", "advisors": ["A", "B", "C", "D"], "weeks": 2, "coverage": {"Apertura": 2}},
+    {"store_id": "rota", "weeks": 0},
+    {"store_id": "sur", "advisors": ["A", "B", "C"], "opening_advisor": "B", "weeks": 3},
+]
+
+
+def test_plan_stores_reports_each_store():
+    results = {r["store_id"]: r for r in plan_stores(STORES, cpu_budget=2)}
+    assert set(results) == {"centro", "norte", "rota", "sur"}
+    assert results["centro"]["model"] == "shift" and results["centro"]["method"] == "combinatorial"
+    assert results["norte"]["model"] == "coverage" and results["norte"]["status"] == "ok"
+    assert results["rota"]["status"] == "error" and "weeks" in results["rota"]["message"]
+    sur = results["sur"]["plan"]
+    assert all(sur.shift_at("B", w, day) == "Apertura" for w in range(3) for day in sur.days)
+
+
+def test_ndjson_stream_ends_with_summary():
+    lines = [json.loads(line) for line in iter_ndjson(plan_stores(STORES[:1] + STORES[2:3], cpu_budget=1))]
+    assert lines[0]["plan"][0].keys() >= {"Asesor", "Semana", "Día", "Turno"}
+    summary = lines[-1]["summary"]
+    assert summary["stores"] == 2 and summary["errors"] == 1
+    assert summary["failed"][0]["store_id"] == "rota"
+
+
+def test_cli_writes_file(tmp_path):
+    stores = tmp_path / "tiendas.ndjson"
+    stores.write_text("\n".join(json.dumps(s) for s in STORES[:1]), encoding="utf-8")
+    assert load_stores(str(stores)) == STORES[:1]
+    out = tmp_path / "planes.ndjson"
+    assert main([str(stores), "--output", str(out), "--cpu-budget", "1"]) == 0
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 2
+
+
+def test_batch_endpoint_streams_ndjson():
+    from app import app
+
+    resp = app.test_client().post("/plan/batch", json={"stores": STORES[:1] + STORES[2:3], "cpu_budget": 1})
+    assert resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert lines[-1]["summary"]["ok"] == 1
+    assert app.test_client().post("/plan/batch", json={}).status_code == 400
+
+
+def test_coverage_store_honours_or_rejects_every_field():
+    spec = {"advisors": ["a", "b", "c", "d"], "weeks": 2, "opening_advisor": "a"}
+    result = solve_store(spec, 0)
+    assert result["status"] == "ok" and result["model"] == "coverage"
+    plan = result["plan"]
+    assert all(plan.shift_at("a", w, day) == "Apertura" for w in range(2) for day in plan.days)
+
+    anchored = solve_store(dict(spec, holidays=["2026-01-01"], start_date="2025-12-29"), 0)["plan"]
+    assert anchored.start_date.isoformat() == "2025-12-29"
+    assert anchored.calendar().on_date(anchored.start_date.replace(year=2026, month=1, day=1)) == ()
+    assert solve_store(dict(spec, holidays=["2026-01-01"]), 0)["status"] == "error"  # sin start_date
+    conflict = solve_store(dict(spec, allowed_shifts={"a": ["Cierre"]}), 0)
+    assert conflict["status"] == "error"
+
+
+def test_batches_share_one_process_pool():
+    coverage = [{"store_id": f"n{i}", "advisors": ["A", "B", "C", "D"], "coverage": {"Apertura": 2}}
+                for i in range(3)]
+    first = list(plan_stores(coverage, cpu_budget=1))
+    executor = batch_planning._executor
+    second = list(plan_stores(coverage[:1], cpu_budget=1))
+    assert executor is not None and batch_planning._executor is executor
+    assert all(r["status"] == "ok" for r in first + second)
+
+
+def test_string_booleans_and_single_build(monkeypatch):
+    planner, _ = batch_planning.build_store_planner({"weeks": 2, "rotation": "false"})
+    assert planner.enable_weekly_rotation is False
+    planner, _ = batch_planning.build_store_planner({"weeks": 2, "rotation": "1"})
+    assert planner.enable_weekly_rotation is True
+    coverage, _ = batch_planning.build_store_planner(
+        {"advisors": ["A", "B", "C", "D"], "weeks": 2, "rotation": "0", "same_shift_all_week": "no"})
+    assert coverage.enable_weekly_rotation is False and coverage.same_shift_all_week is False
+
+    built = []
+    build = batch_planning.build_store_planner
+    monkeypatch.setattr(batch_planning, "build_store_planner", lambda spec: built.append(spec) or build(spec))
+    results = list(plan_stores([STORES[0], STORES[3]], cpu_budget=1))
+    assert all(r["status"] == "ok" for r in results)
+    assert len(built) == 2  # una vez por tienda en línea
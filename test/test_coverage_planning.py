@@ -0,0 +1,69 @@
+# tests/test_coverage_planning.py
+import pytest
+from coverage_planning import CoveragePlanner
+from planning_model import ShiftPlannerError
+
+
+def test_coverage_is_met_with_many_advisors():
+    advisors = [f"A{i}" for i in range(12)]
+    coverage = {"Apertura": 4, "Cierre": 3, "Intermedio": {"Sábado": 5}}
+    planner = CoveragePlanner(advisors=advisors, weeks=3, coverage=coverage, enable_weekly_rotation=True)
+    planner.build_and_solve(time_limit_seconds=10)
+    counts = planner.coverage_report()
+    for (w, day, shift), n in counts.items():
+        assert n >= planner.demand[(shift, day)]
+    # rotación: nadie repite turno en semanas consecutivas
+    sol = planner._solution
+    for adv in advisors:
+        for w in range(2):
+            assert sol[adv][w]["Lunes"] != sol[adv][w + 1]["Lunes"]
+
+def test_daily_mode_meets_per_day_demand():
+    advisors = [f"A{i}" for i in range(5)]
+    coverage = {"Apertura": {"Lunes": 3}, "Cierre": 1, "Intermedio": 1}
+    planner = CoveragePlanner(advisors=advisors, coverage=coverage, same_shift_all_week=False)
+    sol = planner.build_and_solve(time_limit_seconds=10)
+    assert sum(1 for adv in advisors if sol[adv][0]["Lunes"] == "Apertura") >= 3
+    # JSON directo del plan compacto: mismas filas que el DataFrame, con tipos nativos
+    records = planner.solution_to_json()
+    assert records == planner.solution_to_dataframe().to_dict(orient="records")
+    assert all(type(r["Semana"]) is int for r in records)
+
+def test_from_usuarios_uses_restricciones_turno():
+    usuarios = {
+        1: {"nombre": "Juan", "activo": True, "restricciones_turno": []},
+        2: {"nombre": "María", "activo": True, "restricciones_turno": ["APERTURA"]},
+        3: {"nombre": "Sergio", "activo": True, "restricciones_turno": []},
+        4: {"nombre": "Inactivo", "activo": False, "restricciones_turno": []},
+    }
+    planner = CoveragePlanner.from_usuarios(usuarios, weeks=2, enable_weekly_rotation=True)
+    assert planner.advisors == ["Juan", "María", "Sergio"]
+    sol = planner.build_and_solve(time_limit_seconds=10)
+    assert all(shift == "Apertura" for week in sol["María"].values() for shift in week.values())
+
+def test_infeasible_coverage_is_rejected():
+    with pytest.raises(ShiftPlannerError):
+        CoveragePlanner(advisors=["A", "B"], coverage={"Apertura": 2, "Cierre": 1})
+
+
+def test_calendar_anchoring_and_endpoint():
+    from datetime import date
+
+    from app import app
+
+    planner = CoveragePlanner(advisors=["A", "B", "C", "D"], weeks=2,
+                              start_date=date(2026, 1, 1), holidays=[date(2026, 1, 6)])
+    sol = planner.build_and_solve()
+    plan = planner.plan
+    assert plan.start_date == date(2026, 1, 1)
+    assert "Lunes" not in sol["A"][0] and "Jueves" in sol["A"][0]  # antes de start_date
+    assert plan.calendar().on_date(date(2026, 1, 6)) == ()
+    assert sum(planner.coverage_report()[(1, "Martes", s)] for s in planner.shifts) == 0
+    with pytest.raises(ShiftPlannerError):
+        CoveragePlanner(advisors=["A", "B", "C"], holidays=[date(2026, 1, 6)])
+
+    client = app.test_client()
+    body = {"advisors": ["A", "B", "C"], "weeks": 1, "start_date": "2026-01-01", "holidays": ["2026-01-02"]}
+    rows = client.post("/plan/coverage", json=body).get_json()["plan"]
+    assert {r["Día"] for r in rows} == {"Jueves", "Sábado"}
+    assert client.post("/plan/coverage", json=dict(body, start_date="ayer")).status_code == 500
@@ -0,0 +1,112 @@
+# tests/test_hours_report.py
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from hours_report import NO_PLAN, NO_SHIFT, HoursReport, frame_records
+from planning_model import ShiftPlanner
+from time_log import FIN, INICIO, REINICIO, TimeLog
+
+MONDAY = date(2026, 1, 5)
+
+
+def _work(log, user_id, day, hours, start_hour=8):
+    start = datetime.combine(day, datetime.min.time()) + timedelta(hours=start_hour)
+    log.append(user_id, INICIO, start)
+    log.append(user_id, FIN, start + timedelta(hours=hours))
+    log.append(user_id, REINICIO, start + timedelta(hours=hours, minutes=1))
+
+
+@pytest.fixture
+def log():
+    log = TimeLog(":memory:")
+    yield log
+    log.close()
+
+
+def test_weekly_hours_and_overtime(log):
+    for d in range(6):
+        _work(log, 1, MONDAY + timedelta(days=d), 9)
+    _work(log, 2, MONDAY + timedelta(days=7), 4)
+    report = HoursReport(log, weekly_hours_limit=48).report(today=date(2026, 3, 1))
+    weekly = report["semanal"].set_index("user_id")
+    assert weekly.loc[1, "horas"] == 54.0 and weekly.loc[1, "horas_extra"] == 6.0
+    assert weekly.loc[1, "dias_trabajados"] == 6
+    assert weekly.loc[2, "horas_extra"] == 0.0
+    assert set(report["detalle"]["turno"]) == {NO_PLAN}
+
+
+def test_plan_join_and_adherence(log):
+    plan = ShiftPlanner(weeks=2, cache=None).solve_plan()
+    for d in range(3):
+        _work(log, 1, MONDAY + timedelta(days=d), 8)
+    _work(log, 1, MONDAY + timedelta(days=6), 2)  # domingo: sin turno planeado
+    report = HoursReport(log).report(
+        plan=plan, plan_start=MONDAY, advisor_for_user={1: plan.advisors[0]}, today=date(2026, 3, 1)
+    )
+    detail = report["detalle"]
+    planned = plan.shift_at(plan.advisors[0], 0, plan.days[0])
+    assert detail.loc[detail["turno"] == planned, "horas"].item() == 24.0
+    assert detail.loc[detail["turno"] == NO_SHIFT, "horas"].item() == 2.0
+    weekly = report["semanal"]
+    assert list(weekly["dias_planeados"]) == [6, 6]
+    assert list(weekly["adherencia"]) == [0.5, 0.0]  # la segunda semana no trabajó
+
+
+def test_closed_weeks_are_cached_and_invalidated(log):
+    reporter = HoursReport(log)
+    _work(log, 1, MONDAY, 8)
+    reporter.report(today=date(2026, 2, 1))
+    reporter.report(today=date(2026, 2, 1))
+    assert reporter.cache_stats["hits"] == 1
+    _work(log, 1, MONDAY + timedelta(days=1), 8)  # marca tardía en semana cerrada
+    report = reporter.report(today=date(2026, 2, 1))
+    assert reporter.cache_stats["invalidations"] == 1
+    assert report["semanal"]["horas"].item() == 16.0
+
+
+def test_incremental_pairing_across_refreshes(log):
+    reporter = HoursReport(log)
+    log.append(1, INICIO, datetime(2026, 1, 5, 8))
+    reporter.refresh()
+    log.append(1, FIN, datetime(2026, 1, 5, 15, 30))
+    reporter.refresh()
+    assert reporter.sessions["horas"].tolist() == [7.5]
+    # cada refresh guarda sólo las jornadas nuevas; se unen al leer sessions
+    consolidated = reporter.sessions
+    for d in (1, 2):
+        _work(log, 2, MONDAY + timedelta(days=d), 8)
+        reporter.refresh()
+    assert reporter._sessions is consolidated and len(reporter._new_sessions) == 2
+    assert reporter.sessions["horas"].tolist() == [7.5, 8.0, 8.0]
+
+
+def test_records_are_json_serializable(log):
+    _work(log, 1, MONDAY, 8)
+    records = frame_records(HoursReport(log).report()["semanal"])
+    assert json.loads(json.dumps(records))[0]["semana"] == "2026-01-05"
+    assert records[0]["adherencia"] is None
+
+
+def test_report_endpoint_requires_explicit_advisor_mapping(log, monkeypatch):
+    import time_log
+    from app import app
+
+    monkeypatch.setattr(time_log, "get_time_log", lambda: log)
+    for d in range(2):
+        _work(log, 2, MONDAY + timedelta(days=d), 8)
+    client = app.test_client()
+    url = f"/api/reportes/horas?weeks=2&plan_start={MONDAY.isoformat()}"
+
+    data = client.get(url).get_json()
+    assert "asesores" not in data and "message" in data
+    assert {row["adherencia"] for row in data["semanal"]} == {None}
+
+    data = client.get(url + "&asesores=2:Asesor_3").get_json()
+    assert data["asesores"] == {"2": "Asesor_3"}
+    assert data["semanal"][0]["dias_planeados"] == 6
+
+    assert client.get(url + "&asesores=2-Asesor_3").status_code == 400
+    assert client.get(url + "&asesores=99:Asesor_1").status_code == 400
+    assert client.get(url + "&asesores=2:Nadie").status_code == 400
@@ -0,0 +1,40 @@
+# tests/test_plan_cache.py
+from datetime import date
+
+from plan_cache import PlanCache, make_plan_key
+from planning_model import ShiftPlanner
+
+
+def test_key_is_canonical():
+    k1 = make_plan_key(4, False, "Asesor_2", True, ["A", "B", "C"], ["Lunes"], [date(2026, 1, 2), date(2026, 1, 1)])
+    k2 = make_plan_key(4, False, None, True, ("A", "B", "C"), ("Lunes",), [date(2026, 1, 1), date(2026, 1, 2)])
+    assert k1 == k2
+
+def test_lru_eviction_and_counters():
+    cache = PlanCache(max_entries=2, ttl_seconds=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser el más reciente
+    cache.put("c", 3)  # desaloja "b"
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+def test_ttl_expiration():
+    cache = PlanCache(max_entries=2, ttl_seconds=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_planner_uses_cache():
+    cache = PlanCache()
+    first = ShiftPlanner(weeks=2, enable_weekly_rotation=True, cache=cache)
+    sol = first.build_and_solve(time_limit_seconds=5)
+    assert not first.from_cache
+
+    second = ShiftPlanner(weeks=2, enable_weekly_rotation=True, cache=cache)
+    assert second.build_and_solve(time_limit_seconds=5) == sol
+    assert second.from_cache
+    assert cache.stats()["hits"] == 1
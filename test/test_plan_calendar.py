@@ -0,0 +1,63 @@
+# tests/test_plan_calendar.py
+from datetime import date, timedelta
+
+import pytest
+
+from planning_model import ShiftPlanner, ShiftPlannerError
+
+START = date(2026, 11, 4)  # miércoles
+HOLIDAY = date(2026, 11, 16)  # lunes festivo
+
+
+def _plan(**kwargs):
+    options = dict(weeks=4, enable_weekly_rotation=True, start_date=START, holidays=[HOLIDAY], cache=None)
+    options.update(kwargs)
+    return ShiftPlanner(**options).solve_plan()
+
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_holidays_sundays_and_days_before_start_are_off(fast_path):
+    calendar = _plan(fast_path=fast_path).calendar()
+    assert calendar.on_date(date(2026, 11, 3)) == ()  # antes de start_date
+    assert calendar.on_date(HOLIDAY) == ()
+    assert calendar.on_date(date(2026, 11, 8)) == ()  # domingo
+    assignments = calendar.on_date(START)
+    assert sorted(shift for _, shift in assignments) == ["Apertura", "Cierre", "Intermedio"]
+
+
+def test_point_and_interval_lookups_agree_with_plan():
+    plan = _plan()
+    calendar = plan.calendar()
+    assert plan.calendar() is calendar
+    for advisor in plan.advisors:
+        day = START
+        while day <= calendar.last_date:
+            expected = dict(calendar.on_date(day)).get(advisor)
+            assert calendar.shift_of(advisor, day) == expected
+            day += timedelta(days=1)
+    # con rotación cada semana es un tramo distinto; el festivo parte la semana
+    tramos = calendar.intervals("Asesor_1", date(2026, 11, 16), date(2026, 11, 21))
+    assert tramos == [(date(2026, 11, 17), date(2026, 11, 21), tramos[0][2])]
+    assert calendar.who(START, "Apertura") == [a for a, s in calendar.on_date(START) if s == "Apertura"]
+
+
+def test_anchor_is_part_of_cache_key_and_spec():
+    planner = ShiftPlanner(start_date=START, holidays=[HOLIDAY])
+    assert planner.cache_key != ShiftPlanner(start_date=START).cache_key
+    clone = ShiftPlanner.from_spec(planner.to_spec(), cache=None)
+    assert clone.start_date == START and clone.holidays == {HOLIDAY}
+    with pytest.raises(ShiftPlannerError):
+        ShiftPlanner(holidays=[HOLIDAY])
+
+
+def test_on_date_endpoint():
+    from app import app
+
+    client = app.test_client()
+    base = "/plan/on_date?start_date=2026-11-04&holidays=2026-11-16&weeks=4"
+    data = client.get(base + "&date=2026-11-05&shift=Apertura").get_json()
+    assert len(data["asignaciones"]) == 1 and data["asignaciones"][0]["Turno"] == "Apertura"
+    assert client.get(base + "&date=2026-11-16").get_json()["asignaciones"] == []
+    data = client.get(base + "&desde=2026-11-09&hasta=2026-11-21&advisor=Asesor_2").get_json()
+    assert [t["desde"] for t in data["tramos"]] == ["2026-11-09", "2026-11-17"]
+    assert client.get("/plan/on_date?date=2026-11-05").status_code == 400
@@ -0,0 +1,74 @@
+# tests/test_plan_export.py
+import gzip
+import io
+import json
+
+import pandas as pd
+from planning_model import ShiftPlanner
+from plan_export import stream_export
+
+
+def _planner(weeks=3):
+    planner = ShiftPlanner(weeks=weeks, enable_weekly_rotation=True, cache=None)
+    planner.build_and_solve()
+    return planner
+
+def test_csv_stream_matches_dataframe():
+    planner = _planner()
+    body, mimetype, filename = stream_export(planner.plan, "csv")
+    streamed = b"".join(body).decode("utf-8")
+    expected = io.StringIO()
+    planner.solution_to_dataframe().to_csv(expected, index=False)
+    assert streamed == expected.getvalue()
+    assert mimetype == "text/csv"
+    assert filename.endswith(".csv")
+
+def test_ndjson_gzip_stream():
+    planner = _planner(weeks=60)
+    body, mimetype, filename = stream_export(planner.plan, "ndjson", compress=True)
+    lines = gzip.decompress(b"".join(body)).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == planner.solution_to_json()
+    assert filename.endswith(".ndjson.gz")
+
+def test_negotiate_encoding():
+    from plan_export import ENCODINGS, negotiate_encoding
+
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("*") == ENCODINGS[0]
+    if "br" in ENCODINGS:
+        assert negotiate_encoding("gzip;q=0.5, br") == "br"
+    else:
+        assert negotiate_encoding("br") is None
+
+def test_plan_etag_and_compression():
+    from app import app
+
+    client = app.test_client()
+    url = "/plan?weeks=12&rotation=true"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.data == b""
+    assert revalidated.headers["ETag"] == etag
+
+    compressed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(compressed.data))["plan"] == first.get_json()["plan"]
+    assert client.get("/plan?weeks=13&rotation=true", headers={"If-None-Match": etag}).status_code == 200
+
+def test_export_etag_depends_on_format():
+    from app import app
+
+    client = app.test_client()
+    csv_resp = client.get("/export/turnos_csv?weeks=3", headers={"Accept-Encoding": "gzip"})
+    assert csv_resp.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(csv_resp.data).startswith(b"Asesor,Semana")
+    etag = csv_resp.headers["ETag"]
+    assert client.get("/export/turnos_csv?weeks=3", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/export/turnos_csv?weeks=3&format=ndjson", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,46 @@
+# tests/test_plan_jobs.py
+import threading
+
+import pytest
+from plan_jobs import PlanJobQueue, QueueFullError
+
+PARAMS = {
+    "weeks": 2,
+    "enforce_opening_only": False,
+    "opening_only_advisor": None,
+    "enable_weekly_rotation": True,
+    "time_limit": 5,
+}
+
+
+def test_job_runs_to_completion():
+    queue = PlanJobQueue(max_workers=1, max_pending=1)
+    job = queue.wait(queue.submit(PARAMS), timeout=30)
+    assert job.status == "done"
+    data = job.to_dict()
+    assert len(data["plan"]) == 3 * 2 * 6
+
+def test_time_limit_is_capped():
+    queue = PlanJobQueue(max_workers=1, max_time_limit=3)
+    job = queue.submit(dict(PARAMS, time_limit=600))
+    assert job.params["time_limit"] == 3
+    queue.wait(job, timeout=30)
+
+def test_backpressure_and_cancel():
+    release = threading.Event()
+
+    def blocking_runner(job):
+        release.wait(timeout=10)
+        return {"plan": []}
+
+    queue = PlanJobQueue(max_workers=1, max_pending=1, runner=blocking_runner)
+    running = queue.submit(PARAMS)
+    pending = queue.submit(PARAMS)
+    with pytest.raises(QueueFullError):
+        queue.submit(PARAMS)
+
+    assert queue.cancel(pending.id)
+    assert pending.status == "cancelled"
+    release.set()
+    assert queue.wait(running, timeout=10).status == "done"
+    assert not queue.cancel(running.id)
@@ -0,0 +1,31 @@
+# tests/test_plan_result.py
+import json
+import pickle
+
+from planning_model import ShiftPlanner
+from plan_result import CompactPlan
+
+
+def _plan(weeks=4):
+    return ShiftPlanner(weeks=weeks, enable_weekly_rotation=True, cache=None).solve_plan()
+
+def test_views_are_consistent():
+    plan = _plan()
+    sol = plan.to_dict()
+    ShiftPlanner.validate_solution_structure(sol, list(plan.advisors), plan.weeks, list(plan.days))
+    records = plan.records()
+    assert len(records) == len(plan) == 3 * 4 * 6
+    assert json.loads(plan.to_json()) == records
+    assert plan.to_dataframe().to_dict(orient="records") == records
+    assert CompactPlan.from_solution(sol, plan.days, plan.shifts) == plan
+
+def test_no_shift_cells_are_skipped():
+    plan = CompactPlan.from_solution(
+        {"A": {0: {"Lunes": "Apertura"}}}, days=["Lunes", "Martes"], shifts=["Apertura", "Cierre"]
+    )
+    assert plan.records() == [{"Asesor": "A", "Semana": 1, "Día": "Lunes", "Turno": "Apertura"}]
+    assert plan.shift_at("A", 0, "Martes") is None
+
+def test_pickle_round_trip():
+    plan = _plan(weeks=2)
+    assert pickle.loads(pickle.dumps(plan)) == plan
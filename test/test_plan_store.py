@@ -0,0 +1,121 @@
+# tests/test_plan_store.py
+import os
+import pickle
+from datetime import date
+
+from app import app
+from plan_cache import PlanCache
+from plan_store import PlanStore, read_meta
+from planning_model import ShiftPlanner
+import routes.Turnos as Turnos
+
+
+def _planner(store, **kwargs):
+    options = dict(weeks=3, enable_weekly_rotation=True, cache=PlanCache(), store=store)
+    options.update(kwargs)
+    return ShiftPlanner(**options)
+
+
+def test_save_and_reload_without_solving(tmp_path):
+    store = PlanStore(str(tmp_path))
+    first = _planner(store, fast_path=False, start_date=date(2026, 11, 4))
+    plan = first.solve_plan()
+    assert first.solve_method == "cp-sat" and first.plan_version == 1
+
+    # proceso "reiniciado": caché vacía y almacén nuevo sobre el mismo directorio
+    second = _planner(PlanStore(str(tmp_path)), fast_path=False, start_date=date(2026, 11, 4))
+    loaded = second.solve_plan()
+    assert second.from_cache and second.stats["solve_method"] == "store"
+    assert second.plan_version == 1
+    assert loaded == plan and hash(loaded) == hash(plan)
+    assert loaded.start_date == date(2026, 11, 4)
+    assert isinstance(loaded._codes, memoryview)  # mapeado, no copiado
+    assert pickle.loads(pickle.dumps(loaded)) == plan
+    assert loaded.to_json() == plan.to_json()
+
+    # store=None (benchmarks) siempre resuelve aunque el plan esté guardado
+    fresh = ShiftPlanner(weeks=3, enable_weekly_rotation=True, fast_path=False, start_date=date(2026, 11, 4),
+                         cache=None, store=None)
+    fresh.solve_plan()
+    assert not fresh.from_cache and fresh.solve_method == "cp-sat" and fresh.plan_version is None
+
+
+def test_versions_are_listed_and_identical_plans_not_duplicated(tmp_path):
+    store = PlanStore(str(tmp_path))
+    planner = _planner(store)
+    plan = planner.solve_plan()
+    key = planner.cache_key
+    assert store.save(key, plan) == 1
+
+    other = _planner(None, opening_only_advisor="Asesor_1", enforce_opening_only=True).solve_plan()
+    assert other != plan
+    assert store.save(key, other, method="manual") == 2
+    versions = store.versions(key)
+    assert [v["version"] for v in versions] == [1, 2]
+    assert versions[1]["method"] == "manual"
+    assert versions[0]["code_bytes"] == len(plan)
+    assert store.load(key, 1) == plan
+    assert store.latest(key) == other
+    assert store.load(key, 3) is None
+    assert store.versions(_planner(None, weeks=9).cache_key) == []
+    meta, _ = read_meta(store._version_path(store._dir(key), 1))
+    assert meta["params"]["weeks"] == 3
+
+
+def test_plan_and_export_serve_stored_versions(tmp_path, monkeypatch):
+    store = PlanStore(str(tmp_path))
+    build = Turnos._build_planner
+
+    def build_with_store(params):
+        planner = build(params)
+        planner.store = store
+        planner.cache = PlanCache()
+        return planner
+
+    monkeypatch.setattr(Turnos, "_build_planner", build_with_store)
+    planner = build_with_store(Turnos._parse_plan_params({"weeks": "2"}))
+    plan = planner.solve_plan()
+
+    client = app.test_client()
+    data = client.get("/plan?weeks=2&stats=true").get_json()
+    assert data["cached"] and data["version"] == 1
+    assert data["stats"]["solve_method"] == "store"
+    assert data["plan"] == plan.records()
+
+    assert client.get("/plan?weeks=2&version=1").get_json()["plan"] == plan.records()
+    assert client.get("/plan?weeks=2&version=5").status_code == 404
+    assert client.get("/plan?weeks=2&version=abc").status_code == 400
+
+    versions = client.get("/plan/versions?weeks=2").get_json()["versions"]
+    assert [v["version"] for v in versions] == [1]
+
+    csv = client.get("/export/turnos_csv?weeks=2&version=1")
+    assert csv.status_code == 200
+    assert b"Asesor_1" in csv.data
+    assert client.get("/export/turnos_csv?weeks=2&version=2").status_code == 404
+
+
+def test_unreadable_versions_are_skipped(tmp_path, caplog):
+    store = PlanStore(str(tmp_path))
+    planner = _planner(store)
+    plan = planner.solve_plan()
+    key = planner.cache_key
+    directory = store._dir(key)
+    assert [n for n in os.listdir(directory)] == ["v000001.plan"]  # sin temporales
+
+    # versión cortada a mitad de escritura (cabecera, JSON o códigos incompletos)
+    good = open(store._version_path(directory, 1), "rb").read()
+    for version, cut in ((2, 5), (3, 40), (4, len(good) - 3)):
+        with open(store._version_path(directory, version), "wb") as fh:
+            fh.write(good[:cut])
+
+    fresh = PlanStore(str(tmp_path))
+    assert fresh.latest(key) == plan
+    assert fresh.load(key, 4) is None
+    assert [v["version"] for v in fresh.versions(key)] == [1, 4]  # la 4 tiene cabecera completa
+    assert "ilegible" in caplog.text
+    reloaded = _planner(fresh)
+    assert reloaded.solve_plan() == plan and reloaded.plan_version == 1
+    assert fresh.save(key, plan) == 1
+    other = _planner(None, opening_only_advisor="Asesor_1", enforce_opening_only=True).solve_plan()
+    assert fresh.save(key, other) == 5 and fresh.latest(key) == other
@@ -0,0 +1,29 @@
+# tests/test_planner_metrics.py
+from planning_model import ShiftPlanner
+from planner_metrics import Histogram, PhaseTimer, render_prometheus
+
+
+def test_cp_sat_solve_records_phases_and_stats():
+    planner = ShiftPlanner(weeks=2, cache=None, fast_path=False)
+    planner.build_and_solve(time_limit_seconds=5)
+    stats = planner.stats
+    assert stats["solve_method"] == "cp-sat"
+    assert {"build", "solve", "extract"} <= set(stats["timings_ms"])
+    assert stats["solver"]["status"] in ("OPTIMAL", "FEASIBLE")
+    assert "planner_phase_seconds_count" in render_prometheus()
+
+def test_disabled_timer_is_noop():
+    timer = PhaseTimer(enabled=False)
+    with timer.phase("build"):
+        pass
+    assert timer.timings == {}
+
+def test_histogram_is_cumulative():
+    hist = Histogram("h", "ayuda", ["phase"], buckets=(0.1, 1.0))
+    hist.observe(0.05, "a")
+    hist.observe(0.5, "a")
+    hist.observe(5.0, "a")
+    lines = hist.render()
+    assert 'h_bucket{phase="a",le="0.1"} 1' in lines
+    assert 'h_bucket{phase="a",le="1.0"} 2' in lines
+    assert 'h_bucket{phase="a",le="+Inf"} 3' in lines
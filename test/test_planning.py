@@ -1,4 +1,5 @@
 # tests/test_planning.py
+from datetime import date
 import pytest
 from planning_model import ShiftPlanner, ShiftPlannerError
 
@@ -50,3 +51,174 @@ def test_opening_only_with_rotation():
         if adv == opening_advisor:
             continue
         assert sol[adv][0][planner.days[0]] != sol[adv][1][planner.days[0]]
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_compact_and_expanded_formulations(compact):
+    planner = ShiftPlanner(weeks=3, enable_weekly_rotation=True, cache=None, compact=compact, fast_path=False)
+    sol = planner.build_and_solve(time_limit_seconds=5)
+    planner.validate_solution_structure(sol, planner.advisors, planner.weeks, planner.days)
+    for adv in planner.advisors:
+        for w in range(planner.weeks - 1):
+            assert sol[adv][w][planner.days[0]] != sol[adv][w + 1][planner.days[0]]
+
+def test_compact_model_is_smaller():
+    compact = ShiftPlanner(weeks=4, cache=None, compact=True)
+    expanded = ShiftPlanner(weeks=4, cache=None, compact=False)
+    compact._make_model()
+    expanded._make_model()
+    assert compact.model_size()["variables"] * len(compact.days) == expanded.model_size()["variables"]
+    assert compact.model_size()["constraints"] < expanded.model_size()["constraints"]
+
+@pytest.mark.parametrize("weeks", [1, 2, 5])
+@pytest.mark.parametrize("opening_advisor", [None, "Asesor_1", "Asesor_3"])
+@pytest.mark.parametrize("rotation", [False, True])
+def test_combinatorial_fast_path(weeks, opening_advisor, rotation):
+    planner = ShiftPlanner(
+        weeks=weeks,
+        enforce_opening_only=opening_advisor is not None,
+        opening_only_advisor=opening_advisor,
+        enable_weekly_rotation=rotation,
+        cache=None,
+    )
+    sol = planner.build_and_solve()
+    assert planner.solve_method == "combinatorial"
+    assert planner.model is None
+    planner.validate_solution_structure(sol, planner.advisors, planner.weeks, planner.days)
+    for w in range(weeks):
+        assert {sol[adv][w][planner.days[0]] for adv in planner.advisors} == set(ShiftPlanner.SHIFT_MAP.values())
+        if opening_advisor:
+            assert sol[opening_advisor][w][planner.days[0]] == "Apertura"
+    if rotation:
+        for adv in planner.advisors:
+            if adv == opening_advisor:
+                continue
+            for w in range(weeks - 1):
+                assert sol[adv][w][planner.days[0]] != sol[adv][w + 1][planner.days[0]]
+
+def test_fast_path_matches_cp_sat_with_calendar():
+    options = dict(weeks=3, enable_weekly_rotation=True, cache=None, store=None,
+                   start_date=date(2026, 1, 1), holidays=[date(2026, 1, 6)])
+    fast = ShiftPlanner(**options)
+    exact = ShiftPlanner(fast_path=False, **options)
+    assert fast.uses_fast_path and not exact.uses_fast_path
+    assert not ShiftPlanner(balance=True, **options).uses_fast_path
+    fast_plan, exact_plan = fast.solve_plan(), exact.solve_plan()
+    assert fast.solve_method == "combinatorial" and exact.solve_method == "cp-sat"
+    # mismas celdas sin turno (días previos a start_date y festivos) y la misma estructura
+    assert [c == 0 for c in fast_plan.codes] == [c == 0 for c in exact_plan.codes]
+    for plan in (fast_plan, exact_plan):
+        assert plan.calendar().on_date(date(2026, 1, 6)) == ()
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_extend_keeps_published_weeks(fast_path):
+    planner = ShiftPlanner(weeks=4, enable_weekly_rotation=True, cache=None, fast_path=fast_path)
+    before = planner.build_and_solve(time_limit_seconds=5)
+    after = planner.extend(8, time_limit_seconds=5).to_dict()
+    planner.validate_solution_structure(after, planner.advisors, 8, planner.days)
+    for adv in planner.advisors:
+        for w in range(4):
+            assert after[adv][w] == before[adv][w]
+        for w in range(7):
+            assert after[adv][w]["Lunes"] != after[adv][w + 1]["Lunes"]
+    assert planner.replan_report["kept_ratio"] == 1.0
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_replan_with_opening_only(fast_path):
+    planner = ShiftPlanner(weeks=4, enable_weekly_rotation=True, cache=None, fast_path=fast_path)
+    before = planner.build_and_solve(time_limit_seconds=5)
+    # la semana 1 ya publicada tiene a su asesor de apertura: fijarla debe seguir siendo factible
+    opener = next(adv for adv in planner.advisors if before[adv][0]["Lunes"] == "Apertura")
+    plan = planner.replan(
+        {"enforce_opening_only": True, "opening_only_advisor": opener}, freeze_weeks=1, time_limit_seconds=5
+    )
+    after = plan.to_dict()
+    for adv in planner.advisors:
+        assert after[adv][0] == before[adv][0]
+    for w in range(4):
+        assert after[opener][w]["Lunes"] == "Apertura"
+    assert 0 < planner.replan_report["kept_ratio"] <= 1
+
+def test_replan_rejects_invalid_frozen_week():
+    planner = ShiftPlanner(weeks=2, cache=None)
+    before = planner.build_and_solve()
+    not_opener = next(adv for adv in planner.advisors if before[adv][0]["Lunes"] != "Apertura")
+    with pytest.raises(ShiftPlannerError):
+        planner.replan({"enforce_opening_only": True, "opening_only_advisor": not_opener}, freeze_weeks=1)
+
+def test_cp_sat_solve_is_deterministic():
+    # varios hilos y sin caché: parámetros idénticos deben dar el mismo plan
+    hashes = {
+        ShiftPlanner(weeks=20, enable_weekly_rotation=True, cache=None, store=None,
+                     fast_path=False, num_search_workers=4).solve_plan().content_hash()
+        for _ in range(3)
+    }
+    assert len(hashes) == 1
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_alternatives_are_distinct_and_stable(compact):
+    def run():
+        planner = ShiftPlanner(weeks=6, enable_weekly_rotation=True, cache=None, store=None, compact=compact)
+        return list(planner.iter_alternatives(k=8))
+
+    plans = run()
+    hashes = [p.content_hash() for p in plans]
+    assert len(plans) == 8 and len(set(hashes)) == 8
+    assert hashes == [p.content_hash() for p in run()]
+    for plan in plans:
+        for w in range(plan.weeks):
+            assert sorted(plan.code_at(a, w, 0) for a in range(3)) == [1, 2, 3]
+    with pytest.raises(ShiftPlannerError):
+        next(ShiftPlanner(cache=None, store=None).iter_alternatives(k=0))
+
+def test_alternatives_endpoint_pages():
+    import json
+    from app import app
+
+    client = app.test_client()
+
+    def page(n):
+        resp = client.get(f"/plan/alternatives?weeks=1&rotation=false&per_page=4&page={n}")
+        assert resp.status_code == 200
+        return [json.loads(line) for line in resp.data.decode("utf-8").splitlines()]
+
+    first, second = page(1), page(2)
+    assert [line["index"] for line in first[:-1]] == [1, 2, 3, 4]
+    assert first[-1]["summary"]["has_more"]
+    # una semana sin rotación: 3! = 6 planes en total
+    assert [line["index"] for line in second[:-1]] == [5, 6]
+    assert second[-1]["summary"] == {"page": 2, "per_page": 4, "returned": 2, "has_more": False}
+    assert len({line["content_hash"] for line in first[:-1] + second[:-1]}) == 6
+    assert client.get("/plan/alternatives?per_page=0").status_code == 400
+
+@pytest.mark.parametrize("compact", [True, False])
+def test_balance_reaches_fair_load(compact):
+    planner = ShiftPlanner(weeks=12, balance=True, compact=compact, cache=None, store=None)
+    plan = planner.solve_plan()
+    # 12 semanas entre 3 asesores: nadie pasa más de 4 semanas en el mismo turno
+    assert planner.max_load(plan) == 4
+    assert planner.solver_stats["objective"] == 4
+    assert all(sum(loads.values()) == 12 for loads in planner.shift_loads(plan).values())
+
+def test_improving_plans_stream():
+    planner = ShiftPlanner(weeks=30, balance=True, cache=None, store=None)
+    events = list(planner.iter_improving_plans())
+    objectives = [e["objective"] for e in events]
+    assert objectives == sorted(objectives, reverse=True)
+    assert events[-1]["final"] and not any(e["final"] for e in events[:-1])
+    assert events[-1]["objective"] == planner.max_load(events[-1]["plan"]) == 10
+    assert planner.plan is events[-1]["plan"]
+    with pytest.raises(ShiftPlannerError):
+        next(ShiftPlanner(cache=None, store=None).iter_improving_plans())
+
+def test_plan_stream_endpoint_sends_events():
+    import json
+    from app import app
+
+    resp = app.test_client().get("/plan/stream?weeks=9&rotation=true")
+    assert resp.status_code == 200 and resp.mimetype == "text/event-stream"
+    blocks = [b for b in resp.data.decode("utf-8").split("\n\n") if b]
+    kinds = [b.split("\n")[0] for b in blocks]
+    assert kinds[-1] == "event: done" and set(kinds[:-1]) <= {"event: solution"}
+    done = json.loads(blocks[-1].split("\n")[1][len("data: "):])
+    assert done["objective"] == 3 and len(done["plan"]) == 9 * 3 * 6
+    assert app.test_client().get("/plan/stream?gap=x").status_code == 400
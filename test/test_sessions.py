@@ -0,0 +1,82 @@
+# tests/test_sessions.py
+import time
+
+import sessions
+from sessions import MemorySessionStore, SQLiteSessionStore
+
+
+def test_memory_store_expires_and_slides():
+    store = MemorySessionStore(ttl_seconds=0.2)
+    store.put("a", 1)
+    store.put("b", 2)
+    time.sleep(0.12)
+    assert store.get("a") == 1  # renueva "a"
+    time.sleep(0.12)
+    assert store.get("b") is None
+    assert store.get("a") == 1
+    assert len(store) == 1
+
+
+def test_memory_store_cap_evicts_oldest():
+    store = MemorySessionStore(ttl_seconds=60, max_entries=2)
+    store.put("a", 1)
+    store.put("b", 2)
+    store.get("a")
+    store.put("c", 3)
+    assert dict(store.snapshot()) == {"a": 1, "c": 3}
+
+
+def test_snapshot_is_read_only_and_reused():
+    store = MemorySessionStore(ttl_seconds=60)
+    store.put("a", 1)
+    snap = store.snapshot()
+    assert store.snapshot() is snap
+    store.delete("a")
+    assert dict(store.snapshot()) == {}
+    assert dict(snap) == {"a": 1}
+
+
+def test_sqlite_store_shared_between_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SQLiteSessionStore(path, ttl_seconds=60)
+    second = SQLiteSessionStore(path, ttl_seconds=60)
+    first.put("a", 1)
+    assert second.get("a") == 1
+    second.delete("a")
+    assert first.get("a") is None
+
+
+def test_sqlite_store_expiry_and_cap(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "s.sqlite3"), ttl_seconds=0.1, max_entries=2)
+    store.put("a", 1)
+    time.sleep(0.15)
+    assert store.get("a") is None
+    store.ttl_seconds = 60
+    for i in range(3):
+        store.put(f"t{i}", i)
+    assert dict(store.snapshot()) == {"t1": 1, "t2": 2}
+
+
+def test_sqlite_snapshot_reused_until_changed(tmp_path):
+    path = str(tmp_path / "s.sqlite3")
+    store = SQLiteSessionStore(path, ttl_seconds=60)
+    other = SQLiteSessionStore(path, ttl_seconds=60)
+    store.put("a", 1)
+    snap = store.snapshot()
+    assert store.get("a") == 1  # renovar no cambia el contenido
+    assert store.snapshot() is snap
+    other.put("b", 2)  # otro proceso
+    assert dict(store.snapshot()) == {"a": 1, "b": 2}
+    other.delete("a")
+    assert dict(store.snapshot()) == {"b": 2}
+    assert dict(snap) == {"a": 1}
+
+
+def test_module_api(monkeypatch):
+    monkeypatch.setattr(sessions, "_usuarios_activos", MemorySessionStore())
+    temp_id = sessions.crear_temp_id(7)
+    assert sessions.obtener_user_id(temp_id) == 7
+    assert sessions.obtener_todos() == {temp_id: 7}
+    sessions.borrar_temp_id(temp_id)
+    assert sessions.obtener_user_id(temp_id) is None
+    assert sessions.obtener_user_id(None) is None
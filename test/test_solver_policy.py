@@ -0,0 +1,47 @@
+# tests/test_solver_policy.py
+from planning_model import ShiftPlanner
+from solver_policy import SolverResourcePolicy
+
+
+def test_small_model_gets_one_worker_and_short_limit():
+    policy = SolverResourcePolicy(max_threads=8, small_model_time_limit=5)
+    with policy.allocate(num_variables=12, requested_time_limit=600) as decision:
+        assert decision["workers"] == 1
+        assert decision["time_limit"] == 5
+        assert decision["reason"] == "small-model"
+
+def test_concurrent_solves_are_throttled():
+    policy = SolverResourcePolicy(max_threads=8, max_workers_per_solve=8, acquire_timeout=0.05)
+    with policy.allocate(num_variables=10_000) as first:
+        assert first["workers"] == 8
+        assert policy.stats()["threads_in_use"] == 8
+        with policy.allocate(num_variables=10_000, requested_time_limit=1) as second:
+            # sin hilos libres: espera acquire_timeout y resuelve con 1 hilo
+            assert second["workers"] == 1
+    assert policy.stats()["threads_in_use"] == 0
+
+def test_planner_reports_policy_decision():
+    policy = SolverResourcePolicy(max_threads=4)
+    planner = ShiftPlanner(weeks=2, cache=None, fast_path=False, policy=policy)
+    planner.build_and_solve(time_limit_seconds=5)
+    decision = planner.stats["solver"]["policy"]
+    assert decision["workers"] == planner.stats["solver"]["workers"] == 1
+    assert decision["model_variables"] == 6
+
+def test_time_limit_shrinks_with_concurrent_solves():
+    policy = SolverResourcePolicy(max_threads=8, max_workers_per_solve=1, max_time_limit=30, min_time_limit=2)
+    with policy.allocate(num_variables=10_000, requested_time_limit=12) as first:
+        assert first["time_limit"] == 12
+        with policy.allocate(num_variables=10_000, requested_time_limit=12) as second:
+            assert second["time_limit"] == 6
+            with policy.allocate(num_variables=10_000, requested_time_limit=12) as third:
+                assert third["time_limit"] == 4
+                with policy.allocate(num_variables=10_000, requested_time_limit=3) as fourth:
+                    assert fourth["time_limit"] == 2  # piso min_time_limit
+    with policy.allocate(num_variables=10_000, requested_time_limit=12) as alone:
+        assert alone["time_limit"] == 12
+
+def test_requested_workers_capped_per_solve():
+    policy = SolverResourcePolicy(max_threads=16, max_workers_per_solve=4)
+    with policy.allocate(num_variables=10, requested_workers=12) as decision:
+        assert decision["workers"] == 4 and decision["reason"] == "requested"
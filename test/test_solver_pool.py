@@ -0,0 +1,55 @@
+# tests/test_solver_pool.py
+import os
+import signal
+
+import pytest
+from plan_cache import PlanCache
+from planning_model import ShiftPlanner
+from solver_policy import solver_policy
+from solver_pool import SolverPool
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = SolverPool(processes=1, threads_per_process=1)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+def test_spec_round_trip():
+    planner = ShiftPlanner(weeks=3, enforce_opening_only=True, opening_only_advisor="Asesor_2")
+    clone = ShiftPlanner.from_spec(planner.to_spec())
+    assert clone.cache_key == planner.cache_key
+
+def test_pool_solves_cp_sat_planner(pool):
+    cache = PlanCache()
+    planner = ShiftPlanner(weeks=3, enable_weekly_rotation=True, cache=cache, fast_path=False)
+    pool.solve(planner, time_limit_seconds=5)
+    sol = planner._solution
+    assert planner.solve_method == "cp-sat"
+    planner.validate_solution_structure(sol, planner.advisors, planner.weeks, planner.days)
+    for adv in planner.advisors:
+        assert sol[adv][0]["Lunes"] != sol[adv][1]["Lunes"]
+
+    again = ShiftPlanner(weeks=3, enable_weekly_rotation=True, cache=cache, fast_path=False)
+    assert pool.solve(again) == planner.plan
+    assert again.from_cache
+
+def test_pool_processes_share_the_thread_budget(pool):
+    assert SolverPool(processes=2).threads_per_process == max(1, solver_policy.max_threads // 2)
+    planner = ShiftPlanner(weeks=2, cache=None, store=None, fast_path=False, num_search_workers=4)
+    pool.solve(planner, time_limit_seconds=5)
+    # el proceso del pool tiene 1 hilo: se ignora el pedido de 4
+    assert planner.solver_stats["workers"] == 1
+
+def test_pool_recovers_from_a_dead_process():
+    pool = SolverPool(processes=1, threads_per_process=1)
+    try:
+        (pid,) = pool.start()
+        os.kill(pid, signal.SIGKILL)
+        planner = ShiftPlanner(weeks=2, cache=None, store=None, fast_path=False)
+        pool.solve(planner, time_limit_seconds=5)
+        assert planner.solve_method == "cp-sat"
+        assert pool.start() != [pid]
+    finally:
+        pool.shutdown()
@@ -0,0 +1,46 @@
+# tests/test_startup.py
+import time
+
+import time_log
+from app import create_app
+from plan_cache import plan_cache
+from planning_model import ShiftPlanner
+from time_log import TimeLog
+
+
+def test_ready_without_warmup():
+    client = create_app({"WARMUP": False}).test_client()
+    assert client.get("/live").status_code == 200
+    data = client.get("/ready").get_json()
+    assert data["ready"] and "import_routes" in data["timings_ms"]
+
+
+def test_warmup_primes_plan_cache(monkeypatch):
+    monkeypatch.setattr(time_log, "_time_log", TimeLog(":memory:"))
+    params = {"weeks": 7, "enable_weekly_rotation": True, "enforce_opening_only": True,
+              "opening_only_advisor": "Asesor_3"}
+    plan_cache.invalidate(ShiftPlanner(**params).cache_key)
+    app = create_app({"WARMUP": True, "WARMUP_PLANS": [params]})
+    data = app.test_client().get("/ready").get_json()
+    assert data["ready"]
+    assert {"warmup_imports", "warmup_solve", "warmup_plans"} <= set(data["timings_ms"])
+    assert plan_cache.get(ShiftPlanner(**params).cache_key) is not None
+
+
+def test_async_warmup_reports_starting_then_ready(monkeypatch):
+    monkeypatch.setattr(time_log, "_time_log", TimeLog(":memory:"))
+    release = []
+
+    def slow_warm_up(config, timer):
+        while not release:
+            time.sleep(0.01)
+
+    monkeypatch.setattr("startup.warm_up", slow_warm_up)
+    client = create_app({"WARMUP": True, "WARMUP_ASYNC": True}).test_client()
+    assert client.get("/ready").status_code == 503
+    release.append(True)
+    for _ in range(200):
+        if client.get("/ready").status_code == 200:
+            break
+        time.sleep(0.01)
+    assert client.get("/ready").get_json()["ready"]
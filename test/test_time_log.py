@@ -0,0 +1,154 @@
+# tests/test_time_log.py
+from datetime import datetime
+from threading import Thread
+
+import pytest
+
+from time_log import FIN, INICIO, REINICIO, TimeLog, TimeLogError
+
+
+def test_events_are_validated_and_hours_accumulated(tmp_path):
+    log = TimeLog(str(tmp_path / "log.sqlite3"))
+    with pytest.raises(TimeLogError):
+        log.append(1, FIN, datetime(2026, 1, 5, 8))
+    log.append(1, INICIO, datetime(2026, 1, 5, 8))
+    with pytest.raises(TimeLogError):
+        log.append(1, INICIO, datetime(2026, 1, 5, 9))
+    state = log.append(1, FIN, datetime(2026, 1, 5, 16, 30))
+    assert state["horas"] == 8.5 and state["horas_trabajadas"] == 8.5
+    log.append(1, REINICIO, datetime(2026, 1, 6, 7))
+    log.append(1, INICIO, datetime(2026, 1, 6, 8))
+    log.close()
+    assert len(list(TimeLog(str(tmp_path / "log.sqlite3")).iter_events())) == 4
+
+
+def test_state_is_rebuilt_from_log(tmp_path):
+    path = str(tmp_path / "log.sqlite3")
+    log = TimeLog(path)
+    log.append(1, INICIO, datetime(2026, 1, 5, 8))
+    log.append(1, FIN, datetime(2026, 1, 5, 12))
+    log.append(2, INICIO, datetime(2026, 1, 5, 9))
+    log.close()
+    reopened = TimeLog(path)
+    assert reopened.replayed == 3
+    assert reopened.state(1)["horas_trabajadas"] == 4.0
+    assert reopened.state(2)["hora_inicio"] == datetime(2026, 1, 5, 9)
+    reopened.close()
+
+
+def test_concurrent_appends_are_group_committed(tmp_path):
+    log = TimeLog(str(tmp_path / "log.sqlite3"), commit_delay=0.02)
+    threads = [Thread(target=log.append, args=(uid, INICIO)) for uid in range(50)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert log.write_stats["events"] == 50
+    assert log.write_stats["commits"] < 50
+    log.close()
+
+
+def test_append_many_is_atomic_with_per_event_results():
+    log = TimeLog(":memory:")
+    applied, results = log.append_many([
+        (1, INICIO, datetime(2026, 1, 5, 8)),
+        (2, FIN, datetime(2026, 1, 5, 9)),
+    ])
+    assert not applied
+    assert [r["status"] for r in results] == ["skipped", "error"]
+    assert log.state(1)["hora_inicio"] is None
+    assert list(log.iter_events()) == []
+
+    # se aplican en orden de hora aunque lleguen desordenadas
+    applied, results = log.append_many([
+        (1, FIN, datetime(2026, 1, 5, 12)),
+        (1, INICIO, datetime(2026, 1, 5, 8)),
+    ])
+    assert applied and results[0] == {"status": "ok", "horas": 4.0}
+    assert [kind for _, kind, _ in log.iter_events()] == [INICIO, FIN]
+    log.close()
+
+
+def test_bulk_endpoint(monkeypatch):
+    import copy
+
+    import time_log
+    from app import app
+    from usuarios import usuarios
+
+    monkeypatch.setattr(time_log, "_time_log", TimeLog(":memory:"))
+    monkeypatch.setitem(usuarios, 1, copy.deepcopy(usuarios[1]))
+    client = app.test_client()
+    eventos = [
+        {"user_id": 1, "tipo": "inicio", "ts": "2026-01-05T08:00:00"},
+        {"user_id": 1, "tipo": "fin", "ts": "2026-01-05T07:00:00"},
+        {"user_id": 99, "tipo": "inicio", "ts": "2026-01-05T08:00:00"},
+    ]
+    resp = client.post("/api/marcas", json={"eventos": eventos})
+    assert resp.status_code == 409
+    data = resp.get_json()
+    assert [r["status"] for r in data["results"]] == ["skipped", "error", "error"]
+
+    eventos[1]["ts"] = "2026-01-05T16:00:00"
+    resp = client.post("/api/marcas", json={"eventos": eventos[:2]})
+    assert resp.status_code == 200
+    assert resp.get_json()["results"][1]["horas"] == 8.0
+    assert client.post("/api/marcas", json={}).status_code == 400
+
+
+def test_failed_commit_keeps_marks_accepted_later(tmp_path):
+    import sqlite3
+    import time
+    from threading import Event
+
+    log = TimeLog(str(tmp_path / "log.sqlite3"))
+    release = Event()
+
+    class FailingOnce:
+        # conexión que bloquea y falla el primer lote
+        def __init__(self, conn):
+            self.conn, self.failed = conn, False
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+        def __enter__(self):
+            return self.conn.__enter__()
+
+        def __exit__(self, *exc):
+            return self.conn.__exit__(*exc)
+
+        def executemany(self, *args):
+            if not self.failed:
+                self.failed = True
+                release.wait(5)
+                raise sqlite3.OperationalError("disco lleno")
+            return self.conn.executemany(*args)
+
+    log._conn = FailingOnce(log._conn)
+    errors = []
+
+    def first():
+        try:
+            log.append(1, INICIO, datetime(2026, 1, 5, 8))
+        except TimeLogError as e:
+            errors.append(e)
+
+    failing = Thread(target=first)
+    failing.start()
+    while not log._conn.failed:
+        time.sleep(0.01)
+    # mientras el lote falla, otro hilo reinicia y vuelve a marcar (encoladas detrás)
+    later = Thread(target=log.append_many, args=([(1, REINICIO, datetime(2026, 1, 5, 8, 30)),
+                                                  (1, INICIO, datetime(2026, 1, 5, 9))],))
+    later.start()
+    while log._queue.qsize() < 1:
+        time.sleep(0.01)
+    release.set()
+    failing.join()
+    later.join()
+
+    assert len(errors) == 1
+    assert log.state(1)["hora_inicio"] == datetime(2026, 1, 5, 9)
+    assert [kind for _, kind, _ in log.iter_events()] == [REINICIO, INICIO]
+    log.close()
@@ -0,0 +1,110 @@
+# tests/test_user_repository.py
+import csv
+import sqlite3
+
+import pytest
+
+from user_repository import UserRepository, calibrate_iterations, hash_password, verify_password
+
+
+def _users():
+    return {
+        1: {"nombre": "Ana", "correo": "Ana@Example.com", "contraseña": "1234", "activo": True},
+        2: {"nombre": "Beto", "correo": "beto@example.com", "contraseña": "abcd", "activo": False},
+    }
+
+
+def test_hash_roundtrip():
+    encoded = hash_password("secreto", 1000)
+    assert encoded.startswith("pbkdf2_sha256$1000$")
+    assert verify_password("secreto", encoded)
+    assert not verify_password("otro", encoded)
+    assert hash_password("secreto", 1000) != encoded  # sal distinta
+
+
+def test_calibration_respects_bounds():
+    assert calibrate_iterations(target_ms=0.001, minimum=1000) == 1000
+    assert calibrate_iterations(target_ms=10_000, minimum=1000, maximum=2000) == 2000
+
+
+def test_verify_uses_email_index_and_hashes_plaintext():
+    users = _users()
+    repo = UserRepository(users, iterations=1000)
+    assert "contraseña" not in users[1] and "contraseña_hash" in users[1]
+    assert repo.verify("ana@example.com ", "1234") == 1
+    assert repo.verify("ana@example.com", "mala") is None
+    assert repo.verify("nadie@example.com", "1234") is None
+    assert repo.verify("beto@example.com", "abcd") is None  # inactivo
+    assert repo.get(1) is users[1]
+
+
+def test_duplicate_email_rejected():
+    repo = UserRepository(_users(), iterations=1000)
+    with pytest.raises(ValueError):
+        repo.add(3, {"correo": "ANA@example.com"})
+
+
+def test_rehash_on_iteration_change():
+    users = _users()
+    UserRepository(users, iterations=1000)
+    repo = UserRepository(users, iterations=2000)
+    assert repo.verify("ana@example.com", "1234") == 1
+    assert users[1]["contraseña_hash"].startswith("pbkdf2_sha256$2000$")
+
+
+def test_load_csv_with_exhausted_budget_hashes_on_first_login(tmp_path):
+    path = tmp_path / "usuarios.csv"
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["id", "nombre", "correo", "contraseña", "activo", "restricciones_turno"])
+        for i in range(1, 51):
+            writer.writerow([i, f"U{i}", f"u{i}@example.com", f"pw{i}", "1", "APERTURA" if i == 1 else ""])
+    repo = UserRepository({}, iterations=1000)
+    stats = repo.load_csv(str(path), budget_seconds=0)
+    assert stats["loaded"] == 50 and stats["pending_hashes"] > 0
+    assert repo.get(1)["restricciones_turno"] == ["APERTURA"]
+    assert repo.verify("u50@example.com", "pw50") == 50
+    assert "contraseña" not in repo.get(50)
+
+
+def test_load_sqlite(tmp_path):
+    path = str(tmp_path / "usuarios.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE usuarios (id INTEGER, nombre TEXT, correo TEXT, contraseña_hash TEXT, activo INTEGER)")
+    conn.execute("INSERT INTO usuarios VALUES (7, 'Carla', 'carla@example.com', ?, 1)", (hash_password("x1", 1000),))
+    conn.commit()
+    conn.close()
+    repo = UserRepository({}, iterations=1000)
+    assert repo.load_sqlite(path)["pending_hashes"] == 0
+    assert repo.verify("carla@example.com", "x1") == 7
+
+
+def test_lazy_repository_calibrates_and_hashes_on_demand(monkeypatch):
+    import user_repository
+
+    calls = []
+    monkeypatch.setattr(user_repository, "calibrate_iterations", lambda target_ms: calls.append(target_ms) or 1000)
+    users = _users()
+    repo = UserRepository(users, target_ms=5, lazy=True)
+    assert calls == [] and "contraseña" in users[1]
+    assert repo.verify("ana@example.com", "1234") == 1
+    assert calls == [5] and users[1]["contraseña_hash"].startswith("pbkdf2_sha256$1000$")
+    assert repo.prepare() == 0
+    assert "contraseña" not in users[2] and calls == [5]
+
+
+def test_concurrent_first_logins_with_plaintext_password():
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Barrier
+
+    for _ in range(20):
+        repo = UserRepository(_users(), iterations=1000, max_concurrent_verifications=8, lazy=True)
+        barrier = Barrier(8)
+
+        def login(_):
+            barrier.wait()
+            return repo.verify("ana@example.com", "1234")
+
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(login, range(8))) == [1] * 8
+        assert "contraseña" not in repo.get(1)
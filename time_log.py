@@ -0,0 +1,327 @@
+# time_log.py
+"""
+Registro persistente de jornada (solo anexar) con escrituras agrupadas.
+
+ - cada marca (inicio, fin, reinicio) se anexa a una tabla SQLite en modo WAL
+ - un único hilo escritor agrupa las marcas pendientes en una transacción:
+   un commit (y un fsync) por lote, no por marca (group commit)
+ - append() vuelve cuando la marca es durable
+ - el estado actual por asesor vive en un índice en memoria que se reconstruye
+   reproduciendo el registro al arrancar
+ - si un lote no se puede escribir el índice se reconstruye igual: registro durable más
+   las marcas aún en cola (nunca se restaura una copia que pise marcas posteriores)
+"""
+from datetime import datetime
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+INICIO = "inicio"
+FIN = "fin"
+REINICIO = "reinicio"
+KINDS = (INICIO, FIN, REINICIO)
+
+_STOP = object()
+
+
+class TimeLogError(Exception):
+    """Marca inválida para el estado actual del asesor (p. ej. fin sin inicio)."""
+
+
+def _empty_state() -> Dict[str, Any]:
+    return {"hora_inicio": None, "hora_fin": None, "horas_trabajadas": 0.0}
+
+
+def apply_event(state: Dict[str, Any], kind: str, ts: datetime) -> Optional[float]:
+    """
+    Aplica una marca al estado de un asesor (valida y muta). Devuelve las horas de la
+    jornada al registrar el fin. Es la misma lógica al registrar y al reproducir el log.
+    """
+    if kind == INICIO:
+        if state["hora_inicio"]:
+            raise TimeLogError("⚠️ Hora de inicio ya registrada")
+        state["hora_inicio"] = ts
+        return None
+    if kind == FIN:
+        if not state["hora_inicio"]:
+            raise TimeLogError("⚠️ Primero registre la hora de inicio")
+        if state["hora_fin"]:
+            raise TimeLogError("⚠️ Hora de fin ya registrada")
+        if ts < state["hora_inicio"]:
+            raise TimeLogError("⚠️ La hora de fin es anterior a la de inicio")
+        state["hora_fin"] = ts
+        horas = round((ts - state["hora_inicio"]).total_seconds() / 3600, 2)
+        state["horas_trabajadas"] = state["horas_trabajadas"] + horas
+        return horas
+    if kind == REINICIO:
+        state["hora_inicio"] = None
+        state["hora_fin"] = None
+        return None
+    raise TimeLogError(f"Tipo de marca desconocido: {kind}")
+
+
+class _PendingWrite:
+    __slots__ = ("rows", "done", "error")
+
+    def __init__(self, rows: List[Tuple]):
+        self.rows = rows
+        self.done = Event()
+        self.error: Optional[BaseException] = None
+
+
+class TimeLog:
+    def __init__(
+        self,
+        path: str = "time_log.sqlite3",
+        max_batch: int = 512,
+        commit_delay: float = 0.0,
+        synchronous: str = "FULL",
+    ):
+        """
+        path: archivo SQLite (":memory:" para un registro no persistente, útil en pruebas)
+        max_batch: marcas máximas por transacción
+        commit_delay: espera (s) para juntar más marcas antes de cada commit; con 0 el lote
+            es lo que se haya acumulado mientras se escribía el anterior
+        synchronous: PRAGMA synchronous (FULL: fsync en cada commit)
+        """
+        self.path = path
+        self.max_batch = max_batch
+        self.commit_delay = commit_delay
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={synchronous}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS eventos ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,"
+            " kind TEXT NOT NULL, ts TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        self._state: Dict[int, Dict[str, Any]] = {}
+        self._lock = Lock()
+        # la conexión la comparten el hilo escritor y las lecturas de iter_events
+        self._db_lock = Lock()
+        self._queue: "Queue[Any]" = Queue()
+        self.write_stats = {"events": 0, "commits": 0, "max_batch": 0}
+        self.replayed = self._replay()
+        self._writer = Thread(target=self._write_loop, name="time-log-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _apply_rows(states: Dict[int, Dict[str, Any]], rows) -> int:
+        count = 0
+        for user_id, kind, ts in rows:
+            state = states.setdefault(user_id, _empty_state())
+            try:
+                apply_event(state, kind, datetime.fromisoformat(ts))
+            except TimeLogError:
+                logger.warning("Marca inconsistente en el registro ignorada: %s %s %s", user_id, kind, ts)
+            count += 1
+        return count
+
+    def _replay(self) -> int:
+        """Reconstruye el índice en memoria desde el registro. Devuelve las marcas leídas."""
+        start = time.perf_counter()
+        count = self._apply_rows(self._state, self._conn.execute("SELECT user_id, kind, ts FROM eventos ORDER BY seq"))
+        logger.info("Registro de jornada reproducido: %s marcas en %.3fs", count, time.perf_counter() - start)
+        return count
+
+    def _rebuild(self) -> None:
+        """
+        Tras un lote fallido: índice = registro durable + marcas que siguen en cola (ya
+        aceptadas por otros hilos). Se llama con self._lock tomado, así que no se encolan
+        marcas nuevas mientras tanto.
+        """
+        states: Dict[int, Dict[str, Any]] = {}
+        with self._db_lock:
+            self._apply_rows(states, self._conn.execute("SELECT user_id, kind, ts FROM eventos ORDER BY seq"))
+        with self._queue.mutex:
+            queued = [item for item in self._queue.queue if item is not _STOP]
+        self._apply_rows(states, (row for item in queued for row in item.rows))
+        self._state.clear()
+        self._state.update(states)
+
+    # --- Escritura agrupada ---
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            rows = len(item.rows)
+            deadline = time.monotonic() + self.commit_delay
+            stop = False
+            while rows < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except Empty:
+                    break
+                if nxt is _STOP:
+                    stop = True
+                    break
+                batch.append(nxt)
+                rows += len(nxt.rows)
+            self._commit(batch, rows)
+            if stop:
+                return
+
+    def _commit(self, batch: List[_PendingWrite], rows: int) -> None:
+        try:
+            with self._db_lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO eventos (user_id, kind, ts) VALUES (?, ?, ?)",
+                    [row for item in batch for row in item.rows],
+                )
+            self.write_stats["events"] += rows
+            self.write_stats["commits"] += 1
+            self.write_stats["max_batch"] = max(self.write_stats["max_batch"], rows)
+        except Exception as e:
+            logger.exception("Error escribiendo el registro de jornada")
+            for item in batch:
+                item.error = e
+            # las marcas del lote no quedaron escritas: se quitan del índice sin tocar
+            # las que otros hilos aceptaron después
+            try:
+                with self._lock:
+                    self._rebuild()
+            except Exception:
+                logger.exception("No se pudo reconstruir el índice del registro de jornada")
+        for item in batch:
+            item.done.set()
+
+    @staticmethod
+    def _wait(pending: _PendingWrite) -> None:
+        pending.done.wait()
+        if pending.error is not None:
+            # el hilo escritor ya la quitó del índice (_rebuild)
+            raise TimeLogError(f"No se pudo guardar la marca: {pending.error}")
+
+    # --- API ---
+
+    def append(self, user_id: int, kind: str, ts: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Valida y registra una marca; vuelve cuando es durable.
+        Devuelve el nuevo estado del asesor más "horas" (horas de la jornada si kind == FIN).
+        Lanza TimeLogError si la marca no es válida para el estado actual.
+        """
+        ts = ts or datetime.now()
+        with self._lock:
+            state = self._state.setdefault(user_id, _empty_state())
+            horas = apply_event(state, kind, ts)
+            result = dict(state, horas=horas)
+            pending = _PendingWrite([(user_id, kind, ts.isoformat())])
+            # encolar con el candado tomado: el orden del registro es el del índice
+            self._queue.put(pending)
+        self._wait(pending)
+        return result
+
+    def append_many(
+        self, events: List[Tuple[int, str, datetime]], commit: bool = True
+    ) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Valida en una pasada y registra varias marcas de forma atómica (una transacción).
+        Las marcas se aplican en orden de hora (estable), con las mismas reglas que append().
+
+        Devuelve (aplicado, resultados) con un resultado por marca, en el orden recibido:
+        {"status": "ok", "horas"} o {"status": "error", "message"}. Si alguna marca es
+        inválida (o commit=False) no se registra ninguna y las válidas quedan "skipped".
+        """
+        order = sorted(range(len(events)), key=lambda i: events[i][2])
+        results: List[Dict[str, Any]] = [{}] * len(events)
+        failed = False
+        with self._lock:
+            work: Dict[int, Dict[str, Any]] = {}
+            for i in order:
+                uid, kind, ts = events[i]
+                state = work.get(uid)
+                if state is None:
+                    state = work[uid] = dict(self._state.get(uid) or _empty_state())
+                try:
+                    results[i] = {"status": "ok", "horas": apply_event(state, kind, ts)}
+                except TimeLogError as e:
+                    results[i] = {"status": "error", "message": str(e)}
+                    failed = True
+            if failed or not commit:
+                for result in results:
+                    if result["status"] == "ok":
+                        result["status"] = "skipped"
+                return False, results
+            for uid, state in work.items():
+                self._state.setdefault(uid, _empty_state()).update(state)
+            pending = _PendingWrite([
+                (uid, kind, ts.isoformat()) for uid, kind, ts in (events[i] for i in order)
+            ])
+            self._queue.put(pending)
+        self._wait(pending)
+        return True, results
+
+    def state(self, user_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._state.get(user_id) or _empty_state())
+
+    def states(self) -> Dict[int, Dict[str, Any]]:
+        with self._lock:
+            return {uid: dict(state) for uid, state in self._state.items()}
+
+    def iter_events(self) -> Iterator[Tuple[int, str, datetime]]:
+        """Marcas ya escritas, en orden de registro."""
+        with self._db_lock:
+            rows = self._conn.execute("SELECT user_id, kind, ts FROM eventos ORDER BY seq").fetchall()
+        for user_id, kind, ts in rows:
+            yield user_id, kind, datetime.fromisoformat(ts)
+
+    def rows_since(self, seq: int = 0) -> List[Tuple[int, int, str, str]]:
+        """Filas crudas (seq, user_id, kind, ts ISO) escritas después de seq, para lecturas incrementales."""
+        with self._db_lock:
+            return self._conn.execute(
+                "SELECT seq, user_id, kind, ts FROM eventos WHERE seq > ? ORDER BY seq", (seq,)
+            ).fetchall()
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._conn.close()
+
+
+def sync_usuario(usuario: Dict[str, Any], state: Dict[str, Any]) -> None:
+    """Copia el estado del índice al registro del usuario (lo que leen las plantillas)."""
+    for field in ("hora_inicio", "hora_fin"):
+        value = state.get(field)
+        if value:
+            usuario[field] = value
+            usuario[f"{field}_str"] = value.strftime("%H:%M:%S")
+        else:
+            usuario.pop(field, None)
+            usuario.pop(f"{field}_str", None)
+    usuario["horas_trabajadas"] = state.get("horas_trabajadas", 0.0)
+
+
+_time_log: Optional[TimeLog] = None
+_time_log_lock = Lock()
+
+
+def get_time_log() -> TimeLog:
+    """Registro compartido del proceso (TIME_LOG_PATH, por defecto time_log.sqlite3); se abre al primer uso."""
+    global _time_log
+    with _time_log_lock:
+        if _time_log is None:
+            _time_log = TimeLog(
+                path=os.environ.get("TIME_LOG_PATH", "time_log.sqlite3"),
+                commit_delay=float(os.environ.get("TIME_LOG_COMMIT_DELAY", "0")),
+            )
+            from usuarios import usuarios
+
+            for uid, state in _time_log.states().items():
+                if uid in usuarios:
+                    sync_usuario(usuarios[uid], state)
+        return _time_log
+
+# Fin de time_log.py
@@ -0,0 +1,296 @@
+# user_repository.py
+"""
+Repositorio de usuarios con índices por id y por correo.
+
+ - búsqueda O(1) por id y por correo (único, sin distinguir mayúsculas)
+ - contraseñas con PBKDF2-SHA256 con sal; las iteraciones se calibran la primera vez que
+   hacen falta para que una verificación cueste ~PASSWORD_HASH_TARGET_MS y no acapare
+   los workers
+ - el repositorio del módulo es perezoso: importarlo no calibra ni hashea (no suma al
+   arranque de cada proceso); lo hace prepare() en el calentamiento de la app (WARMUP,
+   ver startup.py) o, si no, el primer login
+ - carga masiva desde CSV o SQLite con un presupuesto de tiempo de arranque: las
+   contraseñas en claro que no alcancen a hashearse se hashean en su primer login
+ - los registros siguen siendo los dicts de usuarios.usuarios (las rutas de
+   jornada los modifican directamente)
+"""
+from threading import BoundedSemaphore, Lock
+from typing import Any, Dict, Iterable, Optional
+import csv
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = "pbkdf2_sha256"
+MIN_ITERATIONS = 50_000
+MAX_ITERATIONS = 1_000_000
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+
+
+def calibrate_iterations(target_ms: float = 25.0, minimum: int = MIN_ITERATIONS, maximum: int = MAX_ITERATIONS) -> int:
+    """Número de iteraciones para que un hash tarde ~target_ms en esta máquina."""
+    probe = 20_000
+    start = time.perf_counter()
+    _pbkdf2("calibracion", b"\0" * 16, probe)
+    elapsed_ms = max((time.perf_counter() - start) * 1000, 1e-3)
+    iterations = int(probe * target_ms / elapsed_ms)
+    return max(minimum, min(maximum, iterations))
+
+
+def hash_password(password: str, iterations: int, salt: Optional[bytes] = None) -> str:
+    salt = salt or secrets.token_bytes(16)
+    digest = _pbkdf2(password, salt, iterations)
+    return f"{ALGORITHM}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    try:
+        algorithm, iterations, salt, digest = encoded.split("$")
+    except ValueError:
+        return False
+    if algorithm != ALGORITHM:
+        return False
+    candidate = _pbkdf2(password, bytes.fromhex(salt), int(iterations))
+    return hmac.compare_digest(candidate, bytes.fromhex(digest))
+
+
+def _hash_iterations(encoded: str) -> int:
+    return int(encoded.split("$")[1])
+
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "si", "sí", "y")
+
+
+def _parse_restricciones(value: Any) -> list:
+    if isinstance(value, list):
+        return value
+    return [r.strip() for r in str(value or "").split("|") if r.strip()]
+
+
+class UserRepository:
+    def __init__(
+        self,
+        users: Optional[Dict[int, Dict[str, Any]]] = None,
+        iterations: Optional[int] = None,
+        max_concurrent_verifications: Optional[int] = None,
+        target_ms: float = 25.0,
+        lazy: bool = False,
+    ):
+        """
+        users: dict id -> registro; se usa tal cual como índice por id (no se copia)
+        iterations: iteraciones PBKDF2 (por defecto calibradas con calibrate_iterations(target_ms)
+            la primera vez que se necesitan)
+        max_concurrent_verifications: hashes simultáneos (por defecto os.cpu_count());
+            el resto de logins espera en vez de saturar la CPU
+        lazy: si True no se hashea al construir ni al cargar: las contraseñas en claro se
+            hashean en prepare() o en su primer login
+        """
+        self._by_id: Dict[int, Dict[str, Any]] = users if users is not None else {}
+        self._by_email: Dict[str, int] = {}
+        self._iterations = iterations
+        self.target_ms = target_ms
+        self.lazy = lazy
+        self._hash_slots = BoundedSemaphore(max_concurrent_verifications or os.cpu_count() or 1)
+        self._lock = Lock()
+        self._dummy: Optional[str] = None
+        self.load_stats: Dict[str, Any] = {}
+        for uid, record in list(self._by_id.items()):
+            self._index(uid, record)
+        if not lazy:
+            self.hash_pending()
+
+    @property
+    def iterations(self) -> int:
+        if self._iterations is None:
+            with self._lock:
+                if self._iterations is None:
+                    self._iterations = calibrate_iterations(self.target_ms)
+                    logger.info("Iteraciones PBKDF2 calibradas: %s", self._iterations)
+        return self._iterations
+
+    @property
+    def _dummy_hash(self) -> str:
+        # hash de relleno para que un correo inexistente cueste lo mismo que uno válido
+        if self._dummy is None:
+            self._dummy = hash_password(secrets.token_hex(8), self.iterations)
+        return self._dummy
+
+    def prepare(self, budget_seconds: Optional[float] = None) -> int:
+        """
+        Calibra las iteraciones y hashea las contraseñas en claro pendientes (con presupuesto,
+        ver hash_pending). Devuelve las pendientes; llamarlo de nuevo sólo hashea lo que falte.
+        """
+        self._dummy_hash  # calibra y genera el hash de relleno
+        return self.hash_pending(budget_seconds)
+
+    @staticmethod
+    def _email_key(correo: str) -> str:
+        return (correo or "").strip().lower()
+
+    def _index(self, uid: int, record: Dict[str, Any]) -> None:
+        key = self._email_key(record.get("correo"))
+        owner = self._by_email.get(key)
+        if owner is not None and owner != uid:
+            raise ValueError(f"Correo duplicado: {record.get('correo')} (usuarios {owner} y {uid})")
+        self._by_email[key] = uid
+
+    def add(self, uid: int, record: Dict[str, Any]) -> None:
+        with self._lock:
+            previous = self._by_id.get(uid)
+            self._index(uid, record)
+            if previous is not None:
+                old_key = self._email_key(previous.get("correo"))
+                if old_key != self._email_key(record.get("correo")):
+                    self._by_email.pop(old_key, None)
+            self._by_id[uid] = record
+
+    def get(self, uid: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(uid)
+
+    def get_by_email(self, correo: str) -> Optional[int]:
+        return self._by_email.get(self._email_key(correo))
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def set_password(self, uid: int, contraseña: str) -> None:
+        record = self._by_id[uid]
+        record["contraseña_hash"] = hash_password(contraseña, self.iterations)
+        record.pop("contraseña", None)
+
+    def hash_pending(self, budget_seconds: Optional[float] = None) -> int:
+        """
+        Hashea las contraseñas en claro pendientes. Con budget_seconds se detiene al agotar
+        el presupuesto; las restantes se hashean en su primer login. Devuelve las pendientes.
+        """
+        start = time.perf_counter()
+        pending = [uid for uid, r in self._by_id.items() if "contraseña" in r]
+        for done, uid in enumerate(pending):
+            if budget_seconds is not None and time.perf_counter() - start > budget_seconds:
+                remaining = len(pending) - done
+                logger.warning("Presupuesto de arranque agotado: %s contraseñas se hashearán en su primer login", remaining)
+                return remaining
+            plaintext = self._by_id[uid].get("contraseña")
+            if plaintext is not None:  # puede haberla migrado un login concurrente
+                self.set_password(uid, plaintext)
+        return 0
+
+    def verify(self, correo: str, contraseña: str) -> Optional[int]:
+        """Devuelve el id del usuario activo con esas credenciales, o None."""
+        uid = self.get_by_email(correo)
+        record = self._by_id.get(uid) if uid is not None else None
+        with self._hash_slots:
+            if record is None:
+                verify_password(contraseña, self._dummy_hash)
+                return None
+            # se lee una sola vez: otro login o hash_pending puede migrarla entretanto
+            # (set_password guarda el hash antes de quitar la contraseña en claro)
+            plaintext = record.get("contraseña")
+            if plaintext is not None:
+                # cargado sin hashear (presupuesto de arranque agotado)
+                ok = hmac.compare_digest(str(plaintext).encode("utf-8"), contraseña.encode("utf-8"))
+                if ok:
+                    self.set_password(uid, contraseña)
+            else:
+                encoded = record.get("contraseña_hash", "")
+                ok = verify_password(contraseña, encoded)
+                if ok and _hash_iterations(encoded) != self.iterations:
+                    # rehash con el factor de trabajo actual
+                    self.set_password(uid, contraseña)
+        if not ok or not record.get("activo", True):
+            return None
+        return uid
+
+    # --- Carga masiva ---
+
+    def load_records(self, rows: Iterable[Dict[str, Any]], budget_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Carga filas con columnas id, nombre, correo, contraseña o contraseña_hash, rol,
+        activo y restricciones_turno (separadas por '|'). Devuelve estadísticas de la carga.
+        """
+        start = time.perf_counter()
+        loaded = 0
+        for row in rows:
+            uid = int(row["id"])
+            record = {
+                "nombre": row.get("nombre") or "",
+                "correo": row["correo"],
+                "rol": row.get("rol") or "asesor",
+                "activo": _parse_bool(row.get("activo", True)),
+                "restricciones_turno": _parse_restricciones(row.get("restricciones_turno")),
+                "hora_inicio": None,
+                "hora_fin": None,
+                "horas_trabajadas": 0.0,
+            }
+            if row.get("contraseña_hash"):
+                record["contraseña_hash"] = row["contraseña_hash"]
+            elif row.get("contraseña"):
+                record["contraseña"] = row["contraseña"]
+            self.add(uid, record)
+            loaded += 1
+        index_seconds = time.perf_counter() - start
+        if self.lazy:
+            pending = sum(1 for r in self._by_id.values() if "contraseña" in r)
+        else:
+            remaining = None if budget_seconds is None else max(0.0, budget_seconds - index_seconds)
+            pending = self.hash_pending(remaining)
+        self.load_stats = {
+            "loaded": loaded,
+            "pending_hashes": pending,
+            "index_seconds": round(index_seconds, 4),
+            "total_seconds": round(time.perf_counter() - start, 4),
+        }
+        logger.info("Usuarios cargados: %s", self.load_stats)
+        return self.load_stats
+
+    def load_csv(self, path: str, budget_seconds: Optional[float] = None) -> Dict[str, Any]:
+        with open(path, newline="", encoding="utf-8") as fh:
+            return self.load_records(csv.DictReader(fh), budget_seconds)
+
+    def load_sqlite(self, path: str, table: str = "usuarios", budget_seconds: Optional[float] = None) -> Dict[str, Any]:
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute(f'SELECT * FROM "{table}"')
+            return self.load_records((dict(r) for r in rows), budget_seconds)
+        finally:
+            conn.close()
+
+
+# presupuesto (segundos) de prepare() en el calentamiento de la app
+USERS_LOAD_BUDGET = float(os.environ.get("USERS_LOAD_BUDGET", "5"))
+
+
+def _repository_from_env() -> UserRepository:
+    from usuarios import usuarios
+
+    iterations = os.environ.get("PASSWORD_HASH_ITERATIONS")
+    repo = UserRepository(
+        usuarios,
+        iterations=int(iterations) if iterations else None,
+        target_ms=float(os.environ.get("PASSWORD_HASH_TARGET_MS", "25")),
+        lazy=True,
+    )
+    if os.environ.get("USERS_CSV"):
+        repo.load_csv(os.environ["USERS_CSV"])
+    elif os.environ.get("USERS_DB"):
+        repo.load_sqlite(os.environ["USERS_DB"])
+    return repo
+
+
+# Repositorio compartido del proceso (envuelve usuarios.usuarios)
+user_repository = _repository_from_env()
+
+# Fin de user_repository.py